@@ -13,11 +13,20 @@ __all__ = [
     "read_bool_setting",
     "read_float_setting",
     "reload_settings",
+    "PluginSettings",
+    "read_settings_snapshot",
+    "invalidate_settings_snapshot",
+    "settings_snapshot",
+    "add_settings_invalidation_listener",
+    "remove_settings_invalidation_listener",
     "DeploymentCompanionOptionsWidget",
 ]
 
+import contextlib
 import logging
-from typing import Any
+from contextvars import ContextVar
+from types import MappingProxyType
+from typing import Any, Iterator, Mapping, Optional
 
 # noinspection PyUnresolvedReferences
 from qgis.PyQt import QtCore, QtGui, uic
@@ -156,16 +165,26 @@ class DeploymentCompanionOptionsWidget(OptionWidgetBase, OptionWidget):
             )  # Only id to obscure sensitive information from logs
 
             store_plugin_setting(key, value, project_name=PROJECT_NAME)
+            invalidate_settings_snapshot()
         except Exception as e:
             logger.warning(e)
 
 
-def read_bool_setting(key: str) -> bool:
-    v = read_plugin_setting(
-        key,
-        default_value=DEFAULT_PLUGIN_SETTINGS[key],
-        project_name=PROJECT_NAME,
-    )
+def read_bool_setting(key: str, settings: Optional["PluginSettings"] = None) -> bool:
+    if settings is None:
+        settings = read_settings_snapshot()
+
+    return settings.get_bool(key)
+
+
+def read_float_setting(key: str, settings: Optional["PluginSettings"] = None) -> float:
+    if settings is None:
+        settings = read_settings_snapshot()
+
+    return settings.get_float(key)
+
+
+def _to_bool_setting(key: str, v: Any) -> bool:
     if isinstance(v, bool):
         return v
 
@@ -181,18 +200,141 @@ def read_bool_setting(key: str) -> bool:
         raise Exception(f"{v=} was invalid for bool setting")
 
 
-def read_float_setting(key: str) -> float:
-    v = read_plugin_setting(
-        key,
-        default_value=DEFAULT_PLUGIN_SETTINGS[key],
-        project_name=PROJECT_NAME,
-    )
+def _to_float_setting(key: str, v: Any) -> float:
     if isinstance(v, float):
         return v
 
     return float(v)
 
 
+CREDENTIAL_SETTING_KEYS = (
+    "MAPS_INDOORS_USERNAME",
+    "MAPS_INDOORS_PASSWORD",
+    "MAPS_INDOORS_MANAGER_API_TOKEN",
+    "MAPS_INDOORS_INTEGRATION_API_TOKEN",
+)
+
+
+class PluginSettings:
+    """
+    An immutable snapshot of all plugin settings, read from the project entries once.
+
+    Build it at the start of an operation and pass it down, rather than reading project entries per feature.
+    Credentials are not part of it, they are read where the connection is set up.
+    """
+
+    __slots__ = ("_values",)
+
+    def __init__(self, values: Mapping[str, Any]):
+        self._values = MappingProxyType(dict(values))
+
+    @classmethod
+    def read(cls) -> "PluginSettings":
+        return cls(
+            {
+                k: read_plugin_setting(
+                    k,
+                    default_value=DEFAULT_PLUGIN_SETTINGS[k],
+                    project_name=PROJECT_NAME,
+                )
+                for k in DEFAULT_PLUGIN_SETTINGS.keys()
+                if k not in CREDENTIAL_SETTING_KEYS
+            }
+        )
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._values
+
+    def __repr__(self) -> str:  # Values are left out, they may be sensitive
+        return f"{self.__class__.__name__}({sorted(self._values.keys())})"
+
+    def get_bool(self, key: str) -> bool:
+        return _to_bool_setting(key, self._values[key])
+
+    def get_float(self, key: str) -> float:
+        return _to_float_setting(key, self._values[key])
+
+
+_SETTINGS_SNAPSHOT: Optional[PluginSettings] = None
+_PINNED_SETTINGS: ContextVar[Optional[PluginSettings]] = ContextVar(
+    "_PINNED_SETTINGS", default=None
+)  # Per thread, a QgsTask pins the settings it was created with in its own run
+
+
+def read_settings_snapshot() -> PluginSettings:
+    """
+    The settings of the operation in progress, otherwise the cached snapshot, read anew only after it was invalidated
+
+    :return:
+    """
+    global _SETTINGS_SNAPSHOT
+
+    pinned_settings = _PINNED_SETTINGS.get()
+    if pinned_settings is not None:
+        return pinned_settings
+
+    if _SETTINGS_SNAPSHOT is None:
+        _SETTINGS_SNAPSHOT = PluginSettings.read()
+
+    return _SETTINGS_SNAPSHOT
+
+
+def invalidate_settings_snapshot() -> None:
+    """
+    Called when settings are written, operations already running keep the snapshot they started with
+
+    :return:
+    """
+    global _SETTINGS_SNAPSHOT
+
+    _SETTINGS_SNAPSHOT = None
+
+
+@contextlib.contextmanager
+def settings_snapshot(
+    settings: Optional[PluginSettings] = None,
+) -> Iterator[PluginSettings]:
+    """
+    Pins the settings for the duration of an operation, so it behaves consistently even if the settings change
+    partway through. The pin is local to the current thread, or context.
+
+    :param settings: Settings to pin, the current snapshot if None
+    :return:
+    """
+    if settings is None:
+        settings = read_settings_snapshot()
+
+    token = _PINNED_SETTINGS.set(settings)
+
+    try:
+        yield settings
+    finally:
+        _PINNED_SETTINGS.reset(token)
+
+
+def add_settings_invalidation_listener() -> None:
+    """
+    Settings are stored in the project, so a snapshot is stale once another project is loaded
+
+    :return:
+    """
+    remove_settings_invalidation_listener()
+
+    QGIS_PROJECT.readProject.connect(invalidate_settings_snapshot)
+    QGIS_PROJECT.cleared.connect(invalidate_settings_snapshot)
+
+
+def remove_settings_invalidation_listener() -> None:
+    for signal in (QGIS_PROJECT.readProject, QGIS_PROJECT.cleared):
+        try:
+            signal.disconnect(invalidate_settings_snapshot)
+        except (TypeError, RuntimeError):
+            ...
+
+
 class DeploymentCompanionOptionsPage(QgsOptionsPageWidget):
 
     def __init__(self, parent: Any):
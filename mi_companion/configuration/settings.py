@@ -5,6 +5,7 @@ from typing import Any, Dict, Mapping, Optional
 from qgis.core import QgsProject
 
 from mi_companion import DEFAULT_PLUGIN_SETTINGS, PROJECT_NAME
+from .options import invalidate_settings_snapshot
 
 VERBOSE = True
 QGIS_PROJECT = QgsProject.instance()
@@ -34,6 +35,8 @@ def restore_default_plugin_settings(
             key, value, project_name=project_name, verbose=verbose
         )
 
+    invalidate_settings_snapshot()
+
 
 def list_project_settings() -> Dict[str, Any]:
     # return QGIS_PROJECT.customVariables()
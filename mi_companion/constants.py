@@ -141,6 +141,7 @@ DEFAULT_PLUGIN_SETTINGS = {
     "POST_FIT_FLOORS": False,
     "POST_FIT_BUILDINGS": False,
     "POST_FIT_VENUES": False,
+    "POST_FIT_CHANGED_ONLY": False,  # Only fit floors, buildings and venues with changed layers, and their parents
     "ALLOW_SOLUTION_CREATION": False,
     "ALLOW_LOCATION_TYPE_CREATION": True,
     "ALLOW_CATEGORY_TYPE_CREATION": True,
@@ -153,6 +154,15 @@ DEFAULT_PLUGIN_SETTINGS = {
     "ADD_LOCATION_TYPE_MODE_TOGGLE": False,
     "ADD_ANCHOR_AND_3DROTSCL_SYMBOLS": False,
     "ADD_SVG_AND_RASTER_SYMBOLS": False,
+    "STORE_VENUES_IN_GEOPACKAGE": False,
+    "VENUE_GEOPACKAGES_TO_KEEP": 3,  # Per venue, older ones not used by the project are deleted
+    "CACHE_SOLUTION_SNAPSHOTS": False,
+    "SOLUTION_SNAPSHOT_BUDGET_MB": 512.0,
+    "MATERIALIZE_LOCATION_TYPE_LOOKUPS": True,
+    "GRAPH_SNAP_TOLERANCE_M": 0.05,
+    "GRAPH_NEAR_MISS_DISTANCE_M": 0.5,
+    "CHECK_DOORS_AGAINST_GRAPH": True,
+    "DOOR_WALL_CROSSING_DISTANCE_M": 0.5,
 }
 
 INSERT_INDEX = 0  # if zero first, if one after hierarchy data
@@ -13,6 +13,7 @@ from mi_companion.gui.typing_utilities import get_args, is_optional, is_union
 FORM_CLASS, _ = uic.loadUiType(os.path.join(os.path.dirname(__file__), "dialog.ui"))
 
 from mi_companion import RESOURCE_BASE_PATH
+from mi_companion.configuration import settings_snapshot
 
 logger = logging.getLogger(RESOURCE_BASE_PATH)
 
@@ -86,6 +87,7 @@ class Dialog(QDialog, FORM_CLASS):
                     value = type(self.parameter_signature[k].default)(value)
                 call_kwarg[k] = value
 
-        run(**call_kwarg)
+        with settings_snapshot():  # Same settings for the entire run
+            run(**call_kwarg)
 
         self.close()
@@ -19,6 +19,7 @@ __all__ = ["Dialog"]
 FORM_CLASS, _ = uic.loadUiType(str(Path(__file__).parent / "dialog.ui"))
 
 from mi_companion import RESOURCE_BASE_PATH
+from mi_companion.configuration import settings_snapshot
 
 logger = logging.getLogger(RESOURCE_BASE_PATH)
 
@@ -115,6 +116,7 @@ class Dialog(QDialog, FORM_CLASS):
             else:
                 logger.error(f"{v=}")
 
-        run(**call_kwarg)
+        with settings_snapshot():  # Same settings for the entire run
+            run(**call_kwarg)
 
         self.close()
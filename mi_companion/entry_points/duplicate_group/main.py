@@ -24,30 +24,36 @@ def run(
     :param randomize_fields: What fields to randomize, separated by comma
     :return:
     """
+    from mi_companion.mi_editor.hierarchy import suspended_hierarchy_validation
     from jord.qgis_utilities.helpers import duplicate_groups, duplicate_tree_node
 
     # TODO: ADD INDIVIDUAL LAYER FUNCTIONALITY
 
     selected_nodes = iface.layerTreeView().selectedNodes()
-    if len(selected_nodes) == 1:  # TODO: SHOULD WE ALLOW MORE?
-        new_group = None
-        for group in selected_nodes:
-            if isinstance(group, QgsLayerTreeLayer):
-                if new_name is ... or new_name == "" or new_name is None:
-                    new_name = f"{group.name()} (Copy)"
-                duplicate_tree_node(group.parent(), group, new_name=new_name)
-            elif isinstance(group, QgsLayerTreeGroup):
-                new_group, group_items = duplicate_groups(group, new_name=new_name)
-            else:
-                logging.error(
-                    f"Selected Node is {group.name()} of type {type(group)}, not a QgsLayerTreeGroup"
-                )
-            if new_group:
-                if randomize_fields:
-                    for randomize_field in randomize_fields.split(","):
-                        randomize_field = randomize_field.replace(" ", "")
-                        from jord.qgis_utilities.helpers import randomize_sub_tree_field
-
-                        randomize_sub_tree_field(new_group.children(), randomize_field)
-    else:
-        logging.error(f"There are {len(selected_nodes)}, please only select one")
+    with suspended_hierarchy_validation():
+        if len(selected_nodes) == 1:  # TODO: SHOULD WE ALLOW MORE?
+            new_group = None
+            for group in selected_nodes:
+                if isinstance(group, QgsLayerTreeLayer):
+                    if new_name is ... or new_name == "" or new_name is None:
+                        new_name = f"{group.name()} (Copy)"
+                    duplicate_tree_node(group.parent(), group, new_name=new_name)
+                elif isinstance(group, QgsLayerTreeGroup):
+                    new_group, group_items = duplicate_groups(group, new_name=new_name)
+                else:
+                    logging.error(
+                        f"Selected Node is {group.name()} of type {type(group)}, not a QgsLayerTreeGroup"
+                    )
+                if new_group:
+                    if randomize_fields:
+                        for randomize_field in randomize_fields.split(","):
+                            randomize_field = randomize_field.replace(" ", "")
+                            from jord.qgis_utilities.helpers import (
+                                randomize_sub_tree_field,
+                            )
+
+                            randomize_sub_tree_field(
+                                new_group.children(), randomize_field
+                            )
+        else:
+            logging.error(f"There are {len(selected_nodes)}, please only select one")
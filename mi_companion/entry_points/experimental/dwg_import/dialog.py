@@ -18,6 +18,7 @@ __all__ = ["Dialog"]
 from mi_companion.gui.typing_utilities import get_args, is_optional, is_union
 
 from mi_companion import RESOURCE_BASE_PATH
+from mi_companion.configuration import settings_snapshot
 
 logger = logging.getLogger(RESOURCE_BASE_PATH)
 
@@ -108,6 +109,7 @@ class Dialog(QDialog, FORM_CLASS):
             else:
                 logger.error(f"{v=}")
 
-        run(**call_kwarg)
+        with settings_snapshot():  # Same settings for the entire run
+            run(**call_kwarg)
 
         self.close()
@@ -14,16 +14,18 @@ __all__ = ["run"]
 
 
 def run(*, appendix: str = " (Copy)") -> None:
+    from mi_companion.mi_editor.hierarchy import suspended_hierarchy_validation
     from jord.qgis_utilities.helpers import duplicate_groups
 
     selected_nodes = iface.layerTreeView().selectedNodes()
-    if len(selected_nodes) == 1:
-        group = next(iter(selected_nodes))
-        if isinstance(group, QgsLayerTreeGroup):
-            duplicate_groups(group, appendix=appendix)
+    with suspended_hierarchy_validation():
+        if len(selected_nodes) == 1:
+            group = next(iter(selected_nodes))
+            if isinstance(group, QgsLayerTreeGroup):
+                duplicate_groups(group, appendix=appendix)
+            else:
+                raise ValueError(
+                    f"Selected Node is {group.name()} of type {type(group)}, not a QgsLayerTreeGroup"
+                )
         else:
-            raise ValueError(
-                f"Selected Node is {group.name()} of type {type(group)}, not a QgsLayerTreeGroup"
-            )
-    else:
-        raise ValueError(f"There are {len(selected_nodes)}, please only select one")
+            raise ValueError(f"There are {len(selected_nodes)}, please only select one")
@@ -11,6 +11,7 @@ FORM_CLASS, _ = uic.loadUiType(os.path.join(os.path.dirname(__file__), "dialog.u
 __all__ = ["Dialog"]
 
 from mi_companion.gui.typing_utilities import get_args, is_optional, is_union
+from mi_companion.configuration import settings_snapshot
 
 
 class Dialog(QDialog, FORM_CLASS):
@@ -77,5 +78,6 @@ class Dialog(QDialog, FORM_CLASS):
                     value = type(self.parameter_signature[k].default)(value)
                 call_kwarg[k] = value
 
-        run(**call_kwarg)
+        with settings_snapshot():  # Same settings for the entire run
+            run(**call_kwarg)
         self.close()
@@ -15,22 +15,24 @@ __all__ = ["run"]
 
 
 def run(*, new_name: str = "", randomize_field: Optional[str] = "external_id") -> None:
+    from mi_companion.mi_editor.hierarchy import suspended_hierarchy_validation
     from jord.qgis_utilities.helpers import duplicate_groups
 
     selected_nodes = iface.layerTreeView().selectedNodes()
-    if len(selected_nodes) == 1:
-        group = next(iter(selected_nodes))
-        new_group = None
-        if isinstance(group, QgsLayerTreeGroup):
-            new_group, group_items = duplicate_groups(group, new_name=new_name)
+    with suspended_hierarchy_validation():
+        if len(selected_nodes) == 1:
+            group = next(iter(selected_nodes))
+            new_group = None
+            if isinstance(group, QgsLayerTreeGroup):
+                new_group, group_items = duplicate_groups(group, new_name=new_name)
+            else:
+                logging.error(
+                    f"Selected Node is {group.name()} of type {type(group)}, not a QgsLayerTreeGroup"
+                )
+            if new_group:
+                if randomize_field:
+                    from jord.qgis_utilities.helpers import randomize_sub_tree_field
+
+                    randomize_sub_tree_field(new_group.children(), randomize_field)
         else:
-            logging.error(
-                f"Selected Node is {group.name()} of type {type(group)}, not a QgsLayerTreeGroup"
-            )
-        if new_group:
-            if randomize_field:
-                from jord.qgis_utilities.helpers import randomize_sub_tree_field
-
-                randomize_sub_tree_field(new_group.children(), randomize_field)
-    else:
-        logging.error(f"There are {len(selected_nodes)}, please only select one")
+            logging.error(f"There are {len(selected_nodes)}, please only select one")
@@ -0,0 +1,109 @@
+#!/usr/bin/python
+import logging
+from typing import List, Optional
+
+# noinspection PyUnresolvedReferences
+from qgis.core import QgsLayerTreeGroup, QgsProject
+
+from mi_companion import RESOURCE_BASE_PATH
+
+logger = logging.getLogger(RESOURCE_BASE_PATH)
+
+__all__ = ["run"]
+
+
+def selected_admin_ids() -> List[str]:
+    """
+
+    :return: The admin_ids of the selected features of all layers with an admin_id field
+    """
+    admin_ids = []
+
+    for layer in QgsProject.instance().mapLayers().values():
+        if (
+            not hasattr(layer, "selectedFeatureCount")
+            or not layer.selectedFeatureCount()
+        ):
+            continue
+
+        if layer.fields().indexFromName("admin_id") < 0:
+            continue
+
+        admin_ids.extend(
+            str(feature["admin_id"]) for feature in layer.selectedFeatures()
+        )
+
+    return admin_ids
+
+
+def run(
+    *,
+    from_admin_id: Optional[str] = None,
+    to_admin_id: Optional[str] = None,
+    attach_distance: float = 2.0,
+) -> None:
+    """
+    Finds the doors and POIs that can not be reached through the routing graph of each venue, offline.
+    With two admin_ids, or two selected doors or POIs, the shortest path between them is added as well.
+    """
+    from mi_companion.layer_descriptors import (
+        DATABASE_GROUP_DESCRIPTOR,
+        GRAPH_GROUP_DESCRIPTOR,
+        UNREACHABLE_DOORS_DESCRIPTOR,
+        UNREACHABLE_POIS_DESCRIPTOR,
+    )
+    from mi_companion.mi_editor.conversion.layers.from_hierarchy.routing import (
+        add_graph_path_layer,
+        add_unreachable_feature_layers,
+        build_routing_graph,
+        collect_graph_doors,
+        collect_venue_pois,
+        concatenate_graph_features,
+    )
+
+    if from_admin_id is None or to_admin_id is None:
+        picked = selected_admin_ids()
+        if len(picked) == 2:
+            from_admin_id, to_admin_id = picked
+
+    mi_group = (
+        QgsProject.instance().layerTreeRoot().findGroup(DATABASE_GROUP_DESCRIPTOR)
+    )
+    if mi_group is None:
+        logger.error(f"Did not find {DATABASE_GROUP_DESCRIPTOR}")
+        return
+
+    for graph_group in mi_group.findGroups(True):  # Recursively
+        if GRAPH_GROUP_DESCRIPTOR not in graph_group.name():
+            continue
+
+        routing_graph = build_routing_graph(
+            graph_group, attach_distance=attach_distance
+        )
+
+        doors = collect_graph_doors(graph_group)
+        pois = collect_venue_pois(graph_group.parent())
+
+        num_unreachable = add_unreachable_feature_layers(
+            graph_group,
+            routing_graph,
+            {UNREACHABLE_DOORS_DESCRIPTOR: doors, UNREACHABLE_POIS_DESCRIPTOR: pois},
+        )
+        logger.warning(
+            f"{graph_group.name()}: {routing_graph.num_components} graph components, "
+            f"{num_unreachable[UNREACHABLE_DOORS_DESCRIPTOR]} of {len(doors.admin_ids)} doors and "
+            f"{num_unreachable[UNREACHABLE_POIS_DESCRIPTOR]} of {len(pois.admin_ids)} POIs unreachable"
+        )
+
+        if from_admin_id is not None and to_admin_id is not None:
+            features = concatenate_graph_features([doors, pois])
+            if (
+                from_admin_id in features.admin_ids
+                and to_admin_id in features.admin_ids
+            ):
+                length = add_graph_path_layer(
+                    graph_group, routing_graph, features, from_admin_id, to_admin_id
+                )
+                logger.warning(
+                    f"Path from {from_admin_id} to {to_admin_id}: {length} m"
+                )
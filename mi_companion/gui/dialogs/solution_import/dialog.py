@@ -21,6 +21,10 @@ SERIALISED_SOLUTION_EXTENSION = ".json"
 logger = logging.getLogger(__name__)
 
 from mi_companion.gui.typing_utilities import get_args, is_optional, is_union
+from mi_companion.mi_editor.conversion.layers.from_solution.solution_snapshots import (
+    SNAPSHOT_EXTENSION,
+    get_solution_snapshot_store,
+)
 
 
 class Dialog(QDialog, FORM_CLASS):
@@ -54,7 +58,14 @@ class Dialog(QDialog, FORM_CLASS):
             if isclass(v.annotation) and issubclass(v.annotation, Path):
                 file_browser = qgis.gui.QgsFileWidget()
                 file_browser.setStorageMode(file_browser.GetFile)
-                file_browser.setFilter(f"*{SERIALISED_SOLUTION_EXTENSION}")
+                file_browser.setFilter(
+                    f"*{SERIALISED_SOLUTION_EXTENSION} *{SNAPSHOT_EXTENSION}"
+                )
+
+                snapshot_store = get_solution_snapshot_store()
+                if snapshot_store is not None:  # Offer the stored snapshots
+                    file_browser.setDefaultRoot(str(snapshot_store.directory))
+
                 self.parameter_lines[k] = file_browser
             else:
                 self.parameter_lines[k] = QLineEdit(
@@ -14,9 +14,11 @@ logger = logging.getLogger(__name__)
 def run(*, path: Path) -> None:
     from jord.qgis_utilities.helpers import InjectedProgressBar
 
-    from sync_module.tools import from_json
     from mi_companion.layer_descriptors import DATABASE_GROUP_DESCRIPTOR
-    from mi_companion.mi_editor.conversion import add_solution_layers
+    from mi_companion.mi_editor.conversion import (
+        add_solution_layers,
+        read_solution_file,
+    )
 
     qgis_instance_handle = QgsProject.instance()
     layer_tree_root = QgsProject.instance().layerTreeRoot()
@@ -24,8 +26,7 @@ def run(*, path: Path) -> None:
     if not isinstance(path, Path):
         path = Path(path)
 
-    with open(path) as f:
-        solution = from_json(f.read())
+    solution = read_solution_file(path)  # An exported solution or a stored snapshot
 
     with InjectedProgressBar(parent=iface.mainWindow().statusBar()) as progress_bar:
         add_solution_layers(
@@ -2,7 +2,7 @@ import logging
 import math
 import os
 from collections import defaultdict
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Dict, List, Optional, Set
 
 # noinspection PyUnresolvedReferences
 from qgis.PyQt import QtGui, QtWidgets, uic
@@ -17,6 +17,7 @@ from qgis.PyQt.QtWidgets import (
 from jord.qgis_utilities.configuration import store_plugin_setting
 # noinspection PyUnresolvedReferences
 from qgis.core import (
+    Qgis,
     QgsApplication,
     QgsFeature,
     QgsGeometry,
@@ -38,10 +39,20 @@ from mi_companion.entry_points.add_language_to_group import (
     ENTRY_POINT_NAME as ADD_LANGUAGE_BUTTON_NAME,
 )
 from mi_companion.mi_editor import (
+    CancellableProgressBar,
+    VenueDownloadTask,
+    add_projection_cache_invalidation_listener,
+    add_solution_layers,
+    get_solution_snapshot_store,
     layer_hierarchy_to_solution,
+    remove_projection_cache_invalidation_listener,
     revert_venues,
     solution_venue_to_layer_hierarchy,
 )
+from mi_companion.mi_editor.hierarchy.change_tracking import (
+    add_layer_change_listener,
+    remove_layer_change_listener,
+)
 from mi_companion.mi_editor.hierarchy.hierarchy_validation import (
     add_solution_hierarchy_change_listener,
     remove_solution_hierarchy_change_listener,
@@ -52,14 +63,24 @@ from sync_module.mi_sync_constants import MI_EPSG_NUMBER
 from warg import get_submodules_by_path, reload_module
 from .gui_utilities import clean_str
 from .make_solution_right_click import add_augmented_actions
-from ..configuration.options import read_bool_setting
+from ..configuration.options import (
+    add_settings_invalidation_listener,
+    read_bool_setting,
+    read_settings_snapshot,
+    remove_settings_invalidation_listener,
+)
 from ..constants import (
     DEFAULT_PLUGIN_SETTINGS,
     PLUGIN_REPOSITORY,
     PROJECT_NAME,
     VERSION,
 )
-from ..qgis_utilities import extract_wkt_elements, get_icon_path, resolve_path
+from ..qgis_utilities import (
+    DownloadCancelled,
+    extract_wkt_elements,
+    get_icon_path,
+    resolve_path,
+)
 from ..qgis_utilities.creation_mode import (
     put_location_layers_into_creation_mode,
 )
@@ -170,6 +191,9 @@ class MapsIndoorsCompanionDockWidget(QgsDockWidget, FORM_CLASS):
         signals.reconnect_signal(self.version_label.linkActivated, self.upgrade_clicked)
 
         add_solution_hierarchy_change_listener()
+        add_layer_change_listener()
+        add_projection_cache_invalidation_listener()
+        add_settings_invalidation_listener()
 
         # self.plugin_status_label.setText(plugin_version.plugin_status(PROJECT_NAME))
 
@@ -180,6 +204,11 @@ class MapsIndoorsCompanionDockWidget(QgsDockWidget, FORM_CLASS):
 
         self.original_solution_venues = defaultdict(dict)
 
+        self.download_task = None
+        self.download_cancel_requested = False
+        self.download_control_states: Dict[Any, bool] = {}
+        self.stale_snapshot_venues: Set[str] = set()
+
         signals.reconnect_signal(
             self.solution_reload_button.clicked, self.refresh_solution_combo_box
         )
@@ -221,6 +250,16 @@ class MapsIndoorsCompanionDockWidget(QgsDockWidget, FORM_CLASS):
             if False:
                 self.sync_layout.addWidget(self.solution_depth_combo_box)
 
+        self.cancel_download_button = QtWidgets.QPushButton("Cancel Download")
+        self.cancel_download_button.setToolTip(
+            "Cancel the venue download in progress, partially added layers are removed"
+        )
+        signals.reconnect_signal(
+            self.cancel_download_button.clicked, self.cancel_download_button_clicked
+        )
+        self.status_layout.insertWidget(0, self.cancel_download_button)
+        self.cancel_download_button.hide()
+
         if read_bool_setting("ADD_LOCATION_TYPE_MODE_TOGGLE"):
             self.creation_mode_button = QtWidgets.QPushButton(
                 "Apply Location Type Mode"
@@ -509,13 +548,15 @@ class MapsIndoorsCompanionDockWidget(QgsDockWidget, FORM_CLASS):
         include_occupants = read_bool_setting("ADD_OCCUPANTS")
         include_media = read_bool_setting("ADD_MEDIA")
 
-        with InjectedProgressBar(
-            parent=self.iface_.mainWindow().statusBar()
-        ) as download_bar:
-            if venue_name.strip() == "":  # TODO: Not supported ATM
-                venues = list(self.venue_name_id_map.values())
+        if venue_name.strip() == "":  # TODO: Not supported ATM
+            with InjectedProgressBar(
+                parent=self.iface_.mainWindow().statusBar()
+            ) as download_bar:
+                venues = list(self.venue_name_id_map.items())
                 num_venues = float(len(venues))
-                for i, v in enumerate(venues):
+                for i, (name, v) in enumerate(venues):
+                    self.stale_snapshot_venues.discard(name)
+
                     with InjectedProgressBar(
                         parent=self.iface_.mainWindow().statusBar()
                     ) as venue_bar:
@@ -529,31 +570,245 @@ class MapsIndoorsCompanionDockWidget(QgsDockWidget, FORM_CLASS):
                             depth=solution_depth,
                             include_occupants=include_occupants,
                             include_media=include_media,
+                            on_snapshot_refreshed=self.snapshot_refreshed_callback(
+                                name
+                            ),
                         )
                     download_bar.setValue(int((float(i) / num_venues) * 100))
 
-            else:
-                if venue_name in self.venue_name_id_map:
-                    self.changes_label.setText(f"Downloading {venue_name}")
-                    solution_layers = solution_venue_to_layer_hierarchy(
-                        self,
-                        self.solution_external_id,
-                        self.venue_name_id_map[venue_name],
-                        progress_bar=download_bar,
-                        depth=solution_depth,
-                        include_occupants=include_occupants,
-                        include_media=include_media,
+        elif venue_name in self.venue_name_id_map:
+            self.start_venue_download(
+                venue_name,
+                depth=solution_depth,
+                include_occupants=include_occupants,
+                include_media=include_media,
+            )
+
+        else:
+            logger.warning(f"Venue {venue_name} not found")
+
+    def start_venue_download(
+        self,
+        venue_name: str,
+        *,
+        depth: SolutionDepth,
+        include_occupants: bool,
+        include_media: bool,
+    ) -> None:
+        """
+        Fetches the venue in a background task, then inserts its layers on the main thread.
+        Both stages can be cancelled with the cancel download button.
+
+        :param venue_name:
+        :param depth:
+        :param include_occupants:
+        :param include_media:
+        :return:
+        """
+        if self.download_task is not None:
+            logger.warning("A download is already in progress")
+            return
+
+        solution_external_id = self.solution_external_id
+        settings = read_settings_snapshot()  # Both stages run with the same settings
+        snapshot_stale = False
+
+        def on_prepared(solution: Any, location_frames: Any) -> None:
+            self.changes_label.setText(f"Adding {venue_name} layers")
+
+            try:
+                with InjectedProgressBar(
+                    parent=self.iface_.mainWindow().statusBar()
+                ) as download_bar:
+                    add_solution_layers(
+                        qgis_instance_handle=self,
+                        solution=solution,
+                        layer_tree_root=QgsProject.instance().layerTreeRoot(),
+                        progress_bar=CancellableProgressBar(
+                            download_bar, lambda: self.download_cancel_requested
+                        ),
+                        location_frames=location_frames,
+                        settings=settings,
                     )
-                    self.original_solution_venues[self.solution_external_id][venue_name] = solution_layers
+            except DownloadCancelled:
+                self.changes_label.setText(f"Cancelled download of {venue_name}")
+                return
+            except Exception as e:
+                self.report_download_failure(venue_name, e)
+                return
+            finally:
+                self.download_finished()
 
-                    self.changes_label.setText(f"Downloaded {venue_name}")
+            self.original_solution_venues[solution_external_id][venue_name] = solution
+            if not snapshot_stale:
+                self.stale_snapshot_venues.discard(venue_name)
 
-                else:
-                    logger.warning(f"Venue {venue_name} not found")
+            self.changes_label.setText(f"Downloaded {venue_name}")
+
+        def on_failed(exception: Optional[Exception]) -> None:
+            self.download_finished()
+
+            if exception is not None:
+                self.report_download_failure(venue_name, exception)
+                return
+
+            self.changes_label.setText(f"Cancelled download of {venue_name}")
+
+        mark_snapshot_stale = self.snapshot_refreshed_callback(venue_name)
+
+        def on_snapshot_refreshed(changed: bool) -> None:
+            nonlocal snapshot_stale
+
+            if changed:
+                snapshot_stale = True
+
+            mark_snapshot_stale(changed)
+
+        self.download_cancel_requested = False
+        self.download_task = VenueDownloadTask(
+            solution_external_id,
+            self.venue_name_id_map[venue_name],
+            on_prepared=on_prepared,
+            on_failed=on_failed,
+            include_occupants=include_occupants,
+            include_media=include_media,
+            depth=depth,
+            snapshot_store=get_solution_snapshot_store(),
+            on_snapshot_refreshed=on_snapshot_refreshed,
+            settings=settings,
+        )
+
+        self.disable_controls_during_download()
+        self.cancel_download_button.show()
+        self.changes_label.setText(f"Downloading {venue_name}")
+
+        QgsApplication.taskManager().addTask(self.download_task)
+
+    def cancel_download_button_clicked(self) -> None:
+        self.download_cancel_requested = True
+
+        if self.download_task is not None:
+            self.download_task.cancel()
+
+    def download_finished(self) -> None:
+        self.download_task = None
+        self.download_cancel_requested = False
+
+        self.cancel_download_button.hide()
+
+        for control, enabled in self.download_control_states.items():
+            control.setEnabled(enabled)
+        self.download_control_states = {}
+
+    def download_interactive_controls(self) -> List[Any]:
+        """
+        The controls that can change the layer tree or the selected solution and venue, none of them may run while a
+        download inserts its layers, as the progress bar processes events in between
+
+        :return:
+        """
+        controls = [
+            self.sync_button,
+            self.upload_button,
+            self.solution_combo_box,
+            self.venue_combo_box,
+            self.solution_reload_button,
+            self.venue_reload_button,
+            self.import_button,
+            self.export_button,
+        ]
+
+        for i in range(self.entry_point_grid.count()):
+            widget = self.entry_point_grid.itemAt(i).widget()
+            if widget is not None:
+                controls.append(widget)
+
+        return controls
+
+    def disable_controls_during_download(self) -> None:
+        """
+        Disables the interactive controls, remembering whether each was enabled, download_finished restores them
+
+        :return:
+        """
+        self.download_control_states = {
+            control: control.isEnabled()
+            for control in self.download_interactive_controls()
+        }
+
+        for control in self.download_control_states:
+            control.setEnabled(False)
+
+    def report_download_failure(self, venue_name: str, exception: Exception) -> None:
+        """
+        Called from task and timer slots, where a raised exception would not reach anyone, so it is reported in the
+        message bar instead
+
+        :param venue_name:
+        :param exception:
+        :return:
+        """
+        logger.error(
+            f"Failed to download {venue_name}",
+            exc_info=(type(exception), exception, exception.__traceback__),
+        )
+        self.display_geometry_in_exception(exception)
+
+        self.changes_label.setText(f"Failed to download {venue_name}")
+        self.iface_.messageBar().pushMessage(
+            f"Failed to download {venue_name}", str(exception), level=Qgis.Critical
+        )
+
+    def snapshot_refreshed_callback(self, venue_name: str) -> Callable[[bool], None]:
+        """
+        Callback for the background refresh of a venue loaded from a snapshot, remembers the venue as stale if the
+        snapshot changed on the server
+
+        :param venue_name:
+        :return:
+        """
+
+        def on_snapshot_refreshed(changed: bool) -> None:
+            if changed:
+                self.stale_snapshot_venues.add(venue_name)
+
+                self.changes_label.setText(
+                    f"{venue_name} has changed on the server, download it again to update"
+                )
+
+        return on_snapshot_refreshed
+
+    def confirm_upload_of_stale_snapshots(self) -> bool:
+        """
+        Venues loaded from a snapshot that has since changed on the server were edited against an outdated baseline,
+        their unchanged layers would be uploaded as the outdated snapshot. Asks before uploading those.
+
+        :return: Whether to upload
+        """
+        if not self.stale_snapshot_venues:
+            return True
+
+        venue_names = ", ".join(sorted(self.stale_snapshot_venues))
+        logger.warning(f"Uploading venues from outdated snapshots: {venue_names}")
+
+        answer = QMessageBox.question(
+            self,
+            "Outdated snapshot",
+            f"{venue_names} changed on the server after it was loaded from a snapshot, uploading may revert those "
+            f"changes. Download it again to update.\n\nUpload anyway?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No,
+        )
+
+        return answer == QMessageBox.Yes
 
     def upload_button_clicked(self) -> None:
         self.set_update_sync_settings()
 
+        if not self.confirm_upload_of_stale_snapshots():
+            self.changes_label.setText("Upload cancelled, outdated snapshots")
+            return
+
         solution_depth = SolutionDepth.obstacles
         if self.solution_depth_combo_box:
             solution_depth = SolutionDepth(str(self.solution_combo_box.currentText()))
@@ -565,6 +820,7 @@ class MapsIndoorsCompanionDockWidget(QgsDockWidget, FORM_CLASS):
                     self,
                     progress_bar=bar,
                     solution_depth=solution_depth,
+                    settings=read_settings_snapshot(),
                 )
 
             except Exception as e:
@@ -635,6 +891,9 @@ class MapsIndoorsCompanionDockWidget(QgsDockWidget, FORM_CLASS):
     # noinspection PyPep8Naming
     def closeEvent(self, event: Any) -> None:  # pylint: disable=invalid-name
         remove_solution_hierarchy_change_listener()
+        remove_layer_change_listener()
+        remove_projection_cache_invalidation_listener()
+        remove_settings_invalidation_listener()
 
         self.plugin_closing.emit()
         event.accept()
@@ -6,6 +6,7 @@ FLOOR_GROUP_DESCRIPTOR = "(Floor)"
 BUILDING_GROUP_DESCRIPTOR = "(Building)"
 VENUE_GROUP_DESCRIPTOR = "(Venue)"
 GRAPH_GROUP_DESCRIPTOR = "(Graph)"
+REVIEW_GROUP_DESCRIPTOR = "(Review) MapsIndoors"
 
 OCCUPANTS_DESCRIPTOR = "occupants"
 LOCATION_TYPE_DESCRIPTOR = "location_types"
@@ -23,6 +24,11 @@ NAVIGATION_HORIZONTAL_LINES_DESCRIPTOR = "horizontal_lines"
 NAVIGATION_VERTICAL_LINES_DESCRIPTOR = "vertical_lines"
 GRAPH_LINES_DESCRIPTOR = "graph_lines"
 NAVIGATION_POINT_DESCRIPTOR = "graph_points"
+GRAPH_NEAR_MISSES_DESCRIPTOR = "graph_near_misses"
+GRAPH_PATH_DESCRIPTOR = "graph_path"
+UNREACHABLE_DOORS_DESCRIPTOR = "unreachable_doors"
+UNREACHABLE_POIS_DESCRIPTOR = "unreachable_pois"
+DOOR_GRAPH_ISSUES_DESCRIPTOR = "door_graph_issues"
 
 ROOMS_DESCRIPTOR = BackendLocationTypeEnum.ROOM.value.lower()
 AREAS_DESCRIPTOR = BackendLocationTypeEnum.AREA.value.lower()
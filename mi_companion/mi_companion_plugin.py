@@ -35,6 +35,10 @@ try:
 
     from .configuration.options import DeploymentOptionsPageFactory
     from .gui.main_dock import MapsIndoorsCompanionDockWidget
+    from .qgis_utilities.location_type_lookup import (
+        register_location_type_lookup_function,
+        unregister_location_type_lookup_function,
+    )
 
     # noinspection PyUnresolvedReferences
     from .resources import *  # Initialize Qt resources from file resources.py
@@ -55,6 +59,10 @@ except ModuleNotFoundError as e1:
 
         from .configuration.options import DeploymentOptionsPageFactory
         from .gui.main_dock import MapsIndoorsCompanionDockWidget
+        from .qgis_utilities.location_type_lookup import (
+            register_location_type_lookup_function,
+            unregister_location_type_lookup_function,
+        )
 
         # noinspection PyUnresolvedReferences
         from .resources import *  # Initialize Qt resources from file resources.py
@@ -166,6 +174,8 @@ class MapsIndoorsCompanionPlugin:
 
         self.iface.addToolBarIcon(self.open_server_dock_window_action)
 
+        register_location_type_lookup_function()
+
         self.first_start = True  # will be set False in run()
 
     def open_dock_widget(self) -> None:
@@ -206,3 +216,5 @@ class MapsIndoorsCompanionPlugin:
         for action in self.actions:
             self.iface.removePluginMenu(self.tr(PROJECT_NAME), action)
             self.iface.removeToolBarIcon(action)
+
+        unregister_location_type_lookup_function()
@@ -5,3 +5,5 @@ APPENDIX_INVALID_GEOMETRY_DIALOG_MESSAGE = (
 )
 
 DISABLE_GRAPH_EDIT = True
+
+GEOPACKAGE_FID_COLUMN = "fid"  # Of the tables of venues stored in a GeoPackage
@@ -1,5 +1,5 @@
 import logging
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Set
 
 import shapely
 
@@ -42,6 +42,7 @@ from mi_companion.mi_editor.conversion.layers.from_hierarchy.routing import (
 )
 from mi_companion.mi_editor.conversion.projection import prepare_geom_for_mi_db_qgis
 from mi_companion.mi_editor.hierarchy import (
+    has_changed_layers,
     make_hierarchy_validation_dialog,
 )
 from sync_module.mi import (
@@ -71,6 +72,7 @@ def add_venue_level_hierarchy(
     solution: Solution,
     solution_group_item: Any,
     venue_key: str,
+    changed_keys: Optional[Set[str]] = None,
     collect_invalid: bool = False,
     collect_warnings: bool = False,
     collect_errors: bool = False,
@@ -86,6 +88,7 @@ def add_venue_level_hierarchy(
     :param solution:
     :param solution_group_item:
     :param venue_key:
+    :param changed_keys: Keys of the floors and buildings with changed layers are added to this set
     :param collect_invalid:
     :param collect_warnings:
     :param collect_errors:
@@ -171,6 +174,9 @@ def add_venue_level_hierarchy(
                     else:
                         raise e
 
+                if changed_keys is not None and has_changed_layers(venue_group_item):
+                    changed_keys.update((outside_building_key, outside_floor_key))
+
                 add_floor_contents(
                     floor_key=outside_floor_key,
                     floor_group_items=venue_group_item,
@@ -212,6 +218,11 @@ def add_venue_level_hierarchy(
                     continue
 
                 else:
+                    if changed_keys is not None and has_changed_layers(
+                        venue_group_item
+                    ):
+                        changed_keys.add(building_key)
+
                     add_building_floors(
                         building_key=building_key,
                         venue_group_item=venue_group_item,
@@ -223,6 +234,7 @@ def add_venue_level_hierarchy(
                         num_solution_elements=num_solution_elements,
                         num_venue_elements=num_venue_elements,
                         num_building_elements=num_venue_group_elements,
+                        changed_keys=changed_keys,
                         issues=issues,
                         collect_invalid=collect_invalid,
                         collect_warnings=collect_warnings,
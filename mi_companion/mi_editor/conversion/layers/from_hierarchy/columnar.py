@@ -0,0 +1,171 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy
+import shapely
+
+# noinspection PyUnresolvedReferences
+from qgis.PyQt.QtCore import QDateTime, QVariant
+
+# noinspection PyUnresolvedReferences
+from qgis.PyQt.QtGui import QColor
+
+# noinspection PyUnresolvedReferences
+from qgis.core import QgsFeatureRequest
+
+from jord.qgis_utilities import is_str_value_null_like, parse_q_value
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "LayerColumns",
+    "field_value_column",
+    "null_like_to_none_column",
+    "bool_column",
+    "float_column",
+    "point_column",
+]
+
+
+def null_like_to_none_column(values: Iterable[Any]) -> List[Any]:
+    """
+    Null like strings ("", "nan", "NULL", "None", ...) become None, everything else is kept as is
+
+    :param values:
+    :return:
+    """
+    return [
+        None if isinstance(v, str) and is_str_value_null_like(v.lower().strip()) else v
+        for v in values
+    ]
+
+
+def field_value_column(values: Iterable[Any]) -> List[Any]:
+    """
+    Column variant of extract_field_value, for values already unwrapped from QVariants
+
+    :param values:
+    :return:
+    """
+    return [
+        v.toPyDateTime() if isinstance(v, QDateTime) else v
+        for v in null_like_to_none_column(values)
+    ]
+
+
+def bool_column(values: Iterable[Any]) -> List[Any]:
+    """
+    Strings are true unless they read "false", other values are kept as is
+
+    :param values:
+    :return:
+    """
+    return [(v.lower().strip() != "false") if isinstance(v, str) else v for v in values]
+
+
+def float_column(values: Sequence[Any]) -> numpy.ndarray:
+    """
+    None becomes nan
+
+    :param values:
+    :return:
+    """
+    return numpy.array(
+        [numpy.nan if v is None else v for v in values], dtype=numpy.float64
+    )
+
+
+def point_column(xs: Sequence[Any], ys: Sequence[Any]) -> numpy.ndarray:
+    """
+    Points of the coordinate columns, None where a coordinate is missing. shapely.points makes a point with NaN
+    coordinates of those, which is not empty.
+
+    :param xs:
+    :param ys:
+    :return:
+    """
+    xs, ys = float_column(xs), float_column(ys)
+
+    points = shapely.points(xs, ys)
+    points[numpy.isnan(xs) | numpy.isnan(ys)] = None
+
+    return points
+
+
+class LayerColumns:
+    """
+    Reads the needed attributes of every feature of a layer in a single pass and keeps them column by column.
+
+    Field indexes are resolved once per layer and only the selected attributes are fetched. QVariant values are
+    unwrapped a column at a time, the same way extract_feature_attributes does it per feature.
+    """
+
+    def __init__(
+        self,
+        layer: Any,
+        field_names: Optional[Iterable[str]] = None,
+        field_prefixes: Sequence[str] = (),
+        with_geometry: bool = True,
+    ):
+        """
+
+        :param layer:
+        :param field_names: Fields to read, all fields if None
+        :param field_prefixes: Fields starting with any of these are read as well
+        :param with_geometry: If False, geometries are not fetched
+        """
+        fields = layer.fields()
+
+        wanted = None if field_names is None else set(field_names)
+        prefixes = tuple(field_prefixes)
+
+        self.field_indices: Dict[str, int] = {
+            name: fields.indexFromName(name)
+            for name in fields.names()
+            if wanted is None
+            or name in wanted
+            or (prefixes and name.startswith(prefixes))
+        }
+
+        request = QgsFeatureRequest()
+        request.setSubsetOfAttributes(list(self.field_indices.values()))
+        if not with_geometry:
+            request.setFlags(QgsFeatureRequest.NoGeometry)
+
+        self.features = list(layer.getFeatures(request))
+
+        rows = [feature.attributes() for feature in self.features]
+
+        self.columns: Dict[str, List[Any]] = {
+            name: [
+                parse_q_value(v) if isinstance(v, (QVariant, QColor)) else v
+                for v in (row[index] for row in rows)
+            ]
+            for name, index in self.field_indices.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.features)
+
+    def __contains__(self, field_name: str) -> bool:
+        return field_name in self.columns
+
+    def __getitem__(self, field_name: str) -> List[Any]:
+        return self.columns[field_name]
+
+    def column(self, field_name: str, default: Any = None) -> Any:
+        return self.columns.get(field_name, default)
+
+    def names_with_prefix(self, prefixes: Sequence[str]) -> List[str]:
+        prefixes = tuple(prefixes)
+        return [name for name in self.columns if name.startswith(prefixes)]
+
+    def row(self, ith: int, field_names: Iterable[str]) -> Dict[str, Any]:
+        """
+        The values of the given fields of a single feature, for helpers that take a mapping of attributes
+
+        :param ith:
+        :param field_names:
+        :return:
+        """
+        return {name: self.columns[name][ith] for name in field_names}
@@ -1,6 +1,7 @@
+import functools
 import logging
 import math
-from typing import Any, Iterable, Mapping, Optional
+from typing import Any, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
 
 # noinspection PyUnresolvedReferences
 # from qgis.core.QgsVariantUtils import isNull, typeToDisplayString
@@ -50,22 +51,155 @@ __all__ = [
     "extract_display_rule",
     "parse_q_value_field_translations",
     "extract_street_view_config",
+    "LayerFieldSchema",
+    "compile_layer_field_schema",
 ]
 
 
 RETURN_EMPTY_DISPLAY_RULE = False
 PATCH_MISSING_TRANSLATIONS = True
 
+LayerAttributes = Union[Mapping[str, Any], Sequence[Any]]
+
+# Field types based on DisplayRule class definition
+DISPLAY_RULE_FIELD_TYPES = {
+    "zoom_from": int,
+    "zoom_to": int,
+    "visible": bool,
+    "icon": str,
+    "icon_visible": bool,
+    "icon_placement": MIIconPlacementRuleEnum,
+    "badge": BadgeDisplayRule,
+    "polygon": DisplayPolygon,
+    "extrusion": Data3D,
+    "walls": Data3D,
+    "model3d": Model3d,
+    "model2d": Model2d,
+    "label": str,
+    "label_visible": bool,
+    "label_style": LabelDisplayRule,
+    "label_zoom_from": int,
+    "label_zoom_to": int,
+    "label_type": MILabelTypeOptionEnum,
+    "label_max_width": int,
+    "image_scale": float,
+    "image_size": ImageSize,
+    "marker_elevation": float,
+}
+
+# Nested object fields
+DISPLAY_RULE_NESTED_TYPES = {
+    BadgeDisplayRule,
+    DisplayPolygon,
+    Data3D,
+    Model3d,
+    Model2d,
+    LabelDisplayRule,
+    ImageSize,
+}
+
+
+class LayerFieldSchema:
+    """
+    Where the translation, display rule and street view config fields of a layer are and what they map to.
+
+    The field list is the same for every feature of a layer, so the field names are only parsed once per layer.
+    Every path starts with (field index, field name), attributes are looked up by name when given as a mapping
+    and by index when given as a sequence of values in the order of field_names.
+    """
+
+    def __init__(
+        self,
+        field_names: Sequence[str],
+        *,
+        translations_field_name: str = "translations",
+        street_view_config_field_name: str = "street_view_config",
+    ):
+        self.field_names = tuple(field_names)
+
+        # (index, name, language, attribute, sub field or None)
+        self.translation_paths: List[Tuple[int, str, str, str, Optional[str]]] = []
+        # (index, name, display rule field, nested field, None for fields that are not nested)
+        self.display_rule_paths: List[Tuple[int, str, str, Optional[str]]] = []
+        # (index, name, street view config field)
+        self.street_view_config_paths: List[Tuple[int, str, str]] = []
+
+        for index, name in enumerate(self.field_names):
+            if translations_field_name in name:
+                split_res = name.split(".")
+                if len(split_res) == 3:
+                    lang, cname = split_res[-2:]
+                    self.translation_paths.append((index, name, lang, cname, None))
+                elif len(split_res) == 4:
+                    lang, cname, f_name = split_res[-3:]
+                    self.translation_paths.append((index, name, lang, cname, f_name))
+                else:
+                    logger.error(f"IGNORING {split_res}")
+
+            if street_view_config_field_name in name:
+                split_res = name.split(".")
+                if len(split_res) == 2:
+                    self.street_view_config_paths.append((index, name, split_res[-1]))
+                else:
+                    logger.error(f"IGNORING {split_res}")
+
+            if name.startswith("display_rule."):
+                _, field_name, *rest = name.split(".")
+
+                if field_name not in DISPLAY_RULE_FIELD_TYPES:
+                    continue
+
+                field_type = DISPLAY_RULE_FIELD_TYPES[field_name]
+
+                nested_field = None
+                if field_type in DISPLAY_RULE_NESTED_TYPES:
+                    if not rest:
+                        logger.debug(f"Ignoring {name} for {field_name}={field_type}")
+                        continue
+
+                    if len(rest) == 1:
+                        nested_field = rest[0]
+                    # Otherwise an unexpected rest, kept so it is reported with its value
+
+                self.display_rule_paths.append((index, name, field_name, nested_field))
+
+
+@functools.lru_cache(maxsize=256)
+def compile_layer_field_schema(
+    field_names: Tuple[str, ...],
+    *,
+    translations_field_name: str = "translations",
+    street_view_config_field_name: str = "street_view_config",
+) -> LayerFieldSchema:
+    """
+    Cached by field names, so features of the same layer share one schema even when extracted without one
+
+    :param field_names:
+    :param translations_field_name:
+    :param street_view_config_field_name:
+    :return:
+    """
+    return LayerFieldSchema(
+        field_names,
+        translations_field_name=translations_field_name,
+        street_view_config_field_name=street_view_config_field_name,
+    )
+
+
+def _path_key_position(layer_attributes: LayerAttributes) -> int:
+    return 1 if isinstance(layer_attributes, Mapping) else 0
+
 
 class MissingTranslationsException(Exception):
     pass
 
 
 def extract_translations(
-    layer_attributes: Mapping[str, Any],
+    layer_attributes: LayerAttributes,
     *,
     required_languages: Iterable[str],
     nested_str_map_field_name: str = "translations",
+    schema: Optional[LayerFieldSchema] = None,
 ) -> Optional[Mapping[str, LanguageBundle]]:
     """
     THIS IS THE DIRTIEST function ever written; null is a hell of a concept
@@ -73,21 +207,26 @@ def extract_translations(
     :param required_languages:
     :param nested_str_map_field_name:
     :param layer_attributes:
+    :param schema: Compiled field schema of the layer, compiled from the attribute names if not given
     :return:
     """
+    if schema is None:
+        schema = compile_layer_field_schema(
+            tuple(layer_attributes.keys()),
+            translations_field_name=nested_str_map_field_name,
+        )
+
+    key_pos = _path_key_position(layer_attributes)
+
     translations = nested_dict()
-    for k, v in layer_attributes.items():
-        if nested_str_map_field_name in k:
-            split_res = k.split(".")
-            if len(split_res) == 3:
-                lang, cname = split_res[-2:]
+    for path in schema.translation_paths:
+        _, _, lang, cname, f_name = path
+        v = layer_attributes[path[key_pos]]
 
-                parse_q_value_translations(cname, lang, translations, v)
-            elif len(split_res) == 4:
-                lang, cname, f_name = split_res[-3:]
-                parse_q_value_field_translations(cname, f_name, lang, translations, v)
-            else:
-                logger.error(f"IGNORING {split_res}")
+        if f_name is None:
+            parse_q_value_translations(cname, lang, translations, v)
+        else:
+            parse_q_value_field_translations(cname, f_name, lang, translations, v)
 
     if len(translations) == 0:
         return None
@@ -130,33 +269,36 @@ def extract_translations(
 
 
 def extract_street_view_config(
-    layer_attributes: Mapping[str, Any],
+    layer_attributes: LayerAttributes,
     *,
     nested_str_map_field_name: str = "street_view_config",
+    schema: Optional[LayerFieldSchema] = None,
 ) -> Optional[StreetViewConfig]:
     """
     THIS IS THE DIRTIEST function ever written; null is a hell of a concept
 
     :param nested_str_map_field_name:
     :param layer_attributes:
+    :param schema: Compiled field schema of the layer, compiled from the attribute names if not given
     :return:
     """
+    if schema is None:
+        schema = compile_layer_field_schema(
+            tuple(layer_attributes.keys()),
+            street_view_config_field_name=nested_str_map_field_name,
+        )
 
-    args = {}
-    for k, v in layer_attributes.items():
-        if nested_str_map_field_name in k:
-            split_res = k.split(".")
-            if len(split_res) == 2:
-                field_name = split_res[-1]
+    key_pos = _path_key_position(layer_attributes)
 
-                val = parse_q_value(v)
+    args = {}
+    for path in schema.street_view_config_paths:
+        _, _, field_name = path
+        val = parse_q_value(layer_attributes[path[key_pos]])
 
-                if val is None:
-                    continue
+        if val is None:
+            continue
 
-                args[field_name] = val
-            else:
-                logger.error(f"IGNORING {split_res}")
+        args[field_name] = val
 
     if len(args) == 0:
         return None
@@ -358,12 +500,14 @@ def extract_single_level_str_map(
 
 
 def extract_display_rule(
-    layer_attributes: Mapping[str, Any],
+    layer_attributes: LayerAttributes,
+    schema: Optional[LayerFieldSchema] = None,
 ) -> OptionalDisplayRule:
     """Extract display rule from layer attributes.
 
     Args:
         layer_attributes: Dictionary of layer attributes containing display settings
+        schema: Compiled field schema of the layer, compiled from the attribute names if not given
 
     Returns:
         DisplayRule if valid display attributes found, None otherwise
@@ -374,123 +518,78 @@ def extract_display_rule(
 
         return None
 
+    if schema is None:
+        schema = compile_layer_field_schema(tuple(layer_attributes.keys()))
+
+    key_pos = _path_key_position(layer_attributes)
+
     display_rule_attrs = {}
 
-    # Field types based on DisplayRule class definition
-    field_types = {
-        "zoom_from": int,
-        "zoom_to": int,
-        "visible": bool,
-        "icon": str,
-        "icon_visible": bool,
-        "icon_placement": MIIconPlacementRuleEnum,
-        "badge": BadgeDisplayRule,
-        "polygon": DisplayPolygon,
-        "extrusion": Data3D,
-        "walls": Data3D,
-        "model3d": Model3d,
-        "model2d": Model2d,
-        "label": str,
-        "label_visible": bool,
-        "label_style": LabelDisplayRule,
-        "label_zoom_from": int,
-        "label_zoom_to": int,
-        "label_type": MILabelTypeOptionEnum,
-        "label_max_width": int,
-        "image_scale": float,
-        "image_size": ImageSize,
-        "marker_elevation": float,
-    }
-
-    # Extract nested object fields
-    nested_types = {
-        BadgeDisplayRule,
-        DisplayPolygon,
-        Data3D,
-        Model3d,
-        Model2d,
-        LabelDisplayRule,
-        ImageSize,
-    }
-
-    for attr_name, attr_value in layer_attributes.items():
-        if attr_name.startswith("display_rule."):
-            parts = attr_name.split(".")
-
-            _, field_name, *rest = parts
-
-            if field_name in field_types:
-                field_type = field_types[field_name]
-
-                # Handle QVariant
-
-                if isinstance(attr_value, QColor):
-                    attr_name = attr_value.name()
-
-                elif isinstance(attr_value, QVariant):
-                    if attr_value.isNull():
-                        continue
+    for path in schema.display_rule_paths:
+        _, attr_name, field_name, nested_field = path
+        attr_value = layer_attributes[path[key_pos]]
 
-                    attr_value = attr_value.value()
+        field_type = DISPLAY_RULE_FIELD_TYPES[field_name]
 
-                if attr_value is None:
-                    continue
+        # Handle QVariant
 
-                # Skip null-like strings
-                if isinstance(attr_value, str) and is_str_value_null_like(
-                    attr_value.lower().strip()
-                ):
-                    continue
+        if isinstance(attr_value, QColor):
+            attr_value = attr_value.name()
 
-                try:
-                    # Handle nested objects
-                    if field_type in nested_types:
-                        if rest:
-                            # Initialize nested dict if needed
-                            if field_name not in display_rule_attrs:
-                                display_rule_attrs[field_name] = {}
+        elif isinstance(attr_value, QVariant):
+            if attr_value.isNull():
+                continue
 
-                            if len(rest) > 1:
-                                logger.error(
-                                    f"A unexpected rest was found {rest} for {attr_name}={attr_value} for {field_name}="
-                                    f"{field_type}"
-                                )
-                                continue
+            attr_value = attr_value.value()
 
-                            nested_field = rest[0]
+        if attr_value is None:
+            continue
 
-                            # if nested_field == 'label_visible':
-                            #  attr_value = str_to_bool(attr_value)
+        # Skip null-like strings
+        if isinstance(attr_value, str) and is_str_value_null_like(
+            attr_value.lower().strip()
+        ):
+            continue
 
-                            display_rule_attrs[field_name][nested_field] = attr_value
-                        else:
-                            if True:
-                                logger.debug(
-                                    f"Ignoring {attr_name}={attr_value} for {field_name}={field_type}"
-                                )
-                                continue
-                    else:
-                        # Handle enums
-                        if field_type in (
-                            MIIconPlacementRuleEnum,
-                            MILabelTypeOptionEnum,
-                        ):
-                            display_rule_attrs[field_name] = field_type(attr_value)
-                        elif field_type is int:
-                            display_rule_attrs[field_name] = int(float(attr_value))
-                        elif field_type is float:
-                            display_rule_attrs[field_name] = float(attr_value)
-                        elif field_type is bool:
-                            display_rule_attrs[field_name] = str_to_bool(attr_value)
-                        else:
-                            display_rule_attrs[field_name] = field_type(attr_value)
+        try:
+            # Handle nested objects
+            if field_type in DISPLAY_RULE_NESTED_TYPES:
+                # Initialize nested dict if needed
+                if field_name not in display_rule_attrs:
+                    display_rule_attrs[field_name] = {}
 
-                except (ValueError, TypeError) as e:
-                    logger.warning(
-                        f"Could not convert {attr_name}={attr_value} to {field_type}: {e}"
+                if nested_field is None:
+                    logger.error(
+                        f"A unexpected rest was found for {attr_name}={attr_value} for {field_name}={field_type}"
                     )
                     continue
 
+                # if nested_field == 'label_visible':
+                #  attr_value = str_to_bool(attr_value)
+
+                display_rule_attrs[field_name][nested_field] = attr_value
+            else:
+                # Handle enums
+                if field_type in (
+                    MIIconPlacementRuleEnum,
+                    MILabelTypeOptionEnum,
+                ):
+                    display_rule_attrs[field_name] = field_type(attr_value)
+                elif field_type is int:
+                    display_rule_attrs[field_name] = int(float(attr_value))
+                elif field_type is float:
+                    display_rule_attrs[field_name] = float(attr_value)
+                elif field_type is bool:
+                    display_rule_attrs[field_name] = str_to_bool(attr_value)
+                else:
+                    display_rule_attrs[field_name] = field_type(attr_value)
+
+        except (ValueError, TypeError) as e:
+            logger.warning(
+                f"Could not convert {attr_name}={attr_value} to {field_type}: {e}"
+            )
+            continue
+
     if not display_rule_attrs:
         if RETURN_EMPTY_DISPLAY_RULE:
             return DisplayRule()
@@ -1,5 +1,5 @@
 import logging
-from typing import Any, List, Optional, Tuple
+from typing import Any, List, Optional, Set, Tuple
 
 import shapely
 
@@ -34,6 +34,7 @@ from mi_companion import (
 )
 from mi_companion.layer_descriptors import FLOOR_POLYGON_DESCRIPTOR
 from mi_companion.mi_editor.conversion.projection import prepare_geom_for_mi_db_qgis
+from mi_companion.mi_editor.hierarchy.change_tracking import has_changed_layers
 from mi_companion.mi_editor.hierarchy.validation_dialog_utilities import (
     make_hierarchy_validation_dialog,
 )
@@ -60,6 +61,7 @@ def add_building_floors(
     num_solution_elements: int,
     num_venue_elements: int,
     num_building_elements: int,
+    changed_keys: Optional[Set[str]] = None,
     collect_invalid: bool = False,
     collect_warnings: bool = False,
     collect_errors: bool = False,
@@ -77,6 +79,7 @@ def add_building_floors(
     :param num_solution_elements:
     :param num_venue_elements:
     :param num_building_elements:
+    :param changed_keys: Keys of the floors with changed layers are added to this set
     :param collect_invalid:
     :param collect_warnings:
     :param collect_errors:
@@ -150,6 +153,9 @@ def add_building_floors(
 
         assert "floor_index" in floor_attributes
 
+        if changed_keys is not None and has_changed_layers(building_group_item):
+            changed_keys.add(floor_key)
+
         floor_index = floor_attributes["floor_index"]
 
         add_floor_contents(
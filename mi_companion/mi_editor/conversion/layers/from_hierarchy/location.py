@@ -28,23 +28,35 @@ from qgis.core import (
 )
 
 from jord.qgis_utilities import (
-    extract_feature_attributes,
-    extract_field_value,
     feature_to_shapely,
     is_str_value_null_like,
-    parse_field,
     qgs_geometry_to_shapely,
 )
 from mi_companion import (
     ANCHOR_AS_INDIVIDUAL_FIELDS,
     VERBOSE,
 )
-from mi_companion.configuration import read_bool_setting
+from mi_companion.configuration import (
+    PluginSettings,
+    read_bool_setting,
+    read_settings_snapshot,
+)
+from mi_companion.mi_editor.conversion.layers.from_hierarchy.columnar import (
+    LayerColumns,
+    bool_column,
+    field_value_column,
+    null_like_to_none_column,
+    point_column,
+)
 from mi_companion.mi_editor.conversion.layers.from_hierarchy.common_attributes import (
+    compile_layer_field_schema,
     extract_display_rule,
     extract_street_view_config,
     extract_translations,
 )
+from mi_companion.mi_editor.conversion.layers.from_hierarchy.unchanged_layers import (
+    copy_unchanged_locations,
+)
 from mi_companion.mi_editor.conversion.projection import prepare_geom_for_mi_db_qgis
 from mi_companion.mi_editor.hierarchy.validation_dialog_utilities import (
     make_hierarchy_validation_dialog,
@@ -67,6 +79,29 @@ __all__ = ["add_floor_contents"]
 logger = logging.getLogger(__name__)
 
 
+LOCATION_FIELD_NAMES = (
+    "location_type",
+    "admin_id",
+    "external_id",
+    "is_active",
+    "is_searchable",
+    "restrictions",
+    "is_obstacle",
+    "is_selectable",
+    "settings_3d_width",
+    "settings_3d_margin",
+    "active_to",
+    "active_from",
+    "media_key",
+    "anchor",
+    "anchor_x",
+    "anchor_y",
+    "category_keys",
+    "details",
+)
+LOCATION_FIELD_PREFIXES = ("translations.", "display_rule.", "street_view_config.")
+
+
 class MissingKeyColumn(Exception): ...
 
 
@@ -82,6 +117,7 @@ def add_floor_locations(
     collect_warnings: bool = False,
     collect_errors: bool = False,
     issues: Optional[List[str]] = None,
+    settings: Optional[PluginSettings] = None,
 ) -> None:
     """
 
@@ -93,387 +129,343 @@ def add_floor_locations(
     :param collect_warnings:
     :param collect_errors:
     :param issues:
+    :param settings:
     :return:
     """
-    layer = location_group_item.layer()
-    if layer:
-        for layer_feature in layer.getFeatures():
-            feature_attributes = extract_feature_attributes(layer_feature)
+    if settings is None:
+        settings = read_settings_snapshot()
 
-            location_type_admin_id = parse_field(
-                feature_attributes, field_name="location_type"
+    layer = location_group_item.layer()
+    if not layer:
+        return
+
+    if copy_unchanged_locations(
+        location_group_item,
+        solution,
+        floor_key,
+        backend_location_type,
+        collect_invalid=collect_invalid,
+        issues=issues,
+    ):
+        return
+
+    layer_columns = LayerColumns(
+        layer, field_names=LOCATION_FIELD_NAMES, field_prefixes=LOCATION_FIELD_PREFIXES
+    )
+    num_features = len(layer_columns)
+    if not num_features:
+        return
+
+    no_values = [None] * num_features
+
+    location_type_admin_ids = layer_columns["location_type"]
+    admin_ids = layer_columns.column("admin_id")
+    external_ids = null_like_to_none_column(
+        layer_columns.column("external_id", no_values)
+    )
+
+    is_actives = None
+    if "is_active" in layer_columns:
+        is_actives = bool_column(field_value_column(layer_columns["is_active"]))
+
+    is_searchables = None
+    if "is_searchable" in layer_columns:
+        is_searchables = bool_column(field_value_column(layer_columns["is_searchable"]))
+
+    restrictions_values = [
+        r if r else None
+        for r in field_value_column(layer_columns.column("restrictions", no_values))
+    ]
+
+    is_obstacles, is_selectables = (
+        [
+            v if v is None or isinstance(v, bool) else str_to_bool(v)
+            for v in field_value_column(layer_columns.column(field_name, no_values))
+        ]
+        for field_name in ("is_obstacle", "is_selectable")
+    )
+
+    settings_3d_widths = field_value_column(
+        layer_columns.column("settings_3d_width", no_values)
+    )
+    settings_3d_margins = field_value_column(
+        layer_columns.column("settings_3d_margin", no_values)
+    )
+    active_tos = field_value_column(
+        layer_columns.column("active_to", no_values)
+    )  # TODO: CONVERT THIS
+    active_froms = field_value_column(
+        layer_columns.column("active_from", no_values)
+    )  # TODO: CONVERT THIS
+
+    media_keys = layer_columns.column("media_key", no_values)
+
+    anchors = None
+    if ANCHOR_AS_INDIVIDUAL_FIELDS:
+        if "anchor_x" in layer_columns:
+            anchors = point_column(
+                field_value_column(layer_columns["anchor_x"]),
+                field_value_column(layer_columns["anchor_y"]),
             )
-
-            location_type_key = LocationType.compute_key(
-                admin_id=location_type_admin_id
+    elif "anchor" in layer_columns:
+        anchors = [
+            (
+                qgs_geometry_to_shapely(a)
+                if a is not None and not (a.isNull() or a.isEmpty())
+                else None
             )
-            if solution.location_types.get(location_type_key) is None:
-                if read_bool_setting(
-                    "ALLOW_LOCATION_TYPE_CREATION"
-                ):  # TODO: MAKE CONFIRMATION DIALOG IF TRUE
-
-                    try:
-                        location_type_key = solution.add_location_type(
-                            admin_id=location_type_admin_id,
-                            translations={
-                                "en": LanguageBundle(name=location_type_admin_id)
-                            },
-                        )
-                    except Exception as e:
-                        _invalid = f"{location_type_admin_id=} is invalid {e}"
-                        logger.error(_invalid)
-                        if collect_invalid:
-                            issues.append(_invalid)
-                        else:
-                            raise e
-
-                else:
-                    raise ValueError(
-                        f"{location_type_key} is not a location type that already exists"
-                    )
+            for a in field_value_column(layer_columns["anchor"])
+        ]
 
-            translations = extract_translations(
-                feature_attributes, required_languages=solution.available_languages
-            )
+    category_keys_values = None
+    if "category_keys" in layer_columns:
+        category_keys_values = field_value_column(layer_columns["category_keys"])
 
-            if "admin_id" in feature_attributes:
-                admin_id = feature_attributes["admin_id"]
-                if admin_id is None:
-                    raise MissingKeyValue(f"Missing key {admin_id=}")
-                elif isinstance(admin_id, str):
-                    v = admin_id
-                    v_str = v.lower().strip()
-                    if is_str_value_null_like(v_str):
-                        raise MissingKeyColumn(f'Missing "admin_id" column')
-                    else:
-                        admin_id = v
+    details_values = None
+    if "details" in layer_columns:
+        details_values = field_value_column(layer_columns["details"])
 
-                elif isinstance(admin_id, QVariant):
-                    if admin_id.isNull():
-                        raise MissingKeyValue(f"Missing key {admin_id=}")
-                    else:
-                        v = str(admin_id.value())
+    nested_field_names = layer_columns.names_with_prefix(LOCATION_FIELD_PREFIXES)
+    nested_columns = [layer_columns[name] for name in nested_field_names]
+    nested_schema = compile_layer_field_schema(tuple(nested_field_names))
 
-                        v_str = v.lower().strip()
-                        if is_str_value_null_like(v_str):
-                            raise MissingKeyColumn(f'Missing "admin_id" column')
+    for ith, layer_feature in enumerate(layer_columns.features):
+        location_type_admin_id = location_type_admin_ids[ith]
 
-                        admin_id = v
-            else:
-                raise MissingKeyColumn(f'Missing "admin_id" column')
-
-            external_id = None
-            if "external_id" in feature_attributes:
-                external_id = feature_attributes["external_id"]
-                if external_id is None:
-                    ...
-                elif isinstance(external_id, str):
-                    v = external_id
-                    v_str = v.lower().strip()
-                    if is_str_value_null_like(v_str):
-                        external_id = None
-                    else:
-                        external_id = v
+        location_type_key = LocationType.compute_key(admin_id=location_type_admin_id)
+        if solution.location_types.get(location_type_key) is None:
+            if read_bool_setting(
+                "ALLOW_LOCATION_TYPE_CREATION", settings
+            ):  # TODO: MAKE CONFIRMATION DIALOG IF TRUE
 
-                elif isinstance(external_id, QVariant):
-                    if external_id.isNull():
-                        external_id = None
+                try:
+                    location_type_key = solution.add_location_type(
+                        admin_id=location_type_admin_id,
+                        translations={
+                            "en": LanguageBundle(name=location_type_admin_id)
+                        },
+                    )
+                except Exception as e:
+                    _invalid = f"{location_type_admin_id=} is invalid {e}"
+                    logger.error(_invalid)
+                    if collect_invalid:
+                        issues.append(_invalid)
                     else:
-                        v = str(external_id.value())
+                        raise e
 
-                        v_str = v.lower().strip()
-                        if is_str_value_null_like(v_str):
-                            external_id = None
-                        else:
-                            external_id = v
-
-            is_active = None
-            if "is_active" in feature_attributes:
-                is_active = extract_field_value(feature_attributes, "is_active")
-                if isinstance(is_active, str):
-                    if is_active.lower().strip() == "false":
-                        is_active = False
-                    else:
-                        is_active = True
-                assert isinstance(is_active, bool), f"{type(is_active)}"
-
-            is_searchable = None
-            if "is_searchable" in feature_attributes:
-                is_searchable = extract_field_value(feature_attributes, "is_searchable")
-                if isinstance(is_searchable, str):
-                    if is_searchable.lower().strip() == "false":
-                        is_searchable = False
-                    else:
-                        is_searchable = True
-                assert isinstance(is_searchable, bool), f"{type(is_searchable)}"
-
-            restrictions = None
-            if "restrictions" in feature_attributes:
-                restrictions = extract_field_value(feature_attributes, "restrictions")
-
-                if not restrictions:
-                    restrictions = None
-
-            is_obstacle = None
-            if "is_obstacle" in feature_attributes:
-                is_obstacle = extract_field_value(feature_attributes, "is_obstacle")
-                feature_attributes.pop("is_obstacle")
-
-                if is_obstacle is not None:
-                    if not isinstance(is_obstacle, bool):
-                        is_obstacle = str_to_bool(is_obstacle)
-
-            is_selectable = None
-            if "is_selectable" in feature_attributes:
-                is_selectable = extract_field_value(feature_attributes, "is_selectable")
-                feature_attributes.pop("is_selectable")
-
-                if is_selectable is not None:
-                    if not isinstance(is_selectable, bool):
-                        is_selectable = str_to_bool(is_selectable)
-
-            settings_3d_width = None
-            if "settings_3d_width" in feature_attributes:
-                settings_3d_width = extract_field_value(
-                    feature_attributes, "settings_3d_width"
+            else:
+                raise ValueError(
+                    f"{location_type_key} is not a location type that already exists"
                 )
-                feature_attributes.pop("settings_3d_width")
 
-            settings_3d_margin = None
-            if "settings_3d_margin" in feature_attributes:
-                settings_3d_margin = extract_field_value(
-                    feature_attributes, "settings_3d_margin"
-                )
-                feature_attributes.pop("settings_3d_margin")
-
-            active_to = None
-            if "active_to" in feature_attributes:  # TODO: CONVERT THIS
-                active_to = extract_field_value(feature_attributes, "active_to")
-                feature_attributes.pop("active_to")
-
-            active_from = None
-            if "active_from" in feature_attributes:  # TODO: CONVERT THIS
-                active_from = extract_field_value(feature_attributes, "active_from")
-                feature_attributes.pop("active_from")
-
-            street_view_config = extract_street_view_config(feature_attributes)
-
-            try:
-                location_geometry = feature_to_shapely(layer_feature)
-            except Exception as e:
-                reply = make_hierarchy_validation_dialog(
-                    "Invalid Location Feature Detected",
-                    f"The Location feature with Admin ID '{admin_id}' located in '{location_group_item.name()}' has "
-                    f"an invalid "
-                    f"geometry.\n\n"
-                    # f"\n__________________{e}\n__________________\n"
-                    + APPENDIX_INVALID_GEOMETRY_DIALOG_MESSAGE,
-                    add_reject_option=True,
-                    reject_text="Cancel Upload",
-                    accept_text="Upload Anyway",
-                    alternative_accept_text="Upload Anyway",
-                    level=QtWidgets.QMessageBox.Warning,
-                )
+        nested_values = [column[ith] for column in nested_columns]
 
-                if reply == QMessageBox.RejectRole:
-                    raise Exception("Upload cancelled")
-
-                continue  # TODO: IDEA IMPLEMENT POP UP CONFIRMATION OF DELETE FEATURE WHEN MISSING GEOMETRIES.
-
-            media_key = None
-
-            if "media_key" in feature_attributes:
-                media_key = parse_field(feature_attributes, field_name="media_key")
-
-            if location_geometry is None:
-                logger.error(f"{location_geometry=}")
-
-            if location_geometry is not None:
-                common_kvs = dict(
-                    admin_id=admin_id,
-                    external_id=external_id,
-                    floor_key=floor_key,
-                    is_active=is_active,
-                    is_searchable=is_searchable,
-                    location_type_key=location_type_key,
-                    translations=(translations),
-                    display_rule=extract_display_rule(feature_attributes),
-                    media_key=media_key,
-                    restrictions=restrictions,
-                    is_selectable=is_selectable,
-                    settings_3d_margin=settings_3d_margin,
-                    settings_3d_width=settings_3d_width,
-                    active_from=active_from,
-                    active_to=active_to,
-                    street_view_config=street_view_config,
-                )
+        translations = extract_translations(
+            nested_values,
+            required_languages=solution.available_languages,
+            schema=nested_schema,
+        )
 
-                anchor = location_geometry.representative_point()
+        if admin_ids is None:
+            raise MissingKeyColumn(f'Missing "admin_id" column')
 
-                if ANCHOR_AS_INDIVIDUAL_FIELDS:
-                    if "anchor_x" in feature_attributes:
-                        ax = extract_field_value(feature_attributes, "anchor_x")
-                        feature_attributes.pop("anchor_x")
-                        ay = extract_field_value(feature_attributes, "anchor_y")
-                        feature_attributes.pop("anchor_y")
-                        anchor = shapely.Point([ax, ay])
-
-                else:
+        admin_id = admin_ids[ith]
+        if admin_id is None:
+            raise MissingKeyValue(f"Missing key {admin_id=}")
+        elif isinstance(admin_id, str) and is_str_value_null_like(
+            admin_id.lower().strip()
+        ):
+            raise MissingKeyColumn(f'Missing "admin_id" column')
+
+        external_id = external_ids[ith]
+
+        is_active = None
+        if is_actives is not None:
+            is_active = is_actives[ith]
+            assert isinstance(is_active, bool), f"{type(is_active)}"
+
+        is_searchable = None
+        if is_searchables is not None:
+            is_searchable = is_searchables[ith]
+            assert isinstance(is_searchable, bool), f"{type(is_searchable)}"
+
+        street_view_config = extract_street_view_config(
+            nested_values, schema=nested_schema
+        )
+
+        try:
+            location_geometry = feature_to_shapely(layer_feature)
+        except Exception as e:
+            reply = make_hierarchy_validation_dialog(
+                "Invalid Location Feature Detected",
+                f"The Location feature with Admin ID '{admin_id}' located in '{location_group_item.name()}' has "
+                f"an invalid "
+                f"geometry.\n\n"
+                # f"\n__________________{e}\n__________________\n"
+                + APPENDIX_INVALID_GEOMETRY_DIALOG_MESSAGE,
+                add_reject_option=True,
+                reject_text="Cancel Upload",
+                accept_text="Upload Anyway",
+                alternative_accept_text="Upload Anyway",
+                level=QtWidgets.QMessageBox.Warning,
+            )
 
-                    if "anchor" in feature_attributes:
-                        a = extract_field_value(feature_attributes, "anchor")
-                        if a is not None and not (a.isNull() or a.isEmpty()):
-                            can = qgs_geometry_to_shapely(a)
-                            if can:
-                                anchor = can
+            if reply == QMessageBox.RejectRole:
+                raise Exception("Upload cancelled")
+
+            continue  # TODO: IDEA IMPLEMENT POP UP CONFIRMATION OF DELETE FEATURE WHEN MISSING GEOMETRIES.
+
+        if location_geometry is None:
+            logger.error(f"{location_geometry=}")
+            continue
+
+        common_kvs = dict(
+            admin_id=admin_id,
+            external_id=external_id,
+            floor_key=floor_key,
+            is_active=is_active,
+            is_searchable=is_searchable,
+            location_type_key=location_type_key,
+            translations=(translations),
+            display_rule=extract_display_rule(nested_values, nested_schema),
+            media_key=media_keys[ith],
+            restrictions=restrictions_values[ith],
+            is_selectable=is_selectables[ith],
+            settings_3d_margin=settings_3d_margins[ith],
+            settings_3d_width=settings_3d_widths[ith],
+            active_from=active_froms[ith],
+            active_to=active_tos[ith],
+            street_view_config=street_view_config,
+        )
+
+        anchor = None
+        if anchors is not None:
+            anchor = anchors[ith]
+
+        if anchor is None or anchor.is_empty:
+            anchor = location_geometry.representative_point()
+
+        if category_keys_values is not None:
+            a = category_keys_values[ith]
+
+            if not isinstance(a, Collection):
+                logger.warning(f"Skipping {a} for category_keys")
+            else:
+                cat_keys = []
+                for category_name in a:
+                    if isinstance(category_name, str):
+                        if category_name.lower().strip() == "":
+                            continue
+
+                        category_key = Category.compute_key(ckey=category_name)
+                        if solution.categories.get(category_key) is None:
+                            if read_bool_setting(
+                                "ALLOW_CATEGORY_TYPE_CREATION", settings
+                            ):  # TODO: MAKE CONFIRMATION DIALOG IF TRUE
+                                try:
+                                    category_key = solution.add_category(
+                                        ckey=category_name,
+                                        translations={
+                                            "en": LanguageBundle(name=category_name)
+                                        },
+                                    )
+                                except Exception as e:
+                                    _invalid = f"{category_name=} is invalid {e}"
+                                    logger.error(_invalid)
+                                    if collect_invalid:
+                                        issues.append(_invalid)
+                                    else:
+                                        raise e
+                            else:
+                                raise ValueError(
+                                    f"{category_key} is not a category that already exists"
+                                )
+                        cat_keys.append(category_key)
+                    else:
+                        logger.error(
+                            f"Skipping invalid category {category_name} on {admin_id}"
+                        )
 
-                        feature_attributes.pop("anchor")
+                common_kvs["category_keys"] = cat_keys
 
-                for k, v in feature_attributes.items():
-                    if k not in common_kvs:
-                        if k == "category_keys":
-                            cat_keys = []
-                            a = extract_field_value(feature_attributes, "category_keys")
+        if details_values is not None:
+            a = details_values[ith]
 
-                            if not isinstance(a, Collection):
-                                logger.warning(f"Skipping {a} for {k}")
-                                continue
+            if not isinstance(a, Collection):
+                logger.warning(f"Skipping {a} for details")
+            else:
+                details = []
+                for detail_entry in a:
+                    if isinstance(detail_entry, str):
+                        detail_entry_key = detail_entry.lower().strip()
+                        if detail_entry_key == "":
+                            continue
+
+                        if False:
+                            ddd = ast.literal_eval(detail_entry)  # TODO: MAKE SAFE?
+                        else:
+                            ddd = eval(detail_entry)
 
-                            for category_name in a:
-                                if isinstance(category_name, str):
-                                    if category_name.lower().strip() == "":
-                                        continue
+                        if "__class__.__name__" in ddd:
+                            detail_type = ddd.pop("__class__.__name__")
 
-                                    category_key = Category.compute_key(
-                                        ckey=category_name
-                                    )
-                                    if solution.categories.get(category_key) is None:
-                                        if read_bool_setting(
-                                            "ALLOW_CATEGORY_TYPE_CREATION"
-                                        ):  # TODO: MAKE CONFIRMATION DIALOG IF TRUE
-                                            try:
-                                                category_key = solution.add_category(
-                                                    ckey=category_name,
-                                                    translations={
-                                                        "en": LanguageBundle(
-                                                            name=category_name
-                                                        )
-                                                    },
-                                                )
-                                            except Exception as e:
-                                                _invalid = (
-                                                    f"{category_name=} is invalid {e}"
-                                                )
-                                                logger.error(_invalid)
-                                                if collect_invalid:
-                                                    issues.append(_invalid)
-                                                else:
-                                                    raise e
-                                        else:
-                                            raise ValueError(
-                                                f"{category_key} is not a category that already exists"
-                                            )
-                                    cat_keys.append(category_key)
-                                else:
-                                    logger.error(
-                                        f"Skipping invalid category {category_name} on {admin_id}"
-                                    )
+                            assert isinstance(
+                                detail_type, str
+                            ), f"{type(detail_type)} is not a supported detail type, ({StrToDetailTypeMap.keys()})"
+                            detail_type = StrToDetailTypeMap[detail_type.strip()]
 
-                            common_kvs["category_keys"] = cat_keys
-                        elif k == "details":
-                            details = []
-                            a = extract_field_value(feature_attributes, "details")
-
-                            if not isinstance(a, Collection):
-                                logger.warning(f"Skipping {a} for {k}")
-                                continue
-
-                            for detail_entry in a:
-                                if isinstance(detail_entry, str):
-                                    detail_entry_key = detail_entry.lower().strip()
-                                    if detail_entry_key == "":
-                                        continue
-
-                                    if False:
-                                        ddd = ast.literal_eval(
-                                            detail_entry
-                                        )  # TODO: MAKE SAFE?
-                                    else:
-                                        ddd = eval(detail_entry)
-
-                                    if "__class__.__name__" in ddd:
-                                        detail_type = ddd.pop("__class__.__name__")
-
-                                        assert isinstance(
-                                            detail_type, str
-                                        ), f"{type(detail_type)} is not a supported detail type, ({StrToDetailTypeMap.keys()})"
-                                        detail_type = StrToDetailTypeMap[
-                                            detail_type.strip()
-                                        ]
-
-                                        if detail_type == OpeningHoursDetail:
-                                            opening_hours = (
-                                                standard_opening_hours_from_dict(
-                                                    ddd.pop("opening_hours")
-                                                )
-                                            )
-
-                                            details.append(
-                                                OpeningHoursDetail(
-                                                    **ddd, opening_hours=opening_hours
-                                                )
-                                            )
-                                        else:
-                                            details.append(detail_type(**ddd))
-                                    else:
-                                        logger.error(
-                                            f'Did not find a "__class__.__name__" in {ddd}, skipping it'
-                                        )
+                            if detail_type == OpeningHoursDetail:
+                                opening_hours = standard_opening_hours_from_dict(
+                                    ddd.pop("opening_hours")
+                                )
 
-                            if details:
-                                common_kvs["details"] = details
+                                details.append(
+                                    OpeningHoursDetail(
+                                        **ddd, opening_hours=opening_hours
+                                    )
+                                )
+                            else:
+                                details.append(detail_type(**ddd))
                         else:
-                            ...
-                            # logger.debug(f'Unknown {k}')
-                            # common_kvs[k] = extract_field_value(feature_attributes, k)
-                    else:
-                        # logger.debug("Already in kvs")
-                        ...
+                            logger.error(
+                                f'Did not find a "__class__.__name__" in {ddd}, skipping it'
+                            )
 
-                shapely_geom = prepare_geom_for_mi_db_qgis(location_geometry)
+                if details:
+                    common_kvs["details"] = details
 
-                try:
-                    if backend_location_type == BackendLocationTypeEnum.ROOM:
-                        location_key = solution.add_room(
-                            polygon=shapely_geom,
-                            anchor=prepare_geom_for_mi_db_qgis(anchor),
-                            **common_kvs,
-                        )
-                    elif backend_location_type == BackendLocationTypeEnum.AREA:
-                        location_key = solution.add_area(
-                            polygon=shapely_geom,
-                            is_obstacle=is_obstacle,
-                            anchor=prepare_geom_for_mi_db_qgis(anchor),
-                            **common_kvs,
-                        )
-                    elif backend_location_type == BackendLocationTypeEnum.POI:
-                        location_key = solution.add_point_of_interest(
-                            point=shapely_geom, **common_kvs
-                        )
-                    else:
-                        raise Exception(f"{backend_location_type=} is unknown")
+        shapely_geom = prepare_geom_for_mi_db_qgis(location_geometry)
 
-                    if VERBOSE:
-                        logger.info(f"added {backend_location_type} {location_key}")
-                except Exception as e:
-                    _invalid = f"Invalid location: {e}"
-                    logger.error(_invalid)
-                    if collect_invalid:
-                        issues.append(_invalid)
-                    else:
-                        raise e
+        try:
+            if backend_location_type == BackendLocationTypeEnum.ROOM:
+                location_key = solution.add_room(
+                    polygon=shapely_geom,
+                    anchor=prepare_geom_for_mi_db_qgis(anchor),
+                    **common_kvs,
+                )
+            elif backend_location_type == BackendLocationTypeEnum.AREA:
+                location_key = solution.add_area(
+                    polygon=shapely_geom,
+                    is_obstacle=is_obstacles[ith],
+                    anchor=prepare_geom_for_mi_db_qgis(anchor),
+                    **common_kvs,
+                )
+            elif backend_location_type == BackendLocationTypeEnum.POI:
+                location_key = solution.add_point_of_interest(
+                    point=shapely_geom, **common_kvs
+                )
+            else:
+                raise Exception(f"{backend_location_type=} is unknown")
+
+            if VERBOSE:
+                logger.info(f"added {backend_location_type} {location_key}")
+        except Exception as e:
+            _invalid = f"Invalid location: {e}"
+            logger.error(_invalid)
+            if collect_invalid:
+                issues.append(_invalid)
             else:
-                logger.error(f"{location_geometry=}")
+                raise e
 
 
 def add_floor_contents(
@@ -1,4 +1,7 @@
+from .door_graph_checks import *
 from .graph import *
+from .graph_analysis import *
 from .graph_3d_network import *
+from .graph_snapping import *
 from .parsing import *
 from .route_elements import *
@@ -0,0 +1,266 @@
+import logging
+from typing import Any, Iterator, List, Optional, Tuple
+
+import numpy
+import shapely
+
+from mi_companion.configuration import read_bool_setting, read_float_setting
+from mi_companion.layer_descriptors import (
+    DOOR_GRAPH_ISSUES_DESCRIPTOR,
+    ROOMS_DESCRIPTOR,
+)
+from mi_companion.qgis_utilities import replace_review_layer
+from sync_module.mi_sync_constants import MI_EPSG_NUMBER
+from .graph_3d_network import NODE_COORDINATE_PRECISION, collect_graph_edges
+from .graph_analysis import (
+    GraphFeatures,
+    collect_graph_doors,
+    collect_venue_locations,
+)
+from .graph_snapping import local_metres
+
+__all__ = [
+    "doors_without_crossing_edge",
+    "wall_crossings_without_door",
+    "check_doors_against_graph",
+]
+
+logger = logging.getLogger(__name__)
+
+
+def _floor_groups(
+    floor_indices: numpy.ndarray,
+) -> Iterator[Tuple[float, numpy.ndarray]]:
+    """
+    Splits indices by floor with a single sort
+
+    :param floor_indices:
+    :return: Floor index and the indices on it, for every floor
+    """
+    order = numpy.argsort(floor_indices, kind="stable")
+    floors, starts = numpy.unique(floor_indices[order], return_index=True)
+
+    yield from zip(floors.tolist(), numpy.split(order, starts[1:]))
+
+
+def _edge_levels(edges: numpy.ndarray) -> numpy.ndarray:
+    """
+
+    :param edges: Line strings with the level as Z
+    :return: The level of every edge, NaN for edges changing level
+    """
+    start = shapely.get_z(shapely.get_point(edges, 0))
+    end = shapely.get_z(shapely.get_point(edges, -1))
+
+    return numpy.where(start == end, start, numpy.nan)
+
+
+def doors_without_crossing_edge(
+    doors: numpy.ndarray,
+    door_floor_indices: numpy.ndarray,
+    edges: numpy.ndarray,
+    edge_levels: numpy.ndarray,
+) -> numpy.ndarray:
+    """
+    The doors no graph edge on their floor intersects. Each floor queries all its doors at once against an
+    STRtree of its edges.
+
+    :param doors: Door line strings
+    :param door_floor_indices:
+    :param edges: Graph edges
+    :param edge_levels: As given by _edge_levels, the floor index of each edge
+    :return: Indices of the doors
+    """
+    crossed = numpy.zeros(len(doors), dtype=bool)
+    edges = shapely.force_2d(edges)
+
+    edges_by_floor = dict(_floor_groups(edge_levels))
+    for floor_index, floor_doors in _floor_groups(door_floor_indices):
+        floor_edges = edges_by_floor.get(floor_index)
+        if floor_edges is None:
+            continue
+
+        door_hits, _ = shapely.STRtree(edges[floor_edges]).query(
+            doors[floor_doors], predicate="intersects"
+        )
+        crossed[floor_doors[door_hits]] = True
+
+    return numpy.flatnonzero(~crossed)
+
+
+def wall_crossings_without_door(
+    edges: numpy.ndarray,
+    edge_levels: numpy.ndarray,
+    rooms: numpy.ndarray,
+    room_floor_indices: numpy.ndarray,
+    doors: numpy.ndarray,
+    door_floor_indices: numpy.ndarray,
+    door_distance: float,
+) -> Tuple[numpy.ndarray, List[List[int]]]:
+    """
+    The points where graph edges cross a room wall, the room boundary, further than the door distance from any
+    door on the floor. Geometries are in longitude and latitude, distances are measured in local metres.
+    A crossing of a wall shared by several rooms is one point, with all those rooms.
+
+    :param edges: Graph edges
+    :param edge_levels: As given by _edge_levels
+    :param rooms: Room polygons
+    :param room_floor_indices:
+    :param doors: Door line strings
+    :param door_floor_indices:
+    :param door_distance: Metres
+    :return: The crossing points and the indices of the rooms of each
+    """
+    edges = shapely.force_2d(edges)
+    walls = shapely.boundary(shapely.force_2d(rooms))
+
+    reference_latitude = 0.0
+    if len(edges):
+        reference_latitude = float(shapely.get_coordinates(edges)[:, 1].mean())
+
+    def to_metres(geoms: numpy.ndarray) -> numpy.ndarray:
+        return shapely.transform(
+            geoms, lambda lon_lat: local_metres(lon_lat, reference_latitude)
+        )
+
+    doors_m = to_metres(shapely.force_2d(doors))
+    doors_by_floor = dict(_floor_groups(door_floor_indices))
+
+    points = []
+    point_rooms: List[List[int]] = []
+
+    rooms_by_floor = dict(_floor_groups(room_floor_indices))
+    for floor_index, floor_edges in _floor_groups(edge_levels):
+        floor_rooms = rooms_by_floor.get(floor_index)
+        if floor_rooms is None:
+            continue
+
+        edge_hits, wall_hits = shapely.STRtree(walls[floor_rooms]).query(
+            edges[floor_edges], predicate="crosses"
+        )
+        if not len(edge_hits):
+            continue
+
+        crossings, crossing_index = shapely.get_parts(
+            shapely.intersection(
+                edges[floor_edges[edge_hits]], walls[floor_rooms[wall_hits]]
+            ),
+            return_index=True,
+        )
+        crossing_rooms = floor_rooms[wall_hits][crossing_index]
+
+        is_point = shapely.get_type_id(crossings) == shapely.GeometryType.POINT
+        crossings, crossing_rooms = crossings[is_point], crossing_rooms[is_point]
+
+        near_door = numpy.zeros(len(crossings), dtype=bool)
+        floor_doors = doors_by_floor.get(floor_index)
+        if floor_doors is not None and len(crossings):
+            crossing_hits, _ = shapely.STRtree(doors_m[floor_doors]).query(
+                to_metres(crossings), predicate="dwithin", distance=door_distance
+            )
+            near_door[crossing_hits] = True
+
+        crossings, crossing_rooms = crossings[~near_door], crossing_rooms[~near_door]
+        if not len(crossings):
+            continue
+
+        _, first, inverse = numpy.unique(
+            numpy.round(shapely.get_coordinates(crossings) / NODE_COORDINATE_PRECISION),
+            axis=0,
+            return_index=True,
+            return_inverse=True,
+        )
+        inverse = inverse.reshape(-1)
+
+        points.append(crossings[first])
+        for ith_point in range(len(first)):
+            point_rooms.append(
+                sorted(set(crossing_rooms[inverse == ith_point].tolist()))
+            )
+
+    if not points:
+        return numpy.empty(0, dtype=object), point_rooms
+
+    return numpy.concatenate(points), point_rooms
+
+
+def check_doors_against_graph(
+    graph_group: Any,
+    *,
+    edges: Optional[numpy.ndarray] = None,
+    collect_warnings: bool = False,
+    issues: Optional[List[str]] = None,
+) -> int:
+    """
+    Flags doors no graph edge crosses, and graph edges crossing room walls where there is no door, in a review
+    layer of points, the middle of the door or the crossing, with the admin_ids of the doors and rooms
+
+    :param graph_group:
+    :param edges: As returned by add_3d_graph_edges, collected from the graph group if None
+    :param collect_warnings:
+    :param issues:
+    :return: The number of issues found
+    """
+    if not read_bool_setting("CHECK_DOORS_AGAINST_GRAPH"):
+        return 0
+
+    if edges is None:
+        _, edges = collect_graph_edges(graph_group)
+
+    if not len(edges):
+        return 0
+
+    edges = edges[shapely.has_z(edges)]
+    edge_levels = _edge_levels(edges)
+
+    doors: GraphFeatures = collect_graph_doors(graph_group)
+    rooms: GraphFeatures = collect_venue_locations(
+        graph_group.parent(), ROOMS_DESCRIPTOR
+    )
+
+    lonely_doors = doors_without_crossing_edge(
+        doors.geoms, doors.floor_indices, edges, edge_levels
+    )
+    crossings, crossing_rooms = wall_crossings_without_door(
+        edges,
+        edge_levels,
+        rooms.geoms,
+        rooms.floor_indices,
+        doors.geoms,
+        doors.floor_indices,
+        read_float_setting("DOOR_WALL_CROSSING_DISTANCE_M"),
+    )
+
+    columns = [
+        {
+            "admin_id": doors.admin_ids[i],
+            "floor_index": int(doors.floor_indices[i]),
+            "issue": "door not crossed by the graph",
+        }
+        for i in lonely_doors.tolist()
+    ] + [
+        {
+            "admin_id": ", ".join(str(rooms.admin_ids[i]) for i in room_indices),
+            "floor_index": int(rooms.floor_indices[room_indices[0]]),
+            "issue": "graph crosses the room wall without a door",
+        }
+        for room_indices in crossing_rooms
+    ]
+
+    replace_review_layer(
+        f"{graph_group.name()} {DOOR_GRAPH_ISSUES_DESCRIPTOR}",
+        geoms=list(shapely.points(doors.points()[lonely_doors])) + list(crossings),
+        columns=columns,
+        crs=f"EPSG:{MI_EPSG_NUMBER}",
+    )
+
+    if columns:
+        _warning = (
+            f"{len(lonely_doors)} doors are not crossed by the graph and the graph crosses room walls without a "
+            f"door {len(crossings)} times, see the {DOOR_GRAPH_ISSUES_DESCRIPTOR} layer"
+        )
+        logger.warning(_warning)
+        if collect_warnings:
+            issues.append(_warning)
+
+    return len(columns)
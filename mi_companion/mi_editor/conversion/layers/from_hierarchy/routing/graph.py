@@ -20,6 +20,7 @@ from mi_companion import UPLOAD_ERROR_CONFIRMATION_TITLE
 from mi_companion.layer_descriptors import GRAPH_BOUND_DESCRIPTOR
 from mi_companion.mi_editor.conversion.projection import prepare_geom_for_mi_db_qgis
 from sync_module.model import FALLBACK_OSM_GRAPH, Solution
+from .door_graph_checks import check_doors_against_graph
 from .graph_3d_network import add_3d_graph_edges
 from .route_elements import (
     add_route_elements,
@@ -102,9 +103,10 @@ def add_venue_graph(
     if graph_key is None:
         ...
 
+    graph_edges = None
     if graph_key:
         # add_graph_edges(
-        add_3d_graph_edges(
+        graph_edges = add_3d_graph_edges(
             graph_key=graph_key,
             graph_group=graph_group,
             solution=solution,
@@ -125,4 +127,14 @@ def add_venue_graph(
             collect_errors=collect_errors,
         )
 
+        try:  # Only a review, never stops the upload
+            check_doors_against_graph(
+                graph_group,
+                edges=graph_edges,
+                collect_warnings=collect_warnings,
+                issues=issues,
+            )
+        except Exception as e:
+            logger.error(f"Could not check the doors against the graph: {e}")
+
     return graph_key
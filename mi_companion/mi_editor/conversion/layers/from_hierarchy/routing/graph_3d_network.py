@@ -1,5 +1,8 @@
 import logging
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy
+import shapely
 
 # noinspection PyUnresolvedReferences
 from qgis.core import (
@@ -11,19 +14,32 @@ from qgis.core import (
     QgsWkbTypes,
 )
 
-from jord.qgis_utilities import feature_to_shapely, parse_q_value
-from mi_companion.configuration import read_bool_setting
-from mi_companion.layer_descriptors import GRAPH_LINES_DESCRIPTOR
+from jord.qgis_utilities import parse_q_value
+from mi_companion.configuration import read_bool_setting, read_float_setting
+from mi_companion.layer_descriptors import (
+    GRAPH_LINES_DESCRIPTOR,
+    GRAPH_NEAR_MISSES_DESCRIPTOR,
+)
 from mi_companion.mi_editor.constants import (
     DISABLE_GRAPH_EDIT,
+    GEOPACKAGE_FID_COLUMN,
 )
-from mi_companion.mi_editor.conversion.projection import prepare_geom_for_mi_db_qgis
+from mi_companion.mi_editor.conversion.projection import prepare_geoms_for_mi_db_qgis
 from sync_module.model import FALLBACK_OSM_GRAPH, Solution
 from sync_module.tools import lines_3d_to_osm_xml
+from .graph_snapping import add_graph_near_miss_layer, snap_graph_endpoints
 
 logger = logging.getLogger(__name__)
 
-__all__ = ["add_3d_graph_edges"]
+__all__ = [
+    "add_3d_graph_edges",
+    "collect_graph_edges",
+    "set_z_from_m",
+    "set_z_from_m_bulk",
+    "merge_coincident_vertices",
+]
+
+NODE_COORDINATE_PRECISION = 1e-9  # Degrees, about 0.1 mm
 
 
 def set_z_from_m(layer_feature: Any) -> Any:
@@ -92,6 +108,113 @@ def set_z_from_m(layer_feature: Any) -> Any:
     return layer_feature
 
 
+def set_z_from_m_bulk(geometry_wkbs: Sequence[Optional[bytes]]) -> numpy.ndarray:
+    """
+    set_z_from_m for all geometries at once. The WKB of all features is read as one shapely array,
+    and Z is replaced by M for all vertices of all geometries with M in a single coordinate pass.
+    Geometries without M are kept as they are.
+
+    :param geometry_wkbs: None for features without geometry
+    :return: Shapely geometries, None where there was no geometry
+    """
+    geoms = shapely.from_wkb(numpy.asarray(geometry_wkbs, dtype=object))
+
+    has_m = shapely.has_m(geoms)
+    if not has_m.all():
+        logger.error(
+            f"{int((~has_m & ~shapely.is_missing(geoms)).sum())} geometries do not have M values"
+        )
+
+    if has_m.any():
+        m_geoms = geoms[has_m]
+        coords = shapely.get_coordinates(m_geoms, include_z=True, include_m=True)
+
+        # set_coordinates does not support M, so the geometries are rebuilt as XYZ
+        geoms[has_m] = shapely.set_coordinates(
+            shapely.force_3d(shapely.force_2d(m_geoms)), coords[:, [0, 1, 3]]
+        )
+
+    return geoms
+
+
+def merge_coincident_vertices(
+    geoms: numpy.ndarray, precision: float = NODE_COORDINATE_PRECISION
+) -> Tuple[numpy.ndarray, int]:
+    """
+    Snaps vertices that are the same up to the precision onto one coordinate, so the vertices edges share are
+    written with identical coordinates and become a single OSM node. Vertices are hashed by their quantized
+    coordinates, all at once.
+
+    :param geoms: Shapely geometries, those with Z are modified in place
+    :param precision:
+    :return: The geometries and the number of distinct nodes
+    """
+    has_z = shapely.has_z(geoms)
+    z_geoms = geoms[has_z]
+
+    coords = shapely.get_coordinates(z_geoms, include_z=True)
+    if not len(coords):
+        return geoms, 0
+
+    keys = numpy.round(coords / precision).astype(numpy.int64)
+    _, first, inverse = numpy.unique(
+        keys, axis=0, return_index=True, return_inverse=True
+    )
+
+    geoms[has_z] = shapely.set_coordinates(z_geoms, coords[first][inverse.reshape(-1)])
+
+    return geoms, len(first)
+
+
+def collect_graph_edges(graph_group: Any) -> Tuple[List[Dict[str, Any]], numpy.ndarray]:
+    """
+    The edges of the graph lines layers of the graph group as they are uploaded, with Z set from M and back
+    projected to longitude and latitude. Features without geometry are skipped.
+
+    :param graph_group:
+    :return: The OSM tags of every edge and the edges as shapely line strings
+    """
+    lines_attributes = []
+    geometry_wkbs = []
+
+    for location_group_item in graph_group.children():
+        if (
+            isinstance(location_group_item, QgsLayerTreeLayer)
+            and GRAPH_LINES_DESCRIPTOR in location_group_item.name()
+        ):
+            layer = location_group_item.layer()
+
+            if layer:
+                for ith, layer_feature in enumerate(layer.getFeatures()):
+                    feature_attributes = {
+                        k.name(): parse_q_value(v)
+                        for k, v in zip(
+                            layer_feature.fields(),
+                            layer_feature.attributes(),
+                        )
+                        if k.name() != GEOPACKAGE_FID_COLUMN  # Not an OSM tag
+                    }
+
+                    feature_attributes["osmid"] = str(-ith)
+
+                    geom = layer_feature.geometry()
+                    if not geom or geom.isNull():
+                        logger.error(f"Skipping graph edge {ith} without geometry")
+                        continue
+
+                    lines_attributes.append(feature_attributes)
+                    geometry_wkbs.append(bytes(geom.asWkb()))
+
+    graph_lines = set_z_from_m_bulk(geometry_wkbs)
+
+    if len(graph_lines):
+        graph_lines = numpy.asarray(
+            prepare_geoms_for_mi_db_qgis(list(graph_lines), clean=False), dtype=object
+        )
+
+    return lines_attributes, graph_lines
+
+
 def add_3d_graph_edges(
     *,
     graph_key: str,
@@ -101,7 +224,7 @@ def add_3d_graph_edges(
     collect_warnings: bool = False,
     collect_errors: bool = False,
     issues: Optional[List[str]] = None,
-) -> None:
+) -> Optional[numpy.ndarray]:
     """
 
     :param graph_key:
@@ -111,7 +234,7 @@ def add_3d_graph_edges(
     :param collect_warnings:
     :param collect_errors:
     :param issues:
-    :return:
+    :return: The edges as uploaded, None if the graph is not uploaded
     """
     if not read_bool_setting("UPLOAD_OSM_GRAPH") or DISABLE_GRAPH_EDIT:
         logger.warning("OSM graph upload is disabled")
@@ -119,36 +242,32 @@ def add_3d_graph_edges(
         # osm_xml = FALLBACK_OSM_GRAPH
         # solution.update_graph(graph_key, osm_xml=osm_xml)
 
-        return
+        return None
 
-    lines = []
+    lines_attributes, graph_lines = collect_graph_edges(graph_group)
 
-    for location_group_item in graph_group.children():
-        if (
-            isinstance(location_group_item, QgsLayerTreeLayer)
-            and GRAPH_LINES_DESCRIPTOR in location_group_item.name()
-        ):
-            layer = location_group_item.layer()
+    graph_lines, num_nodes = merge_coincident_vertices(graph_lines)
 
-            if layer:
-                for ith, layer_feature in enumerate(layer.getFeatures()):
-                    feature_attributes = {
-                        k.name(): parse_q_value(v)
-                        for k, v in zip(
-                            layer_feature.fields(),
-                            layer_feature.attributes(),
-                        )
-                    }
+    logger.info(f"{len(graph_lines)} graph edges with {num_nodes} distinct nodes")
 
-                    feature_attributes["osmid"] = str(-ith)
+    graph_lines, num_snapped, near_misses = snap_graph_endpoints(
+        graph_lines,
+        tolerance=read_float_setting("GRAPH_SNAP_TOLERANCE_M"),
+        near_miss_distance=read_float_setting("GRAPH_NEAR_MISS_DISTANCE_M"),
+    )
 
-                    layer_feature = set_z_from_m(layer_feature)
+    if num_snapped:
+        logger.info(f"Snapped {num_snapped} graph edge endpoints")
 
-                    graph_line = prepare_geom_for_mi_db_qgis(
-                        feature_to_shapely(layer_feature, validate=False), clean=False
-                    )
+    if near_misses:
+        _warning = f"{len(near_misses)} graph edge endpoints were left unsnapped near another, see the {GRAPH_NEAR_MISSES_DESCRIPTOR} layer"
+        logger.warning(_warning)
+        if collect_warnings:
+            issues.append(_warning)
 
-                    lines.append((graph_line, feature_attributes))
+    add_graph_near_miss_layer(graph_group, near_misses)
+
+    lines = list(zip(graph_lines.tolist(), lines_attributes))
 
     try:
         osm_xml = lines_3d_to_osm_xml(lines).decode(
@@ -169,3 +288,5 @@ def add_3d_graph_edges(
             issues.append(_invalid)
         else:
             raise e
+
+    return graph_lines
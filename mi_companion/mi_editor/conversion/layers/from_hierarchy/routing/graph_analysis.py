@@ -0,0 +1,592 @@
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy
+import shapely
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+from scipy.spatial import cKDTree
+
+# noinspection PyUnresolvedReferences
+from qgis.core import QgsLayerTreeGroup, QgsLayerTreeLayer
+
+from jord.qgis_utilities import extract_layer_data_single, recurse_layers
+from mi_companion import FLOOR_HEIGHT
+from mi_companion.configuration import read_float_setting
+from mi_companion.layer_descriptors import (
+    CONNECTORS_GROUP_DESCRIPTOR,
+    DOORS_GROUP_DESCRIPTOR,
+    FLOOR_POLYGON_DESCRIPTOR,
+    GRAPH_PATH_DESCRIPTOR,
+    POINT_OF_INTERESTS_DESCRIPTOR,
+    UNREACHABLE_DOORS_DESCRIPTOR,
+    UNREACHABLE_POIS_DESCRIPTOR,
+)
+from mi_companion.mi_editor.conversion.projection import prepare_geoms_for_mi_db_qgis
+from mi_companion.qgis_utilities import replace_review_layer
+from sync_module.mi_sync_constants import MI_EPSG_NUMBER
+from .graph_3d_network import NODE_COORDINATE_PRECISION, collect_graph_edges
+from .graph_snapping import local_metres
+from .parse_connections import get_connections
+
+__all__ = [
+    "RoutingGraph",
+    "GraphFeatures",
+    "collect_graph_connectors",
+    "collect_graph_doors",
+    "collect_venue_locations",
+    "collect_venue_pois",
+    "concatenate_graph_features",
+    "build_routing_graph",
+    "add_unreachable_feature_layers",
+    "add_graph_path_layer",
+]
+
+logger = logging.getLogger(__name__)
+
+MIN_EDGE_WEIGHT = 1e-6  # Metres, csgraph does not see explicit zeros as edges
+
+
+class RoutingGraph:
+    """
+    The routing graph as a sparse adjacency matrix, for reachability and shortest paths with scipy.sparse.csgraph,
+    offline and without uploading.
+
+    Nodes are the distinct vertices of the graph edges and edges connect consecutive vertices, weighted by their
+    length in metres, with a level difference counting as the floor height. Every connector is a node of its own,
+    linked to the nearest node on its floor and to the connector of the same connection on the next floor.
+
+    The main network is the connected component with the most graph nodes, features whose nearest node is in any
+    other component, or that have no node within the attach distance on their floor, are unreachable.
+    """
+
+    def __init__(
+        self,
+        lines: Sequence[Any],
+        connectors: Optional[Sequence[Tuple[Hashable, Any, int]]] = None,
+        *,
+        floor_height: float = FLOOR_HEIGHT,
+        attach_distance: float = 2.0,
+    ):
+        """
+
+        :param lines: Line strings in longitude and latitude with the level as Z, like those of osm_xml_to_lines
+        :param connectors: Connection id, point in longitude and latitude and floor index of every connector
+        :param floor_height: Metres
+        :param attach_distance: Metres a connector or feature may be from the nearest node on its floor
+        """
+        self.floor_height = floor_height
+        self.attach_distance = attach_distance
+
+        lines = numpy.asarray(lines, dtype=object).reshape(-1)
+        lines = lines[shapely.has_z(lines)]
+
+        coords, line_index = shapely.get_coordinates(
+            lines, include_z=True, return_index=True
+        )
+        keys = numpy.round(coords / NODE_COORDINATE_PRECISION).astype(numpy.int64)
+        _, first, vertex_node = numpy.unique(
+            keys, axis=0, return_index=True, return_inverse=True
+        )
+        vertex_node = vertex_node.reshape(-1)
+
+        self.node_coords = coords[first]
+        self.num_graph_nodes = len(first)
+        self.reference_latitude = (
+            float(self.node_coords[:, 1].mean()) if self.num_graph_nodes else 0.0
+        )
+        self._node_xy = local_metres(self.node_coords[:, :2], self.reference_latitude)
+        self._level_trees: Dict[float, Tuple[Optional[Any], numpy.ndarray]] = {}
+
+        consecutive = numpy.flatnonzero(line_index[1:] == line_index[:-1])
+        edges = [
+            numpy.column_stack((vertex_node[consecutive], vertex_node[consecutive + 1]))
+        ]
+
+        if connectors:
+            edges.extend(self._add_connectors(connectors))
+
+        edges = numpy.concatenate(edges).astype(numpy.int64).reshape(-1, 2)
+        num_nodes = len(self.node_coords)
+
+        self.adjacency = coo_matrix(
+            (self.edge_lengths(edges), (edges[:, 0], edges[:, 1])),
+            shape=(num_nodes, num_nodes),
+        ).tocsr()
+
+        self.num_components, self.labels = connected_components(
+            self.adjacency, directed=False
+        )
+
+        self.main_component = -1
+        if self.num_graph_nodes:
+            self.main_component = int(
+                numpy.bincount(self.labels[: self.num_graph_nodes]).argmax()
+            )
+
+        logger.info(
+            f"Routing graph with {num_nodes} nodes, {len(edges)} edges and {self.num_components} components"
+        )
+
+    def _add_connectors(
+        self, connectors: Sequence[Tuple[Hashable, Any, int]]
+    ) -> List[numpy.ndarray]:
+        """
+        Adds a node for every connector
+
+        :param connectors:
+        :return: The connector edges
+        """
+        connection_ids, points, floor_indices = zip(*connectors)
+
+        connector_coords = numpy.column_stack(
+            (
+                shapely.get_coordinates(numpy.asarray(points, dtype=object))[:, :2],
+                numpy.asarray(floor_indices, dtype=float),
+            )
+        )
+        connector_nodes = len(self.node_coords) + numpy.arange(len(connector_coords))
+
+        attached_nodes = self.nearest_nodes(
+            connector_coords[:, :2], connector_coords[:, 2]
+        )
+        attached = attached_nodes >= 0
+        if not attached.all():
+            logger.warning(
+                f"{int((~attached).sum())} connectors have no graph node within {self.attach_distance} m on their floor"
+            )
+
+        self.node_coords = numpy.vstack((self.node_coords, connector_coords))
+        self._node_xy = numpy.vstack(
+            (
+                self._node_xy,
+                local_metres(connector_coords[:, :2], self.reference_latitude),
+            )
+        )
+
+        # The connectors of each connection by floor, each linked to the next
+        _, connection_codes = numpy.unique(
+            numpy.asarray([str(c) for c in connection_ids]), return_inverse=True
+        )
+        connection_codes = connection_codes.reshape(-1)
+        order = numpy.lexsort((connector_coords[:, 2], connection_codes))
+        same_connection = connection_codes[order][1:] == connection_codes[order][:-1]
+
+        return [
+            numpy.column_stack((connector_nodes[attached], attached_nodes[attached])),
+            numpy.column_stack(
+                (
+                    connector_nodes[order][:-1][same_connection],
+                    connector_nodes[order][1:][same_connection],
+                )
+            ),
+        ]
+
+    def edge_lengths(self, edges: numpy.ndarray) -> numpy.ndarray:
+        """
+
+        :param edges: Node pairs
+        :return: Metres, a level difference counting as the floor height
+        """
+        horizontal = self._node_xy[edges[:, 0]] - self._node_xy[edges[:, 1]]
+        vertical = (
+            self.node_coords[edges[:, 0], 2] - self.node_coords[edges[:, 1], 2]
+        ) * self.floor_height
+
+        return numpy.maximum(
+            numpy.sqrt((horizontal**2).sum(axis=1) + vertical**2), MIN_EDGE_WEIGHT
+        )
+
+    def _level_tree(self, level: float) -> Tuple[Optional[Any], numpy.ndarray]:
+        if level not in self._level_trees:
+            level_nodes = numpy.flatnonzero(
+                self.node_coords[: self.num_graph_nodes, 2] == level
+            )
+            tree = cKDTree(self._node_xy[level_nodes]) if len(level_nodes) else None
+            self._level_trees[level] = (tree, level_nodes)
+
+        return self._level_trees[level]
+
+    def nearest_nodes(self, lon_lat: Any, levels: Any) -> numpy.ndarray:
+        """
+        The nearest graph node on the same level of every point, within the attach distance
+
+        :param lon_lat: Points in longitude and latitude
+        :param levels: The level, the floor index, of every point
+        :return: The node of every point, -1 where there is none
+        """
+        lon_lat = numpy.asarray(lon_lat, dtype=float).reshape(-1, 2)
+        levels = numpy.asarray(levels, dtype=float).reshape(-1)
+        nodes = numpy.full(len(lon_lat), -1, dtype=numpy.int64)
+
+        if not len(lon_lat) or not self.num_graph_nodes:
+            return nodes
+
+        xy = local_metres(lon_lat, self.reference_latitude)
+
+        for level in numpy.unique(levels).tolist():
+            tree, level_nodes = self._level_tree(level)
+            if tree is None:
+                continue
+
+            points = numpy.flatnonzero(levels == level)
+            distances, nearest = tree.query(
+                xy[points], distance_upper_bound=self.attach_distance
+            )
+            found = numpy.isfinite(distances)
+            nodes[points[found]] = level_nodes[nearest[found]]
+
+        return nodes
+
+    def reachable(self, nodes: numpy.ndarray) -> numpy.ndarray:
+        """
+
+        :param nodes: As returned by nearest_nodes
+        :return: Whether each node is in the main network
+        """
+        nodes = numpy.asarray(nodes, dtype=numpy.int64)
+        attached = nodes >= 0
+
+        reachable = numpy.zeros(len(nodes), dtype=bool)
+        reachable[attached] = self.labels[nodes[attached]] == self.main_component
+
+        return reachable
+
+    def shortest_path(self, source: int, target: int) -> Optional[Tuple[Any, float]]:
+        """
+
+        :param source: Node
+        :param target: Node
+        :return: The path as a line string in longitude and latitude with the level as Z and its length in metres,
+        None if the target can not be reached from the source
+        """
+        distances, predecessors = dijkstra(
+            self.adjacency,
+            directed=False,
+            indices=source,
+            return_predecessors=True,
+        )
+
+        if not numpy.isfinite(distances[target]):
+            return None
+
+        path = [target]
+        while path[-1] != source:
+            path.append(predecessors[path[-1]])
+        path.reverse()
+
+        if len(path) == 1:
+            path.append(path[0])
+
+        return shapely.linestrings(self.node_coords[path]), float(distances[target])
+
+
+class GraphFeatures(NamedTuple):
+    """
+    Features attached to the routing graph, in longitude and latitude
+    """
+
+    admin_ids: List[str]
+    floor_indices: numpy.ndarray
+    geoms: numpy.ndarray
+
+    def points(self) -> numpy.ndarray:
+        """
+
+        :return: The point of every feature that is attached to the graph, the middle of lines
+        """
+        points = shapely.point_on_surface(self.geoms)
+        is_line = shapely.get_type_id(self.geoms) == shapely.GeometryType.LINESTRING
+        points[is_line] = shapely.line_interpolate_point(
+            self.geoms[is_line], 0.5, normalized=True
+        )
+
+        return shapely.get_coordinates(points)
+
+
+def _read_features(
+    layer_tree_layers: Sequence[Any], floor_index: Optional[int] = None
+) -> GraphFeatures:
+    """
+
+    :param layer_tree_layers:
+    :param floor_index: Floor index of all features, otherwise read from their floor_index field
+    :return: Features with geometry and an admin_id
+    """
+    admin_ids = []
+    floor_indices = []
+    wkbs = []
+
+    for layer_tree_layer in layer_tree_layers:
+        layer = layer_tree_layer.layer()
+        if not layer:
+            continue
+
+        for feature in layer.getFeatures():
+            geom = feature.geometry()
+            if not geom or geom.isNull():
+                continue
+
+            admin_ids.append(str(feature["admin_id"]))
+            floor_indices.append(
+                floor_index if floor_index is not None else feature["floor_index"]
+            )
+            wkbs.append(bytes(geom.asWkb()))
+
+    geoms = shapely.force_2d(shapely.from_wkb(numpy.asarray(wkbs, dtype=object)))
+    if len(geoms):
+        geoms = numpy.asarray(
+            prepare_geoms_for_mi_db_qgis(list(geoms), clean=False), dtype=object
+        )
+
+    return GraphFeatures(
+        admin_ids=admin_ids,
+        floor_indices=numpy.asarray(floor_indices, dtype=float),
+        geoms=geoms,
+    )
+
+
+def _route_element_layers(graph_group: Any, descriptor: str) -> List[Any]:
+    """
+    The layers of a route element, in floor wise groups or as single layers
+
+    :param graph_group:
+    :param descriptor:
+    :return:
+    """
+    layers = []
+
+    for graph_group_item in graph_group.children():
+        if descriptor not in graph_group_item.name():
+            continue
+
+        if isinstance(graph_group_item, QgsLayerTreeGroup):
+            layers.extend(recurse_layers(graph_group_item))
+        elif isinstance(graph_group_item, QgsLayerTreeLayer):
+            layers.append(graph_group_item)
+
+    return layers
+
+
+def collect_graph_doors(graph_group: Any) -> GraphFeatures:
+    """
+
+    :param graph_group:
+    :return: The doors of the graph
+    """
+    return _read_features(_route_element_layers(graph_group, DOORS_GROUP_DESCRIPTOR))
+
+
+def collect_graph_connectors(graph_group: Any) -> List[Tuple[Hashable, Any, int]]:
+    """
+
+    :param graph_group:
+    :return: Connection id, point in longitude and latitude and floor index of every connector of the graph
+    """
+    connection_ids = []
+    points = []
+    floor_indices = []
+
+    for layer_tree_layer in _route_element_layers(
+        graph_group, CONNECTORS_GROUP_DESCRIPTOR
+    ):
+        for connection_id, connector_tuples in get_connections(
+            layer_tree_layer
+        ).items():
+            for (point, floor_index, _), _ in connector_tuples:
+                connection_ids.append(connection_id)
+                points.append(shapely.force_2d(point))
+                floor_indices.append(floor_index)
+
+    if points:
+        points = prepare_geoms_for_mi_db_qgis(points, clean=False)
+
+    return list(zip(connection_ids, points, floor_indices))
+
+
+def collect_venue_locations(venue_group: Any, descriptor: str) -> GraphFeatures:
+    """
+    The locations of a kind on every floor of the venue, with the floor index of the floor polygon of their floor
+
+    :param venue_group:
+    :param descriptor: Like ROOMS_DESCRIPTOR or POINT_OF_INTERESTS_DESCRIPTOR
+    :return:
+    """
+    location_layers = defaultdict(list)
+
+    def visit(group: Any) -> None:
+        floor_index = None
+        layers = []
+
+        for item in group.children():
+            if isinstance(item, QgsLayerTreeGroup):
+                visit(item)
+            elif isinstance(item, QgsLayerTreeLayer):
+                name = item.name().lower()
+                if FLOOR_POLYGON_DESCRIPTOR in name:
+                    floor_attributes, _ = extract_layer_data_single(
+                        item, raise_if_empty=False
+                    )
+                    if floor_attributes and "floor_index" in floor_attributes:
+                        floor_index = int(floor_attributes["floor_index"])
+                elif name.startswith(descriptor):
+                    layers.append(item)
+
+        if floor_index is not None:
+            location_layers[floor_index].extend(layers)
+
+    visit(venue_group)
+
+    return concatenate_graph_features(
+        [
+            _read_features(layers, floor_index)
+            for floor_index, layers in location_layers.items()
+        ]
+    )
+
+
+def collect_venue_pois(venue_group: Any) -> GraphFeatures:
+    """
+
+    :param venue_group:
+    :return: The POIs of every floor of the venue
+    """
+    return collect_venue_locations(venue_group, POINT_OF_INTERESTS_DESCRIPTOR)
+
+
+def concatenate_graph_features(features: Sequence[GraphFeatures]) -> GraphFeatures:
+    """
+
+    :param features:
+    :return: All the features as one
+    """
+    if not features:
+        return _read_features([])
+
+    return GraphFeatures(
+        admin_ids=[admin_id for f in features for admin_id in f.admin_ids],
+        floor_indices=numpy.concatenate([f.floor_indices for f in features]),
+        geoms=numpy.concatenate([f.geoms for f in features]),
+    )
+
+
+def build_routing_graph(graph_group: Any, attach_distance: float = 2.0) -> RoutingGraph:
+    """
+    The routing graph of the graph lines and connectors of the graph group, as they would be uploaded
+
+    :param graph_group:
+    :param attach_distance: Metres
+    :return:
+    """
+    _, graph_lines = collect_graph_edges(graph_group)
+
+    return RoutingGraph(
+        graph_lines,
+        collect_graph_connectors(graph_group),
+        floor_height=read_float_setting("FLOOR_HEIGHT"),
+        attach_distance=attach_distance,
+    )
+
+
+def add_unreachable_feature_layers(
+    graph_group: Any,
+    routing_graph: RoutingGraph,
+    features_by_descriptor: Dict[str, GraphFeatures],
+) -> Dict[str, int]:
+    """
+    Replaces the review layers of the features not attached to the main network of the graph, by descriptor
+
+    :param graph_group:
+    :param routing_graph:
+    :param features_by_descriptor: Like {UNREACHABLE_DOORS_DESCRIPTOR: collect_graph_doors(graph_group)}
+    :return: The number of unreachable features by descriptor
+    """
+    num_unreachable = {}
+
+    for descriptor, features in features_by_descriptor.items():
+        nodes = routing_graph.nearest_nodes(features.points(), features.floor_indices)
+        unreachable = numpy.flatnonzero(~routing_graph.reachable(nodes))
+
+        replace_review_layer(
+            f"{graph_group.name()} {descriptor}",
+            geoms=features.geoms[unreachable],
+            columns=[
+                {
+                    "admin_id": features.admin_ids[i],
+                    "floor_index": int(features.floor_indices[i]),
+                    "reason": (
+                        "disconnected from the main network"
+                        if nodes[i] >= 0
+                        else f"no graph node within {routing_graph.attach_distance} m"
+                    ),
+                }
+                for i in unreachable.tolist()
+            ],
+            crs=f"EPSG:{MI_EPSG_NUMBER}",
+        )
+
+        num_unreachable[descriptor] = len(unreachable)
+
+    return num_unreachable
+
+
+def add_graph_path_layer(
+    graph_group: Any,
+    routing_graph: RoutingGraph,
+    features: GraphFeatures,
+    from_admin_id: str,
+    to_admin_id: str,
+) -> Optional[float]:
+    """
+    Replaces the path review layer of the graph with the shortest path between two features
+
+    :param graph_group:
+    :param routing_graph:
+    :param features: Features to pick the two from
+    :param from_admin_id:
+    :param to_admin_id:
+    :return: The length of the path in metres, None if there is no path
+    """
+    picked = [
+        features.admin_ids.index(admin_id)
+        for admin_id in (from_admin_id, to_admin_id)
+        if admin_id in features.admin_ids
+    ]
+    if len(picked) != 2:
+        logger.error(f"Did not find both {from_admin_id} and {to_admin_id}")
+        return None
+
+    source, target = routing_graph.nearest_nodes(
+        features.points()[picked], features.floor_indices[picked]
+    ).tolist()
+
+    path = None
+    if source >= 0 and target >= 0:
+        path = routing_graph.shortest_path(source, target)
+
+    if path is None:
+        logger.warning(f"No path between {from_admin_id} and {to_admin_id}")
+        replace_review_layer(
+            f"{graph_group.name()} {GRAPH_PATH_DESCRIPTOR}",
+            geoms=[],
+            columns=[],
+            crs=f"EPSG:{MI_EPSG_NUMBER}",
+        )
+        return None
+
+    path_line, length = path
+    replace_review_layer(
+        f"{graph_group.name()} {GRAPH_PATH_DESCRIPTOR}",
+        geoms=[path_line],
+        columns=[
+            {
+                "from_admin_id": from_admin_id,
+                "to_admin_id": to_admin_id,
+                "length_m": round(length, 2),
+            }
+        ],
+        crs=f"EPSG:{MI_EPSG_NUMBER}",
+    )
+
+    return length
@@ -0,0 +1,229 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy
+import shapely
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+from mi_companion.layer_descriptors import GRAPH_NEAR_MISSES_DESCRIPTOR
+from mi_companion.qgis_utilities import replace_review_layer
+from sync_module.mi_sync_constants import MI_EPSG_NUMBER
+
+__all__ = ["local_metres", "snap_graph_endpoints", "add_graph_near_miss_layer"]
+
+logger = logging.getLogger(__name__)
+
+METRES_PER_DEGREE_LATITUDE = 110540.0
+METRES_PER_DEGREE_LONGITUDE_AT_EQUATOR = 111320.0
+
+
+def local_metres(
+    lon_lat: numpy.ndarray, reference_latitude: Optional[float] = None
+) -> numpy.ndarray:
+    """
+    Equirectangular projection around a reference latitude, accurate to well below a centimetre over the extent of
+    a venue, which is all a snapping tolerance needs
+
+    :param lon_lat: Longitude and latitude in degrees
+    :param reference_latitude: Degrees, the mean latitude of the points if None
+    :return: x and y in metres
+    """
+    if reference_latitude is None:
+        reference_latitude = lon_lat[:, 1].mean()
+
+    cos_latitude = numpy.cos(numpy.radians(reference_latitude))
+
+    return numpy.column_stack(
+        (
+            lon_lat[:, 0] * cos_latitude * METRES_PER_DEGREE_LONGITUDE_AT_EQUATOR,
+            lon_lat[:, 1] * METRES_PER_DEGREE_LATITUDE,
+        )
+    )
+
+
+def _pair_keys(pairs: numpy.ndarray, num_nodes: int) -> numpy.ndarray:
+    return pairs.min(axis=1).astype(numpy.int64) * num_nodes + pairs.max(axis=1)
+
+
+def _snap_level(
+    xy: numpy.ndarray,
+    degree: numpy.ndarray,
+    edge_ends: numpy.ndarray,
+    tolerance: float,
+    near_miss_distance: float,
+) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Clusters the nodes of one level that are within the tolerance of each other, through a KD-tree pair query
+    and the connected components of the pairs. A chain of nodes each within the tolerance of the next is one
+    cluster, even if its ends are further apart. The two ends of an edge are never a pair, a short edge is neither
+    snapped shut nor a near miss of itself.
+
+    :param xy: Distinct nodes in metres
+    :param degree: Number of edge ends at each node
+    :param edge_ends: The start and end node of every edge of the level
+    :param tolerance:
+    :param near_miss_distance:
+    :return: The node each node snaps onto, and the node pairs and distances of the near misses
+    """
+    num_nodes = len(xy)
+
+    tree = cKDTree(xy)
+    pairs = tree.query_pairs(
+        r=max(tolerance, near_miss_distance), output_type="ndarray"
+    )
+    if len(pairs) and len(edge_ends):
+        pairs = pairs[
+            ~numpy.isin(_pair_keys(pairs, num_nodes), _pair_keys(edge_ends, num_nodes))
+        ]
+    distances = numpy.linalg.norm(xy[pairs[:, 0]] - xy[pairs[:, 1]], axis=1)
+
+    snapped = distances <= tolerance
+    _, labels = connected_components(
+        coo_matrix(
+            (
+                numpy.ones(int(snapped.sum()), dtype=bool),
+                (pairs[snapped, 0], pairs[snapped, 1]),
+            ),
+            shape=(num_nodes, num_nodes),
+        ),
+        directed=False,
+    )
+
+    # Every cluster snaps onto its node with the most edge ends, the first one on ties
+    order = numpy.lexsort((numpy.arange(num_nodes), -degree, labels))
+    is_first = numpy.ones(num_nodes, dtype=bool)
+    is_first[1:] = labels[order][1:] != labels[order][:-1]
+    target_of_label = numpy.empty(labels.max() + 1, dtype=numpy.int64)
+    target_of_label[labels[order][is_first]] = order[is_first]
+
+    targets = target_of_label[labels]
+
+    # Pairs left apart, in different clusters, where at least one of them is a dead end
+    near_miss = (
+        ~snapped
+        & (labels[pairs[:, 0]] != labels[pairs[:, 1]])
+        & (numpy.minimum(degree[pairs[:, 0]], degree[pairs[:, 1]]) == 1)
+    )
+
+    # Only the closest pair of each two clusters, between the nodes they snap onto
+    closest_first = numpy.argsort(distances[near_miss], kind="stable")
+    near_miss_pairs = numpy.sort(targets[pairs[near_miss]][closest_first], axis=1)
+    near_miss_pairs, first = numpy.unique(near_miss_pairs, axis=0, return_index=True)
+
+    return targets, near_miss_pairs, distances[near_miss][closest_first][first]
+
+
+def snap_graph_endpoints(
+    geoms: numpy.ndarray, tolerance: float, near_miss_distance: float = 0.0
+) -> Tuple[numpy.ndarray, int, List[Dict[str, Any]]]:
+    """
+    Snaps edge endpoints on the same level, the same Z, that are within the tolerance of each other onto a
+    single coordinate, so lines_3d_to_osm_xml emits them as one node. Endpoints are clustered with a KD-tree
+    per level in O(n log n). Endpoints left further apart than the tolerance, but within the near miss
+    distance, where one of them is a dead end, are reported for review.
+    No edge is snapped down to zero length, the ends of an edge that a chain of snaps would join are left in place.
+
+    :param geoms: Shapely line strings with Z in longitude and latitude, those with Z are modified in place
+    :param tolerance: Metres, 0 to only report near misses
+    :param near_miss_distance: Metres, 0 to not report near misses
+    :return: The geometries, the number of endpoints moved and the near misses as two-point line strings with
+    their level and distance in metres
+    """
+    near_misses = []
+
+    has_z = shapely.has_z(geoms)
+    z_geoms = geoms[has_z]
+
+    if not len(z_geoms) or max(tolerance, near_miss_distance) <= 0:
+        return geoms, 0, near_misses
+
+    coords = shapely.get_coordinates(z_geoms, include_z=True)
+    num_coords = shapely.get_num_coordinates(z_geoms)
+    last = numpy.cumsum(num_coords) - 1
+    endpoint_index = numpy.concatenate((last - num_coords + 1, last))
+
+    nodes, inverse, degree = numpy.unique(
+        coords[endpoint_index], axis=0, return_inverse=True, return_counts=True
+    )
+    inverse = inverse.reshape(-1)
+    edge_nodes = inverse.reshape(2, -1).T  # Start and end node of every edge
+    xy = local_metres(nodes[:, :2])
+
+    targets = numpy.arange(len(nodes))
+    near_miss_pairs = [numpy.empty((0, 2), dtype=numpy.int64)]
+    near_miss_distances = [numpy.empty(0)]
+
+    level_index = numpy.empty(len(nodes), dtype=numpy.int64)  # Of a node on its level
+
+    levels, level_inverse = numpy.unique(nodes[:, 2], return_inverse=True)
+    level_inverse = level_inverse.reshape(-1)
+    for ith_level in range(len(levels)):
+        level_nodes = numpy.flatnonzero(level_inverse == ith_level)
+        if len(level_nodes) < 2:
+            continue
+
+        level_index[level_nodes] = numpy.arange(len(level_nodes))
+        level_edges = (level_inverse[edge_nodes] == ith_level).all(axis=1)
+
+        level_targets, level_pairs, level_distances = _snap_level(
+            xy[level_nodes],
+            degree[level_nodes],
+            level_index[edge_nodes[level_edges]],
+            tolerance,
+            near_miss_distance,
+        )
+        targets[level_nodes] = level_nodes[level_targets]
+        near_miss_pairs.append(level_nodes[level_pairs])
+        near_miss_distances.append(level_distances)
+
+    collapsed = (targets[edge_nodes[:, 0]] == targets[edge_nodes[:, 1]]) & (
+        edge_nodes[:, 0] != edge_nodes[:, 1]
+    )
+    if collapsed.any():
+        logger.warning(
+            f"Not snapping the ends of {int(collapsed.sum())} edges that would be snapped to zero length"
+        )
+        collapsed_nodes = edge_nodes[collapsed].reshape(-1)
+        targets[collapsed_nodes] = collapsed_nodes
+
+    near_miss_pairs = numpy.concatenate(near_miss_pairs)
+    if len(near_miss_pairs):
+        near_miss_lines = shapely.linestrings(nodes[near_miss_pairs][:, :, :2])
+        near_misses = [
+            {"geometry": line, "level": level, "distance_m": distance}
+            for line, level, distance in zip(
+                near_miss_lines.tolist(),
+                nodes[near_miss_pairs[:, 0], 2].tolist(),
+                numpy.round(numpy.concatenate(near_miss_distances), 3).tolist(),
+            )
+        ]
+
+    moved = targets[inverse] != inverse
+    if moved.any():
+        coords[endpoint_index] = nodes[targets[inverse]]
+        geoms[has_z] = shapely.set_coordinates(z_geoms, coords)
+
+    return geoms, int(moved.sum()), near_misses
+
+
+def add_graph_near_miss_layer(
+    graph_group: Any, near_misses: List[Dict[str, Any]]
+) -> Optional[Any]:
+    """
+    Replaces the near miss review layer of the graph, with a line for every near miss, if there are any
+
+    :param graph_group:
+    :param near_misses: As returned by snap_graph_endpoints
+    :return: The added layers, if any
+    """
+    return replace_review_layer(
+        f"{graph_group.name()} {GRAPH_NEAR_MISSES_DESCRIPTOR}",
+        geoms=[near_miss["geometry"] for near_miss in near_misses],
+        columns=[
+            {"level": near_miss["level"], "distance_m": near_miss["distance_m"]}
+            for near_miss in near_misses
+        ],
+        crs=f"EPSG:{MI_EPSG_NUMBER}",
+    )
@@ -11,6 +11,9 @@ from mi_companion.configuration import read_bool_setting
 from mi_companion.mi_editor.conversion.layers.from_hierarchy.common_attributes import (
     extract_single_level_str_map,
 )
+from mi_companion.mi_editor.conversion.layers.from_hierarchy.unchanged_layers import (
+    copy_unchanged_route_elements,
+)
 from mi_companion.mi_editor.conversion.projection import prepare_geom_for_mi_db_qgis
 from sync_module.model import Solution
 
@@ -37,6 +40,16 @@ def add_barriers(
     :param issues:
     :return:
     """
+    if copy_unchanged_route_elements(
+        barrier_layer_tree_node,
+        solution,
+        graph_key,
+        "barriers",
+        collect_invalid=collect_invalid,
+        issues=issues,
+    ):
+        return
+
     barriers_linestring_layer = barrier_layer_tree_node.layer()
     for barrier_feature in barriers_linestring_layer.getFeatures():
         barrier_attributes = extract_feature_attributes(barrier_feature)
@@ -14,6 +14,9 @@ from mi_companion.configuration import read_bool_setting
 from mi_companion.mi_editor.conversion.layers.from_hierarchy.common_attributes import (
     extract_single_level_str_map,
 )
+from mi_companion.mi_editor.conversion.layers.from_hierarchy.unchanged_layers import (
+    copy_unchanged_route_elements,
+)
 from mi_companion.mi_editor.conversion.projection import prepare_geom_for_mi_db_qgis
 from sync_module.model import Solution
 from sync_module.shared import MIDoorType
@@ -42,6 +45,16 @@ def add_doors(
     :param issues:
     :return:
     """
+    if copy_unchanged_route_elements(
+        door_layer_tree_node,
+        solution,
+        graph_key,
+        "doors",
+        collect_invalid=collect_invalid,
+        issues=issues,
+    ):
+        return
+
     doors_linestring_layer = door_layer_tree_node.layer()
     for door_feature in doors_linestring_layer.getFeatures():
         door_attributes = extract_feature_attributes(door_feature)
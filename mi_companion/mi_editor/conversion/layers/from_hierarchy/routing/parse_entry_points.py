@@ -9,6 +9,9 @@ from mi_companion import VERBOSE
 from mi_companion.mi_editor.conversion.layers.from_hierarchy.common_attributes import (
     extract_single_level_str_map,
 )
+from mi_companion.mi_editor.conversion.layers.from_hierarchy.unchanged_layers import (
+    copy_unchanged_route_elements,
+)
 from mi_companion.mi_editor.conversion.projection import prepare_geom_for_mi_db_qgis
 from sync_module.model import Solution
 from sync_module.shared import MIEntryPointType
@@ -36,6 +39,16 @@ def add_entry_points(
     :param issues:
     :return:
     """
+    if copy_unchanged_route_elements(
+        entry_point_layer_tree_node,
+        solution,
+        graph_key,
+        "entry_points",
+        collect_invalid=collect_invalid,
+        issues=issues,
+    ):
+        return
+
     entry_points_linestring_layer = entry_point_layer_tree_node.layer()
     for entry_point_feature in entry_points_linestring_layer.getFeatures():
         entry_point_attributes = extract_feature_attributes(entry_point_feature)
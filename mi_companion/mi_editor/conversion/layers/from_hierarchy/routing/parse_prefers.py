@@ -11,6 +11,9 @@ from mi_companion.configuration import read_bool_setting
 from mi_companion.mi_editor.conversion.layers.from_hierarchy.common_attributes import (
     extract_single_level_str_map,
 )
+from mi_companion.mi_editor.conversion.layers.from_hierarchy.unchanged_layers import (
+    copy_unchanged_route_elements,
+)
 from mi_companion.mi_editor.conversion.projection import prepare_geom_for_mi_db_qgis
 from sync_module.model import Solution
 
@@ -37,6 +40,16 @@ def add_prefers(
     :param issues:
     :return:
     """
+    if copy_unchanged_route_elements(
+        prefer_layer_tree_node,
+        solution,
+        graph_key,
+        "prefers",
+        collect_invalid=collect_invalid,
+        issues=issues,
+    ):
+        return
+
     prefers_linestring_layer = prefer_layer_tree_node.layer()
     for prefer_feature in prefers_linestring_layer.getFeatures():
         prefer_attributes = extract_feature_attributes(prefer_feature)
@@ -17,6 +17,7 @@ from qgis.core import QgsLayerTreeGroup, QgsLayerTreeLayer, QgsProject
 
 from jord.qgis_utilities import parse_q_value
 from mi_companion import UPLOAD_ERROR_CONFIRMATION_TITLE
+from mi_companion.configuration import PluginSettings, settings_snapshot
 from mi_companion.layer_descriptors import (
     DATABASE_GROUP_DESCRIPTOR,
     SOLUTION_DATA_DESCRIPTOR,
@@ -207,6 +208,7 @@ def layer_hierarchy_to_solution(
     solution_depth: SolutionDepth = SolutionDepth.obstacles,
     include_occupants: bool = False,
     include_media: bool = False,
+    settings: Optional[PluginSettings] = None,
 ) -> None:
     """
 
@@ -218,6 +220,7 @@ def layer_hierarchy_to_solution(
     :param include_occupants:
     :param include_media:
     :param include_graph:
+    :param settings: Pinned for the entire upload, the current snapshot if None
     :return:
     """
     if False:
@@ -251,11 +254,12 @@ def layer_hierarchy_to_solution(
     if progress_bar:
         progress_bar.setValue(10)
 
-    convert_solution_layers_to_solution(
-        qgis_instance_handle,
-        progress_bar=progress_bar,
-        mi_group=mi_group,
-        solution_depth=solution_depth,
-        include_occupants=include_occupants,
-        include_media=include_media,
-    )
+    with settings_snapshot(settings):
+        convert_solution_layers_to_solution(
+            qgis_instance_handle,
+            progress_bar=progress_bar,
+            mi_group=mi_group,
+            solution_depth=solution_depth,
+            include_occupants=include_occupants,
+            include_media=include_media,
+        )
@@ -0,0 +1,259 @@
+import copy
+import logging
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from mi_companion.mi_editor.hierarchy.change_tracking import unchanged_layer_snapshot
+from mi_companion.type_enums import BackendLocationTypeEnum
+from sync_module.model import Solution
+from .columnar import LayerColumns
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["copy_unchanged_locations", "copy_unchanged_route_elements"]
+
+LOCATION_COPY_SPECS: Dict[BackendLocationTypeEnum, Tuple[str, str]] = {
+    # backend location type: (collection name, add method)
+    BackendLocationTypeEnum.ROOM: ("rooms", "add_room"),
+    BackendLocationTypeEnum.AREA: ("areas", "add_area"),
+    BackendLocationTypeEnum.POI: ("points_of_interest", "add_point_of_interest"),
+}
+
+ROUTE_ELEMENT_COPY_SPECS: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {
+    # collection name: (add method, geometry keyword, additional keywords)
+    "doors": ("add_door", "linestring", ("door_type",)),
+    "avoids": ("add_avoid", "point", ()),
+    "barriers": ("add_barrier", "point", ()),
+    "prefers": ("add_prefer", "point", ()),
+    "obstacles": ("add_obstacle", "polygon", ()),
+    "entry_points": ("add_entry_point", "point", ("entry_point_type",)),
+}
+
+
+def unchanged_layer_originals(
+    layer_tree_layer: Any,
+    collection_name: str,
+    field_names: Sequence[str] = (),
+) -> Optional[Tuple[List[Any], LayerColumns]]:
+    """
+    The snapshot objects of the features of an unchanged layer, only the admin ids and the given fields of the layer
+    are read
+
+    :param layer_tree_layer:
+    :param collection_name:
+    :param field_names: Additional fields to read from the layer
+    :return: None if the layer has changed, was moved, was never tracked or has a feature that is not in the
+    snapshot, otherwise the snapshot objects and the read columns
+    """
+    layer = layer_tree_layer.layer()
+
+    snapshot = unchanged_layer_snapshot(layer, layer_tree_layer)
+    if snapshot is None:
+        return None
+
+    layer_columns = LayerColumns(layer, ("admin_id", *field_names), with_geometry=False)
+    admin_ids = layer_columns.column("admin_id")
+    if admin_ids is None or any(name not in layer_columns for name in field_names):
+        return None
+
+    originals = snapshot.by_admin_id(collection_name)
+
+    if any(admin_id not in originals for admin_id in admin_ids):
+        return None
+
+    return [originals[admin_id] for admin_id in admin_ids], layer_columns
+
+
+def _key_or_none(item: Any) -> Optional[str]:
+    return item.key if item is not None else None
+
+
+def location_copy_kwargs(
+    location: Any, floor_key: str, backend_location_type: BackendLocationTypeEnum
+) -> Dict[str, Any]:
+    """
+    The keyword arguments that add the location of a snapshot to another solution, on the given floor. Mutable
+    attributes are deep copied, so the solutions do not share them.
+
+    :param location:
+    :param floor_key:
+    :param backend_location_type:
+    :return:
+    """
+    kwargs = dict(
+        admin_id=location.admin_id,
+        external_id=location.external_id,
+        floor_key=floor_key,
+        is_active=location.is_active,
+        is_searchable=location.is_searchable,
+        location_type_key=_key_or_none(location.location_type),
+        translations=copy.deepcopy(location.translations),
+        display_rule=copy.deepcopy(location.display_rule),
+        media_key=location.media_key,
+        restrictions=copy.deepcopy(location.restrictions),
+        is_selectable=location.is_selectable,
+        settings_3d_margin=location.settings_3d_margin,
+        settings_3d_width=location.settings_3d_width,
+        active_from=location.active_from,
+        active_to=location.active_to,
+        street_view_config=copy.deepcopy(location.street_view_config),
+        category_keys=copy.deepcopy(location.category_keys),
+        details=copy.deepcopy(location.details),
+    )
+
+    if backend_location_type == BackendLocationTypeEnum.POI:
+        kwargs["point"] = location.point
+    else:
+        kwargs["polygon"] = location.polygon
+        kwargs["anchor"] = location.anchor
+
+        if backend_location_type == BackendLocationTypeEnum.AREA:
+            kwargs["is_obstacle"] = location.is_obstacle
+
+    return kwargs
+
+
+def _add_copies(
+    add_method: Any,
+    copy_kwargs: Sequence[Mapping[str, Any]],
+    description: str,
+    collect_invalid: bool,
+    issues: Optional[List[str]],
+) -> None:
+    for kwargs in copy_kwargs:
+        try:
+            add_method(**kwargs)
+        except Exception as e:
+            _invalid = f"Invalid {description}: {e}"
+            logger.error(_invalid)
+            if collect_invalid:
+                issues.append(_invalid)
+            else:
+                raise e
+
+
+def copy_unchanged_locations(
+    location_group_item: Any,
+    solution: Solution,
+    floor_key: str,
+    backend_location_type: BackendLocationTypeEnum,
+    collect_invalid: bool = False,
+    issues: Optional[List[str]] = None,
+) -> bool:
+    """
+    Adds the locations of an unchanged location layer from the snapshot it was populated from,
+    instead of extracting and reprojecting every feature of the layer.
+
+    :param location_group_item:
+    :param solution:
+    :param floor_key:
+    :param backend_location_type:
+    :param collect_invalid:
+    :param issues:
+    :return: False if the layer has to be extracted, nothing has been added to the solution then
+    """
+    collection_name, add_method_name = LOCATION_COPY_SPECS[backend_location_type]
+
+    originals = unchanged_layer_originals(location_group_item, collection_name)
+    if originals is None:
+        return False
+
+    locations, _ = originals
+
+    try:
+        copy_kwargs = [
+            location_copy_kwargs(location, floor_key, backend_location_type)
+            for location in locations
+        ]
+    except AttributeError as e:
+        logger.warning(f"Could not copy unchanged locations, extracting them: {e}")
+        return False
+
+    for kwargs in copy_kwargs:
+        if (
+            kwargs["location_type_key"] is None
+            or solution.location_types.get(kwargs["location_type_key"]) is None
+            or any(
+                solution.categories.get(category_key) is None
+                for category_key in (kwargs["category_keys"] or ())
+            )
+        ):  # Creating location types and categories is left to the extraction
+            return False
+
+    _add_copies(
+        getattr(solution, add_method_name),
+        copy_kwargs,
+        "location",
+        collect_invalid,
+        issues,
+    )
+
+    logger.info(
+        f"Copied {len(copy_kwargs)} unchanged locations of {location_group_item.name()}"
+    )
+
+    return True
+
+
+def copy_unchanged_route_elements(
+    route_element_layer_tree_node: Any,
+    solution: Solution,
+    graph_key: str,
+    collection_name: str,
+    collect_invalid: bool = False,
+    issues: Optional[List[str]] = None,
+) -> bool:
+    """
+    Adds the route elements of an unchanged route element layer from the snapshot it was populated from. The floor
+    index is read from the layer, like the extraction does, not taken from the snapshot.
+
+    :param route_element_layer_tree_node:
+    :param solution:
+    :param graph_key:
+    :param collection_name: One of ROUTE_ELEMENT_COPY_SPECS
+    :param collect_invalid:
+    :param issues:
+    :return: False if the layer has to be extracted, nothing has been added to the solution then
+    """
+    originals = unchanged_layer_originals(
+        route_element_layer_tree_node, collection_name, ("floor_index",)
+    )
+    if originals is None:
+        return False
+
+    route_elements, layer_columns = originals
+    floor_indices = layer_columns["floor_index"]
+
+    add_method_name, geometry_keyword, additional_keywords = ROUTE_ELEMENT_COPY_SPECS[
+        collection_name
+    ]
+
+    try:
+        copy_kwargs = [
+            {
+                "admin_id": route_element.admin_id,
+                geometry_keyword: getattr(route_element, geometry_keyword),
+                "floor_index": int(floor_index),
+                "graph_key": graph_key,
+                "fields": copy.deepcopy(route_element.fields),
+                **{
+                    keyword: getattr(route_element, keyword)
+                    for keyword in additional_keywords
+                },
+            }
+            for route_element, floor_index in zip(route_elements, floor_indices)
+        ]
+    except (AttributeError, TypeError, ValueError) as e:
+        logger.warning(
+            f"Could not copy unchanged {collection_name}, extracting them: {e}"
+        )
+        return False
+
+    _add_copies(
+        getattr(solution, add_method_name),
+        copy_kwargs,
+        collection_name,
+        collect_invalid,
+        issues,
+    )
+
+    return True
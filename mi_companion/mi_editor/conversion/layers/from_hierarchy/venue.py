@@ -1,4 +1,3 @@
-import copy
 import logging
 from datetime import datetime
 from typing import Any, Callable, Collection, List, Mapping, Optional
@@ -19,6 +18,7 @@ from mi_companion.layer_descriptors import (
     VENUE_GROUP_DESCRIPTOR,
     VENUE_POLYGON_DESCRIPTOR,
 )
+from mi_companion.mi_editor.hierarchy.change_tracking import has_changed_layers
 from mi_companion.mi_editor.hierarchy.validation_dialog_utilities import (
     make_hierarchy_validation_dialog,
 )
@@ -84,7 +84,7 @@ def convert_solution_venues(
     :param solution_default_language:
     :param qgis_instance_handle:
     :param mi_group_child:
-    :param existing_solution:
+    :param existing_solution: Solution without venues to fill in, it is modified in place
     :param progress_bar:
     :param solution_external_id:
     :param solution_name:
@@ -108,6 +108,7 @@ def convert_solution_venues(
     num_solution_group_elements = len(solution_group_children)
     solutions = []
     venue_key = None
+    changed_keys = set()
 
     if existing_solution is None:
         solution = Solution(
@@ -115,8 +116,8 @@ def convert_solution_venues(
             _name=solution_name,
             _customer_id=solution_customer_id,
         )
-    else:
-        solution = copy.deepcopy(existing_solution)
+    else:  # The existing solution is fetched for this upload alone, so it is filled in place instead of deep copied
+        solution = existing_solution
 
     solution.name = solution_name
     solution.customer_id = solution_customer_id
@@ -174,6 +175,10 @@ def convert_solution_venues(
                     raise Exception("Upload cancelled")
 
                 continue
+
+            if has_changed_layers(solution_group_item):
+                changed_keys.add(venue_key)
+
             try:
                 add_venue_level_hierarchy(
                     ith_solution=ith_solution,
@@ -184,6 +189,7 @@ def convert_solution_venues(
                     solution=solution,
                     solution_group_item=solution_group_item,
                     venue_key=venue_key,
+                    changed_keys=changed_keys,
                     issues=issues,
                     collect_invalid=collect_invalid,
                     collect_warnings=collect_warnings,
@@ -208,6 +214,7 @@ def convert_solution_venues(
             solution_name=solution_name,
             upload_venues=upload_venues,
             venue_key=venue_key,
+            changed_keys=changed_keys,
         )
 
         solutions.append(solution)
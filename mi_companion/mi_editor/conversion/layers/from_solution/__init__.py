@@ -1,6 +1,9 @@
 from .building import *
+from .download_task import *
 from .floor import *
 from .location import *
+from .location_frames import *
 from .routing import *
 from .solution import *
+from .solution_snapshots import *
 from .venue import *
@@ -21,18 +21,17 @@ from mi_companion.layer_descriptors import (
     BUILDING_GROUP_DESCRIPTOR,
     BUILDING_POLYGON_DESCRIPTOR,
 )
-from mi_companion.mi_editor.conversion.projection import (
-    prepare_geom_for_editing_qgis,
-    solve_target_crs_authid,
-)
+from mi_companion.mi_editor.conversion.projection import solve_target_crs_authid
 from mi_companion.qgis_utilities import (
+    FieldConfigTemplate,
     auto_center_anchors_when_outside,
 )
 from sync_module.mi import get_outside_building_admin_id
 from sync_module.model import Building, Solution, Venue
 from sync_module.tools import translations_to_flattened_dict
 from .floor import add_floor_layers
-from ...styling import add_rotation_scale_geometry_generator
+from .location_frames import FloorLocationFrames
+from ...styling import LocationLayerStyling, add_rotation_scale_geometry_generator
 
 __all__ = ["add_building_layers"]
 
@@ -50,7 +49,13 @@ def add_building_layers(
     location_type_dropdown_widget: Optional[Any] = None,
     occupant_dropdown_widget: Optional[Any] = None,
     progress_bar: Optional[Callable] = None,
+    location_frames: Optional[FloorLocationFrames] = None,
+    location_field_config: Optional[FieldConfigTemplate] = None,
+    location_styling: Optional[LocationLayerStyling] = None,
 ) -> None:
+    if location_frames is None:
+        location_frames = FloorLocationFrames()
+
     num_buildings = float(len(solution.buildings))
 
     for ith, building in enumerate(
@@ -65,8 +70,11 @@ def add_building_layers(
     ):
         building: Building
 
+        building_progress_start = 20 + (float(ith) / num_buildings) * 80
+        building_progress_span = 80 / num_buildings
+
         if progress_bar:
-            progress_bar.setValue(int(20 + (float(ith) / num_buildings) * 80))
+            progress_bar.setValue(int(building_progress_start))
 
         is_outside_building = (
             get_outside_building_admin_id(venue.admin_id) == building.admin_id
@@ -86,6 +94,12 @@ def add_building_layers(
                 qgis_instance_handle=qgis_instance_handle,
                 solution=solution,
                 visible=floor_poly_layer_should_be_visible,
+                location_frames=location_frames,
+                location_field_config=location_field_config,
+                location_styling=location_styling,
+                progress_bar=progress_bar,
+                progress_start=building_progress_start,
+                progress_span=building_progress_span,
             )
 
         elif building.venue.key == venue.key:
@@ -111,7 +125,7 @@ def add_building_layers(
             building_group.setExpanded(False)
 
             anchor_fields = {}
-            anch = prepare_geom_for_editing_qgis(building.anchor)
+            anch = location_frames.editing_geometry(building.anchor)
             if ANCHOR_AS_INDIVIDUAL_FIELDS:
                 anchor_fields["anchor_x"] = anch.x
                 anchor_fields["anchor_y"] = anch.y
@@ -120,7 +134,7 @@ def add_building_layers(
 
             building_layer = add_shapely_layer(
                 qgis_instance_handle=qgis_instance_handle,
-                geoms=[prepare_geom_for_editing_qgis(building.polygon)],
+                geoms=[location_frames.editing_geometry(building.polygon)],
                 name=BUILDING_POLYGON_DESCRIPTOR,
                 columns=[
                     {
@@ -154,6 +168,12 @@ def add_building_layers(
                 qgis_instance_handle=qgis_instance_handle,
                 solution=solution,
                 visible=floor_poly_layer_should_be_visible,
+                location_frames=location_frames,
+                location_field_config=location_field_config,
+                location_styling=location_styling,
+                progress_bar=progress_bar,
+                progress_start=building_progress_start,
+                progress_span=building_progress_span,
             )
         else:
             ...
@@ -0,0 +1,179 @@
+import logging
+from typing import Any, Callable, Optional
+
+# noinspection PyUnresolvedReferences
+from qgis.PyQt.QtCore import QTimer
+
+# noinspection PyUnresolvedReferences
+from qgis.core import QgsApplication, QgsTask
+
+from mi_companion.configuration import (
+    PluginSettings,
+    read_settings_snapshot,
+    settings_snapshot,
+)
+from mi_companion.mi_editor.conversion.projection import get_target_crs_auth_id
+from mi_companion.qgis_utilities.exceptions import DownloadCancelled
+from sync_module.mi import SolutionDepth
+from sync_module.model import Solution
+from .location_frames import FloorLocationFrames
+from .solution_snapshots import (
+    SolutionSnapshotKey,
+    SolutionSnapshotStore,
+    load_or_fetch_solution,
+    refresh_snapshot_in_background,
+)
+
+__all__ = ["VenueDownloadTask", "CancellableProgressBar"]
+
+logger = logging.getLogger(__name__)
+
+
+class CancellableProgressBar:
+    """
+    Wraps a progress bar for the main thread stage of a download.
+
+    Every progress update lets Qt process pending events, so the interface stays responsive
+    and a cancel request can be observed, in which case DownloadCancelled is raised.
+    """
+
+    def __init__(self, progress_bar: Any, is_cancelled: Callable[[], bool]):
+        self._progress_bar = progress_bar
+        self._is_cancelled = is_cancelled
+
+    def setValue(self, value: int) -> None:
+        if self._progress_bar:
+            self._progress_bar.setValue(value)
+
+        QgsApplication.processEvents()
+
+        if self._is_cancelled():
+            raise DownloadCancelled()
+
+    def value(self) -> int:
+        if self._progress_bar:
+            return self._progress_bar.value()
+        return 0
+
+
+class VenueDownloadTask(QgsTask):
+    """
+    Fetches a venue and prepares its location frames off the main thread.
+
+    run() never touches the layer tree or any widget, the layers are inserted on the main thread from
+    on_prepared, which is called with the solution and its prepared FloorLocationFrames.
+    The locations are reprojected and the venue, graph boundary, building and floor geometries are prepared for
+    editing in run(), only the route elements and the graph network are still prepared on the main thread, while
+    their layers are inserted.
+    If the task is cancelled or fails, on_failed is called instead and the fetched solution is discarded.
+
+    With a snapshot_store, a stored snapshot of the venue is used instead of fetching it, and is then refreshed in
+    the background, on_snapshot_refreshed is called with whether it was stale.
+
+    run() pins the settings the task was created with, the settings pinned on the main thread do not reach it.
+    """
+
+    def __init__(
+        self,
+        solution_external_id: str,
+        venue_external_id: str,
+        *,
+        on_prepared: Callable[[Solution, FloorLocationFrames], None],
+        on_failed: Callable[[Optional[Exception]], None],
+        include_occupants: bool = True,
+        include_media: bool = False,
+        depth: SolutionDepth = SolutionDepth.occupants,
+        snapshot_store: Optional[SolutionSnapshotStore] = None,
+        on_snapshot_refreshed: Optional[Callable[[bool], None]] = None,
+        settings: Optional[PluginSettings] = None,
+    ):
+        super().__init__(f"Downloading {venue_external_id}", QgsTask.CanCancel)
+
+        self.solution_external_id = solution_external_id
+        self.venue_external_id = venue_external_id
+        self.include_occupants = include_occupants
+        self.include_media = include_media
+        self.depth = depth
+
+        self.on_prepared = on_prepared
+        self.on_failed = on_failed
+
+        self.snapshot_store = snapshot_store
+        self.on_snapshot_refreshed = on_snapshot_refreshed
+        self.from_snapshot = False
+
+        if settings is None:
+            settings = read_settings_snapshot()  # Read on the main thread
+        self.settings = settings
+
+        with settings_snapshot(self.settings):
+            get_target_crs_auth_id()  # Caches the project crs, run() must not read the QgsProject
+
+        self.solution: Optional[Solution] = None
+        self.location_frames: Optional[FloorLocationFrames] = None
+        self.exception: Optional[Exception] = None
+
+    def run(self) -> bool:
+        try:
+            with settings_snapshot(self.settings):
+                self.setProgress(0)
+
+                # NOTE: The request itself can not be interrupted, a cancel is observed once it returns
+                solution, self.from_snapshot = load_or_fetch_solution(
+                    self.snapshot_key, self.snapshot_store
+                )
+
+                if self.isCanceled():
+                    return False
+
+                self.setProgress(50)
+
+                location_frames = FloorLocationFrames().prepare(solution)
+
+                if self.isCanceled():
+                    return False
+
+                self.setProgress(100)
+
+                self.solution = solution
+                self.location_frames = location_frames
+
+                return True
+
+        except Exception as e:
+            self.exception = e
+            return False
+
+    @property
+    def snapshot_key(self) -> SolutionSnapshotKey:
+        return SolutionSnapshotKey(
+            self.solution_external_id,
+            self.venue_external_id,
+            depth=self.depth,
+            include_occupants=self.include_occupants,
+            include_media=self.include_media,
+        )
+
+    def finished(self, result: bool) -> None:
+        if result and not self.isCanceled():
+            solution, location_frames = self.solution, self.location_frames
+
+            if self.from_snapshot:
+                refresh_snapshot_in_background(
+                    self.snapshot_store, self.snapshot_key, self.on_snapshot_refreshed
+                )
+
+            QTimer.singleShot(
+                0, lambda: self.on_prepared(solution, location_frames)
+            )  # Leave the task manager slot before inserting layers
+        else:
+            if self.exception is not None:
+                logger.error(
+                    f"Download of {self.venue_external_id} failed: {self.exception}"
+                )
+
+            exception = self.exception
+            QTimer.singleShot(0, lambda: self.on_failed(exception))
+
+        self.solution = None
+        self.location_frames = None
@@ -0,0 +1,110 @@
+from typing import Any, Optional, Sequence
+
+from jord.qgis_utilities.helpers.widgets import COLOR_WIDGET, HIDDEN_WIDGET
+from mi_companion.mi_editor.conversion.layers.from_solution.location_fields import (
+    COLOR_LOCATION_FIELDS,
+    NOT_NULL_FIELDS,
+    RANGE_LOCATION_FIELDS,
+    REUSE_LAST_FIELDS,
+)
+from mi_companion.mi_editor.conversion.styling import (
+    FILL_COLOR_DEFAULT_EXPRESSION,
+    FILL_COLOR_FIELD_NAME,
+)
+from mi_companion.qgis_utilities import (
+    FieldConfigTemplate,
+    add_anchor_centering_config,
+)
+
+__all__ = [
+    "location_field_config_template",
+    "route_element_field_config_template",
+]
+
+
+def location_field_config_template(
+    *,
+    location_type_dropdown_widget: Optional[Any] = None,
+    occupant_dropdown_widget: Optional[Any] = None,
+) -> FieldConfigTemplate:
+    """
+    The field configuration of room, area and POI layers. Build once per venue, as the occupant dropdown refers to
+    the occupant layer of the venue.
+
+    :param location_type_dropdown_widget:
+    :param occupant_dropdown_widget:
+    :return:
+    """
+    template = FieldConfigTemplate()
+
+    if location_type_dropdown_widget:
+        template.set_widget("location_type", location_type_dropdown_widget)
+
+    if occupant_dropdown_widget:
+        template.set_widget("occupant", occupant_dropdown_widget)
+
+    template.make_unique("admin_id")
+
+    add_anchor_centering_config(template)
+
+    for field_name in NOT_NULL_FIELDS:
+        template.make_not_null(field_name)
+
+    for field_name, field_default in {"is_searchable": True, "is_active": True}.items():
+        template.set_default(field_name, f"'{field_default}'")
+        template.make_boolean(field_name, nullable=False)
+
+    for field_name, field_widget in RANGE_LOCATION_FIELDS.items():
+        template.set_widget(field_name, field_widget)
+
+    for field_name in COLOR_LOCATION_FIELDS:
+        template.set_widget(field_name, COLOR_WIDGET)
+
+    template.set_widget(FILL_COLOR_FIELD_NAME, HIDDEN_WIDGET)
+    template.set_default(
+        FILL_COLOR_FIELD_NAME, FILL_COLOR_DEFAULT_EXPRESSION, apply_on_update=True
+    )  # Derived from the fill colour and opacity, follows their edits
+
+    for field_name in REUSE_LAST_FIELDS:
+        template.reuse_last_entered_value(field_name)
+
+    for field_name in ("is_selectable", "is_obstacle"):
+        template.make_boolean(field_name, nullable=True)
+        template.set_default(field_name, "null")
+
+    return template
+
+
+def route_element_field_config_template(
+    *,
+    not_null_fields: Sequence[str] = ("floor_index",),
+    reuse_last_fields: Sequence[str] = ("floor_index",),
+    dropdown_widget: Optional[Any] = None,
+    route_element_type_column: Optional[str] = None,
+) -> FieldConfigTemplate:
+    """
+    The field configuration of door, avoid, prefer, barrier, entry point, obstacle and connector layers
+
+    :param not_null_fields:
+    :param reuse_last_fields:
+    :param dropdown_widget: Widget of the route element type column
+    :param route_element_type_column: Also reuses its last entered value
+    :return:
+    """
+    template = FieldConfigTemplate()
+
+    for field_name in not_null_fields:
+        template.make_not_null(field_name)
+
+    for field_name in reuse_last_fields:
+        template.reuse_last_entered_value(field_name)
+
+    template.make_unique("admin_id")
+
+    if route_element_type_column is not None:
+        template.reuse_last_entered_value(route_element_type_column)
+
+        if dropdown_widget is not None:
+            template.set_widget(route_element_type_column, dropdown_widget)
+
+    return template
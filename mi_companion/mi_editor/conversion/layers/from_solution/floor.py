@@ -1,5 +1,5 @@
 import logging
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
 from jord.qgis_utilities import (
     Qgis3dCullingMode,
@@ -24,16 +24,16 @@ from mi_companion.layer_descriptors import (
     FLOOR_GROUP_DESCRIPTOR,
     FLOOR_POLYGON_DESCRIPTOR,
 )
-from mi_companion.mi_editor.conversion.projection import (
-    prepare_geom_for_editing_qgis,
-    solve_target_crs_authid,
-)
+from mi_companion.mi_editor.conversion.projection import solve_target_crs_authid
 from mi_companion.qgis_utilities import (
+    FieldConfigTemplate,
     auto_center_anchors_when_outside,
 )
 from sync_module.model import Building, Floor, Solution
 from sync_module.tools import translations_to_flattened_dict
 from .location import add_floor_content_layers
+from .location_frames import FloorLocationFrames
+from ...styling import LocationLayerStyling
 
 logger = logging.getLogger(__name__)
 
@@ -50,118 +50,140 @@ def add_floor_layers(
     qgis_instance_handle: Any,
     solution: Solution,
     visible: bool = True,
+    location_frames: Optional[FloorLocationFrames] = None,
+    location_field_config: Optional[FieldConfigTemplate] = None,
+    location_styling: Optional[LocationLayerStyling] = None,
+    progress_bar: Optional[Callable] = None,
+    progress_start: float = 0.0,
+    progress_span: float = 0.0,
     # add_floor_polygon_geometry: bool = True,
 ) -> None:
+    if location_frames is None:
+        location_frames = FloorLocationFrames()
+
+    building_floors = [
+        floor
+        for floor in sorted(solution.floors, key=lambda floor: floor.floor_index)
+        if floor.building.key == building.key
+    ]
+    num_floors = float(len(building_floors))
+
     building_bottom_floor_tracker = {}
-    for floor in sorted(solution.floors, key=lambda floor: floor.floor_index):
+    for ith_floor, floor in enumerate(building_floors):
         floor: Floor
-        if floor.building.key == building.key:
-            descriptor = f"{FLOOR_GROUP_DESCRIPTOR}:{floor.floor_index}"
+        # Also gives a cancellable download a chance to stop between floors
+        if progress_bar:
+            progress_bar.setValue(
+                int(progress_start + (ith_floor / num_floors) * progress_span)
+            )
+
+        descriptor = f"{FLOOR_GROUP_DESCRIPTOR}:{floor.floor_index}"
+
+        if (
+            solution.default_language in floor.translations
+        ):  # SPECIAL CASE HANDLING FOR OUTSIDE BUILDING
+            floor_name__ = floor.translations[solution.default_language].name
+        else:
+            floor_name__ = floor.translations["en"].name
+
+        if DESCRIPTOR_BEFORE:
+            floor_name = f"{descriptor} {floor_name__}"
+        else:
+            floor_name = f"{floor_name__} {descriptor}"
+
+        floor_group = building_group.insertGroup(
+            INSERT_INDEX, floor_name
+        )  # MutuallyExclusive = True # TODO: Maybe only show on floor at a time?
 
+        floor_group.setExpanded(True)
+        floor_group.setExpanded(False)
+
+        if read_bool_setting(
+            "ONLY_SHOW_FIRST_FLOOR"
+        ):  # Only make first floor of building visible
             if (
-                solution.default_language in floor.translations
-            ):  # SPECIAL CASE HANDLING FOR OUTSIDE BUILDING
-                floor_name__ = floor.translations[solution.default_language].name
+                building_group.name in building_bottom_floor_tracker
+            ):  # TODO: IMPLEMENT PROPER COMPARISON
+                building_group.findGroup(floor_name).setItemVisibilityChecked(False)
             else:
-                floor_name__ = floor.translations["en"].name
+                building_bottom_floor_tracker[building_group.name] = floor.floor_index
 
-            if DESCRIPTOR_BEFORE:
-                floor_name = f"{descriptor} {floor_name__}"
-            else:
-                floor_name = f"{floor_name__} {descriptor}"
-
-            floor_group = building_group.insertGroup(
-                INSERT_INDEX, floor_name
-            )  # MutuallyExclusive = True # TODO: Maybe only show on floor at a time?
-
-            floor_group.setExpanded(True)
-            floor_group.setExpanded(False)
-
-            if read_bool_setting(
-                "ONLY_SHOW_FIRST_FLOOR"
-            ):  # Only make first floor of building visible
-                if (
-                    building_group.name in building_bottom_floor_tracker
-                ):  # TODO: IMPLEMENT PROPER COMPARISON
-                    building_group.findGroup(floor_name).setItemVisibilityChecked(False)
-                else:
-                    building_bottom_floor_tracker[building_group.name] = (
-                        floor.floor_index
-                    )
-
-            floor_layer = None
-
-            anchor_fields = {}
-            anch = prepare_geom_for_editing_qgis(floor.anchor)
-            if ANCHOR_AS_INDIVIDUAL_FIELDS:
-                anchor_fields["anchor_x"] = anch.x
-                anchor_fields["anchor_y"] = anch.y
+        floor_layer = None
 
-            else:
-                anchor_fields["anchor"] = anch
-
-            if INSERT_INDEX == 0:
-                floor_layer = add_shapely_layer(
-                    qgis_instance_handle=qgis_instance_handle,
-                    geoms=[prepare_geom_for_editing_qgis(floor.polygon)],
-                    name=FLOOR_POLYGON_DESCRIPTOR,
-                    columns=[
-                        {
-                            "external_id": floor.external_id,
-                            "floor_index": floor.floor_index,
-                            **anchor_fields,
-                            **translations_to_flattened_dict(floor.translations),
-                        }
-                    ],
-                    group=floor_group,
-                    visible=visible,
-                    crs=solve_target_crs_authid(),
-                )
-
-            add_floor_content_layers(
-                qgis_instance_handle=qgis_instance_handle,
-                solution=solution,
-                floor=floor,
-                floor_group=floor_group,
-                location_type_ref_layer=location_type_ref_layer,
-                location_type_dropdown_widget=location_type_dropdown_widget,
-                occupant_dropdown_widget=occupant_dropdown_widget,
-            )
+        anchor_fields = {}
+        anch = location_frames.editing_geometry(floor.anchor)
+        if ANCHOR_AS_INDIVIDUAL_FIELDS:
+            anchor_fields["anchor_x"] = anch.x
+            anchor_fields["anchor_y"] = anch.y
+
+        else:
+            anchor_fields["anchor"] = anch
 
-            if INSERT_INDEX > 0:
-                floor_layer = add_shapely_layer(
-                    qgis_instance_handle=qgis_instance_handle,
-                    geoms=[prepare_geom_for_editing_qgis(floor.polygon)],
-                    name=FLOOR_POLYGON_DESCRIPTOR,
-                    columns=[
-                        {
-                            "external_id": floor.external_id,
-                            "floor_index": floor.floor_index,
-                            "anchor": prepare_geom_for_editing_qgis(floor.anchor),
-                            **translations_to_flattened_dict(floor.translations),
-                        }
-                    ],
-                    group=floor_group,
-                    visible=visible,
-                    crs=solve_target_crs_authid(),
-                )
-
-            assert floor_layer is not None
-            make_field_unique(floor_layer, field_name="admin_id")
-            set_3d_view_settings(
-                floor_layer,
-                offset=(FLOOR_VERTICAL_SPACING + FLOOR_HEIGHT) * floor.floor_index,
-                extrusion=FLOOR_VERTICAL_SPACING,
-                facades=Qgis3dFacade.walls_and_roofs,
-                culling_mode=Qgis3dCullingMode.no_culling,
-                color=(111, 111, 111),
+        if INSERT_INDEX == 0:
+            floor_layer = add_shapely_layer(
+                qgis_instance_handle=qgis_instance_handle,
+                geoms=[location_frames.editing_geometry(floor.polygon)],
+                name=FLOOR_POLYGON_DESCRIPTOR,
+                columns=[
+                    {
+                        "external_id": floor.external_id,
+                        "floor_index": floor.floor_index,
+                        **anchor_fields,
+                        **translations_to_flattened_dict(floor.translations),
+                    }
+                ],
+                group=floor_group,
+                visible=visible,
+                crs=solve_target_crs_authid(),
             )
-            set_geometry_constraints(floor_layer)
-            # TODO: Use SolutionItem Annotations for field constraints
 
-            set_layer_rendering_scale(
-                floor_layer,
-                min_ratio=read_float_setting("LAYER_GEOM_VISIBLE_MIN_RATIO"),
+        add_floor_content_layers(
+            qgis_instance_handle=qgis_instance_handle,
+            solution=solution,
+            floor=floor,
+            floor_group=floor_group,
+            location_type_ref_layer=location_type_ref_layer,
+            location_type_dropdown_widget=location_type_dropdown_widget,
+            occupant_dropdown_widget=occupant_dropdown_widget,
+            location_frames=location_frames,
+            location_field_config=location_field_config,
+            location_styling=location_styling,
+        )
+
+        if INSERT_INDEX > 0:
+            floor_layer = add_shapely_layer(
+                qgis_instance_handle=qgis_instance_handle,
+                geoms=[location_frames.editing_geometry(floor.polygon)],
+                name=FLOOR_POLYGON_DESCRIPTOR,
+                columns=[
+                    {
+                        "external_id": floor.external_id,
+                        "floor_index": floor.floor_index,
+                        "anchor": location_frames.editing_geometry(floor.anchor),
+                        **translations_to_flattened_dict(floor.translations),
+                    }
+                ],
+                group=floor_group,
+                visible=visible,
+                crs=solve_target_crs_authid(),
             )
 
-            auto_center_anchors_when_outside(floor_layer)
+        assert floor_layer is not None
+        make_field_unique(floor_layer, field_name="admin_id")
+        set_3d_view_settings(
+            floor_layer,
+            offset=(FLOOR_VERTICAL_SPACING + FLOOR_HEIGHT) * floor.floor_index,
+            extrusion=FLOOR_VERTICAL_SPACING,
+            facades=Qgis3dFacade.walls_and_roofs,
+            culling_mode=Qgis3dCullingMode.no_culling,
+            color=(111, 111, 111),
+        )
+        set_geometry_constraints(floor_layer)
+        # TODO: Use SolutionItem Annotations for field constraints
+
+        set_layer_rendering_scale(
+            floor_layer,
+            min_ratio=read_float_setting("LAYER_GEOM_VISIBLE_MIN_RATIO"),
+        )
+
+        auto_center_anchors_when_outside(floor_layer)
@@ -12,56 +12,43 @@ from qgis.core import QgsEditorWidgetSetup
 
 from jord.qgis_utilities import (
     make_field_boolean,
-    make_field_default,
-    make_field_not_null,
-    make_field_reuse_last_entered_value,
-    make_field_unique,
-    set_3d_view_settings,
-    set_field_widget,
     set_geometry_constraints,
-    set_label_styling,
     set_layer_rendering_scale,
-    styled_field_value_categorised,
 )
-from jord.qgis_utilities.helpers.widgets import COLOR_WIDGET
 from jord.qlive_utilities import add_dataframe_layer
 from mi_companion.configuration import read_bool_setting, read_float_setting
 from mi_companion.constants import (
     ANCHOR_AS_INDIVIDUAL_FIELDS,
     FLOOR_HEIGHT,
     FLOOR_VERTICAL_SPACING,
-    USE_EXTERNAL_ID_FLOOR_SELECTION,
+)
+from mi_companion.mi_editor.conversion.layers.from_solution.field_config_templates import (
+    location_field_config_template,
+)
+from mi_companion.mi_editor.conversion.layers.from_solution.location_frames import (
+    FloorLocationFrames,
 )
 from mi_companion.mi_editor.conversion.layers.from_solution.location_fields import (
     BOOLEAN_LOCATION_FIELDS,
-    COLOR_LOCATION_FIELDS,
     DATETIME_LOCATION_FIELDS,
     FLOAT_LOCATION_FIELDS,
     INT_LOCATION_FIELDS,
     LocationGeometryType,
-    NOT_NULL_FIELDS,
-    RANGE_LOCATION_FIELDS,
-    REUSE_LAST_FIELDS,
     STR_LOCATION_FIELDS,
 )
 from mi_companion.mi_editor.conversion.projection import (
-    forward_project_qgis,
-    reproject_geometry_df_qgis,
-    should_reproject_qgis,
     solve_target_crs_authid,
 )
 from mi_companion.mi_editor.conversion.styling import (
-    add_raster_symbol,
-    add_svg_symbol,
+    FILL_COLOR_FIELD_NAME,
+    LocationLayerStyling,
     apply_display_rule_styling_categorized,
+    display_rule_fill_color_column,
 )
-from mi_companion.qgis_utilities import (
-    auto_center_anchors_when_outside,
-)
+from mi_companion.qgis_utilities import FieldConfigTemplate
 from mi_companion.type_enums import BackendLocationTypeEnum
 from sync_module.model import CollectionMixin, Floor, Solution
-from sync_module.pandas_utilities import locations_to_df
-from sync_module.tools import collection_to_df, process_nested_fields_df
+from sync_module.tools import process_nested_fields_df
 
 try:
     from enum import StrEnum
@@ -86,10 +73,16 @@ def add_location_layer(
     location_type_dropdown_widget: Optional[Any] = None,
     occupant_dropdown_widget: Optional[Any] = None,
     opacity: float = 1.0,
+    location_frames: Optional[FloorLocationFrames] = None,
+    location_field_config: Optional[FieldConfigTemplate] = None,
+    location_styling: Optional[LocationLayerStyling] = None,
 ) -> Optional[List[Any]]:  # QgsVectorLayer
     """
     Add a location layer to QGIS with optional 3D model orientation indicators.
 
+    :param location_frames: Per download floor partitioned location frames, built if not provided
+    :param location_field_config: Field configuration applied to the added layers, built from the dropdown widgets if not provided
+    :param location_styling: Styling the added layers are categorised with, built from the reference layer if not provided
     :param location_type_ref_layer:
     :param location_collection:
     :param name:
@@ -104,47 +97,22 @@ def add_location_layer(
     :return:
     """
 
-    shape_df = locations_to_df(location_collection)
+    if location_frames is None:
+        location_frames = FloorLocationFrames()
 
-    assert len(location_collection) == len(shape_df)
-    if shape_df.empty:
-        logger.info(f"{name=} {shape_df=} was empty!")
+    if location_frames.frame(location_collection).empty:
+        logger.info(f"{name=} was empty!")
 
         return
 
-    # logger.info(f"adding {name=} with {len(collection_)} elements")
-
-    if USE_EXTERNAL_ID_FLOOR_SELECTION:  # OLD WAY
-        floor_selection = shape_df["floor.external_id"] == floor.external_id
-    else:
-        floor_selection = (shape_df["floor.floor_index"] == floor.floor_index) & (
-            shape_df["floor.building.admin_id"] == floor.building.admin_id
-        )  # TODO: USE Floor.compute_key instead
-
-    shape_df = shape_df[floor_selection]
+    shape_df = location_frames.floor_partition(location_collection, floor)
 
-    if len(shape_df) == 0:
+    if shape_df is None or len(shape_df) == 0:
         # logger.warning(f"No location were found for {floor.__desc__}")
 
         return
 
-    # logger.warning(shape_df.columns)
-
-    column_selection = [
-        c
-        for c in shape_df.columns
-        if ("." not in c)
-        or ("location_type.admin_id" == c)
-        or (
-            ("translations." in c or "display_rule." in c or "street_view_config." in c)
-            and (
-                (".translations" not in c)
-                and (".display_rule" not in c)
-                and (".street_view_config" not in c)
-            )
-            # Only this objects translations
-        )
-    ]
+    column_selection = location_frames.column_selection(location_collection)
 
     if column_selection:
         selected = shape_df[column_selection]
@@ -166,12 +134,10 @@ def add_location_layer(
     except Exception as e:
         logger.error(f"{e}")
 
-    reproject_geometry_df_qgis(locations_df)
+    # Reprojected, anchors included, when the frames were built
+    locations_df.set_crs(solve_target_crs_authid(), inplace=True, allow_override=True)
 
     if "anchor" in locations_df:
-        if should_reproject_qgis():
-            locations_df["anchor"] = locations_df["anchor"].apply(forward_project_qgis)
-
         if ANCHOR_AS_INDIVIDUAL_FIELDS:
             locations_df["anchor_x"] = locations_df["anchor"].apply(lambda p: p.x)
             locations_df["anchor_y"] = locations_df["anchor"].apply(lambda p: p.y)
@@ -219,11 +185,15 @@ def add_location_layer(
         columns={"location_type.admin_id": "location_type"}, inplace=True
     )
 
+    fill_colors = display_rule_fill_color_column(locations_df)
+    if fill_colors is not None:
+        locations_df[FILL_COLOR_FIELD_NAME] = fill_colors
+
     if occupant_dropdown_widget:
         if occupant_collection:
-            a = collection_to_df(occupant_collection)
+            occupant_index = location_frames.occupant_index(occupant_collection)
             locations_df["occupant"] = locations_df.index.map(
-                lambda x: x if x in a.index else None
+                lambda x: x if x in occupant_index else None
             )
         else:
             locations_df["occupant"] = locations_df.index
@@ -274,37 +244,18 @@ def add_location_layer(
         len(shape_df) == layer.featureCount()
     ), f"Some Features where dropped, should not happen! {len(shape_df)}!={layer.featureCount()}"
 
-    if location_type_dropdown_widget:
-        set_field_widget(
-            added_layers,
-            "location_type",
-            location_type_dropdown_widget,
-        )
-
-    for a in added_layers:
-        styled_field_value_categorised(
-            a, style_attributes_layer=location_type_ref_layer
-        )
-
-    if occupant_dropdown_widget:
-        set_field_widget(
-            added_layers,
-            "occupant",
-            occupant_dropdown_widget,
+    if location_field_config is None:
+        location_field_config = location_field_config_template(
+            location_type_dropdown_widget=location_type_dropdown_widget,
+            occupant_dropdown_widget=occupant_dropdown_widget,
         )
 
-    make_field_unique(added_layers, field_name="admin_id")
-
-    auto_center_anchors_when_outside(added_layers)
+    location_field_config.apply(added_layers)
 
-    for field_name in NOT_NULL_FIELDS:
-        make_field_not_null(added_layers, field_name=field_name)
+    if location_styling is None:
+        location_styling = LocationLayerStyling(location_type_ref_layer)
 
-    for field_name, field_default in {"is_searchable": True, "is_active": True}.items():
-        make_field_default(
-            added_layers, field_name=field_name, default_expression=f"'{field_default}'"
-        )
-        make_field_boolean(added_layers, field_name=field_name, nullable=False)
+    location_styling.apply_renderer(added_layers)
 
     if False:
         for field_name in BOOLEAN_LOCATION_FIELDS:
@@ -314,21 +265,6 @@ def add_location_layer(
         if location_type_ref_layer:
             apply_display_rule_styling_categorized(layer, location_type_ref_layer)
 
-    for field_name, field_widget in RANGE_LOCATION_FIELDS.items():
-        set_field_widget(added_layers, field_name, field_widget)
-
-    for field_name in COLOR_LOCATION_FIELDS:
-        set_field_widget(added_layers, field_name, COLOR_WIDGET)
-
-    for field_name in REUSE_LAST_FIELDS:
-        make_field_reuse_last_entered_value(added_layers, field_name=field_name)
-
-    for field_name in ("is_selectable", "is_obstacle"):
-        make_field_boolean(added_layers, field_name=field_name, nullable=True)
-        make_field_default(
-            added_layers, field_name=field_name, default_expression=f"null"
-        )
-
     return added_layers
 
 
@@ -341,10 +277,16 @@ def add_floor_content_layers(
     location_type_ref_layer: Optional[Any] = None,
     location_type_dropdown_widget: Optional[Any] = None,
     occupant_dropdown_widget: Optional[Any] = None,
+    location_frames: Optional[FloorLocationFrames] = None,
+    location_field_config: Optional[FieldConfigTemplate] = None,
+    location_styling: Optional[LocationLayerStyling] = None,
 ) -> None:
     """
     Add all location layers (rooms, areas, POIs) for a floor.
 
+    :param location_frames: Per download floor partitioned location frames, built if not provided
+    :param location_field_config: Field configuration of the room, area and POI layers, built if not provided
+    :param location_styling: Renderers, labeling and 3D renderers of the room, area and POI layers, built if not provided
     :param location_type_ref_layer:
     :param qgis_instance_handle:
     :param solution:
@@ -354,6 +296,21 @@ def add_floor_content_layers(
     :param occupant_dropdown_widget:
     :return:
     """
+    if location_frames is None:
+        location_frames = FloorLocationFrames()
+
+    if location_field_config is None:
+        location_field_config = location_field_config_template(
+            location_type_dropdown_widget=location_type_dropdown_widget,
+            occupant_dropdown_widget=occupant_dropdown_widget,
+        )
+
+    if location_styling is None:
+        location_styling = LocationLayerStyling(
+            location_type_ref_layer,
+            label_field_name=f"translations.{solution.default_language}.name",
+        )
+
     # Add room layers
     room_layers = add_location_layer(
         location_collection=solution.rooms,
@@ -367,24 +324,24 @@ def add_floor_content_layers(
         location_type_dropdown_widget=location_type_dropdown_widget,
         occupant_dropdown_widget=occupant_dropdown_widget,
         opacity=0.8,
+        location_frames=location_frames,
+        location_field_config=location_field_config,
+        location_styling=location_styling,
     )
 
-    set_3d_view_settings(
+    location_styling.apply_3d_view_settings(
         room_layers,
         offset=FLOOR_VERTICAL_SPACING
         + (FLOOR_HEIGHT + FLOOR_VERTICAL_SPACING) * floor.floor_index,
         extrusion=FLOOR_HEIGHT,
     )
 
-    add_raster_symbol(room_layers)
-    add_svg_symbol(room_layers)
-
     if read_bool_setting("USE_LOCATION_TYPE_FOR_LABEL"):  # TODO: STILL DOES NOT WORK...
         label_field_name = 'represent_value("location_type")'
     else:
         label_field_name = "name"
 
-    set_label_styling(
+    location_styling.apply_labeling(
         room_layers,
         field_name=label_field_name,
         min_ratio=read_float_setting("LAYER_LABEL_VISIBLE_MIN_RATIO"),
@@ -410,9 +367,12 @@ def add_floor_content_layers(
         location_type_dropdown_widget=location_type_dropdown_widget,
         occupant_dropdown_widget=occupant_dropdown_widget,
         opacity=0.6,
+        location_frames=location_frames,
+        location_field_config=location_field_config,
+        location_styling=location_styling,
     )
 
-    set_label_styling(
+    location_styling.apply_labeling(
         area_layers,
         field_name=label_field_name,
         min_ratio=read_float_setting("LAYER_LABEL_VISIBLE_MIN_RATIO"),
@@ -423,9 +383,6 @@ def add_floor_content_layers(
         min_ratio=read_float_setting("LAYER_GEOM_VISIBLE_MIN_RATIO"),
     )
 
-    add_raster_symbol(area_layers)
-    add_svg_symbol(area_layers)
-
     set_geometry_constraints(area_layers)
 
     # Add POI layers
@@ -440,9 +397,12 @@ def add_floor_content_layers(
         location_type_ref_layer=location_type_ref_layer,
         location_type_dropdown_widget=location_type_dropdown_widget,
         occupant_dropdown_widget=occupant_dropdown_widget,
+        location_frames=location_frames,
+        location_field_config=location_field_config,
+        location_styling=location_styling,
     )
 
-    set_label_styling(
+    location_styling.apply_labeling(
         poi_layers,
         field_name=label_field_name,
         min_ratio=read_float_setting("LAYER_LABEL_VISIBLE_MIN_RATIO"),
@@ -453,9 +413,6 @@ def add_floor_content_layers(
         min_ratio=read_float_setting("LAYER_GEOM_VISIBLE_MIN_RATIO"),
     )
 
-    add_raster_symbol(poi_layers)
-    add_svg_symbol(poi_layers)  # NO ANCHOR HERE..
-
     set_geometry_constraints(poi_layers)
 
     if False:
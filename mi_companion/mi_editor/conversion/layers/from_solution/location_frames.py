@@ -0,0 +1,251 @@
+import logging
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import pandas
+
+from mi_companion.constants import USE_EXTERNAL_ID_FLOOR_SELECTION
+from mi_companion.mi_editor.conversion.projection import (
+    forward_project_geoms_qgis,
+    prepare_geom_for_editing_qgis,
+    should_reproject_qgis,
+)
+from sync_module.model import CollectionMixin, Floor, Solution
+from sync_module.pandas_utilities import locations_to_df
+from sync_module.tools import collection_to_df
+
+__all__ = ["FloorLocationFrames", "partition_frame_by_floor", "floor_partition_key"]
+
+logger = logging.getLogger(__name__)
+
+if USE_EXTERNAL_ID_FLOOR_SELECTION:  # OLD WAY
+    FLOOR_PARTITION_COLUMNS = ("floor.external_id",)
+else:
+    FLOOR_PARTITION_COLUMNS = ("floor.building.admin_id", "floor.floor_index")
+
+LOCATION_GEOMETRY_COLUMNS = ("polygon", "point", "anchor")
+
+
+def floor_partition_key(floor: Floor) -> Tuple:
+    """
+    The partition key of a floor, matching the values of FLOOR_PARTITION_COLUMNS
+
+    :param floor:
+    :return:
+    """
+    if USE_EXTERNAL_ID_FLOOR_SELECTION:
+        return (floor.external_id,)
+
+    return (
+        floor.building.admin_id,
+        floor.floor_index,
+    )  # TODO: USE Floor.compute_key instead
+
+
+def select_location_columns(columns: Sequence[str]) -> List[str]:
+    """
+    Only keep this objects own columns, its location type and its own translations, display rule and street view config
+
+    :param columns:
+    :return:
+    """
+    return [
+        c
+        for c in columns
+        if ("." not in c)
+        or ("location_type.admin_id" == c)
+        or (
+            ("translations." in c or "display_rule." in c or "street_view_config." in c)
+            and (
+                (".translations" not in c)
+                and (".display_rule" not in c)
+                and (".street_view_config" not in c)
+            )
+            # Only this objects translations
+        )
+    ]
+
+
+def partition_frame_by_floor(
+    df: pandas.DataFrame, key_columns: Sequence[str] = FLOOR_PARTITION_COLUMNS
+) -> Tuple[pandas.DataFrame, Dict[Hashable, slice]]:
+    """
+    Stable sorts the frame by the key columns once, so that every partition is a contiguous row range.
+    Slicing a partition out with iloc is then a view and not a copy of the rows.
+
+    :param df:
+    :param key_columns:
+    :return: The sorted frame and a mapping from partition key tuple to the row slice of that partition
+    """
+    key_columns = list(key_columns)
+
+    if df.empty:
+        return df, {}
+
+    missing_columns = [c for c in key_columns if c not in df.columns]
+    if missing_columns:
+        raise KeyError(f"Could not partition frame, missing {missing_columns}")
+
+    sorted_df = df.sort_values(key_columns, kind="mergesort")
+
+    partitions = {}
+    for key, positions in sorted_df.groupby(
+        key_columns, sort=False, dropna=False
+    ).indices.items():
+        if not isinstance(key, tuple):
+            key = (key,)
+
+        partitions[key] = slice(int(positions[0]), int(positions[-1]) + 1)
+
+    return sorted_df, partitions
+
+
+class FloorLocationFrames:
+    """
+    Flattens each location collection of a solution once per download and hands out the partition of each floor.
+
+    Previously every floor ran locations_to_df over the entire collection and boolean-masked it down,
+    which is O(floors x locations).
+
+    The geometries of the frames are reprojected for editing once per collection, and the venue, graph boundary,
+    building and floor geometries are prepared for editing once, so prepare can do all of it off the main thread.
+    Route elements and the graph network are still prepared on the main thread, while their layers are inserted.
+    """
+
+    def __init__(self):
+        self._frames: Dict[int, Tuple[Any, pandas.DataFrame, Dict, List[str]]] = {}
+        self._occupant_indices: Dict[int, Tuple[Any, pandas.Index]] = {}
+        self._editing_geometries: Dict[Tuple[int, bool], Tuple[Any, Any]] = {}
+
+    def _build(
+        self, location_collection: CollectionMixin
+    ) -> Tuple[Any, pandas.DataFrame, Dict, List[str]]:
+        collection_id = id(location_collection)
+
+        if collection_id not in self._frames:
+            shape_df = locations_to_df(location_collection)
+
+            assert len(location_collection) == len(shape_df)
+
+            sorted_df, partitions = partition_frame_by_floor(shape_df)
+
+            if should_reproject_qgis():
+                for column in LOCATION_GEOMETRY_COLUMNS:
+                    if column in sorted_df:
+                        sorted_df[column] = forward_project_geoms_qgis(
+                            sorted_df[column].to_numpy()
+                        )
+
+            self._frames[collection_id] = (
+                location_collection,  # Keep a reference so the id is not reused
+                sorted_df,
+                partitions,
+                select_location_columns(sorted_df.columns),
+            )
+
+        return self._frames[collection_id]
+
+    def prepare(self, solution: Solution) -> "FloorLocationFrames":
+        """
+        Eagerly flattens, partitions and reprojects every location collection of the solution, and prepares the
+        venue, graph boundary, building and floor geometries for editing, for instance from a worker thread
+
+        :param solution:
+        :return:
+        """
+        for location_collection in (
+            solution.rooms,
+            solution.areas,
+            solution.points_of_interest,
+        ):
+            self._build(location_collection)
+
+        if solution.occupants:
+            self.occupant_index(solution.occupants)
+
+        for venue in solution.venues:
+            if venue is None:
+                continue
+
+            self.editing_geometry(venue.polygon)
+
+            if venue.graph is not None:
+                graph_boundary = venue.graph.boundary
+                if graph_boundary is None:
+                    graph_boundary = venue.polygon
+                self.editing_geometry(graph_boundary, clean=False)
+
+        for building_or_floor in (*solution.buildings, *solution.floors):
+            self.editing_geometry(building_or_floor.polygon)
+            if building_or_floor.anchor is not None:
+                self.editing_geometry(building_or_floor.anchor)
+
+        return self
+
+    def editing_geometry(self, geometry: Any, clean: bool = True) -> Any:
+        """
+        The geometry as prepare_geom_for_editing_qgis prepares it, prepared once
+
+        :param geometry: Of the solution
+        :param clean:
+        :return:
+        """
+        key = (id(geometry), clean)
+
+        if key not in self._editing_geometries:
+            self._editing_geometries[key] = (
+                geometry,  # Keep a reference so the id is not reused
+                prepare_geom_for_editing_qgis(geometry, clean=clean),
+            )
+
+        return self._editing_geometries[key][1]
+
+    def frame(self, location_collection: CollectionMixin) -> pandas.DataFrame:
+        """
+        The entire flattened collection, sorted by floor
+
+        :param location_collection:
+        :return:
+        """
+        return self._build(location_collection)[1]
+
+    def column_selection(self, location_collection: CollectionMixin) -> List[str]:
+        """
+
+        :param location_collection:
+        :return:
+        """
+        return self._build(location_collection)[3]
+
+    def floor_partition(
+        self, location_collection: CollectionMixin, floor: Floor
+    ) -> Optional[pandas.DataFrame]:
+        """
+        The rows of the collection on the floor, a slice of the sorted frame, not a copy.
+
+        :param location_collection:
+        :param floor:
+        :return: None if there are no locations of the collection on the floor
+        """
+        _, sorted_df, partitions, _ = self._build(location_collection)
+
+        partition_slice = partitions.get(floor_partition_key(floor))
+        if partition_slice is None:
+            return None
+
+        return sorted_df.iloc[partition_slice]
+
+    def occupant_index(self, occupant_collection: CollectionMixin) -> pandas.Index:
+        """
+
+        :param occupant_collection:
+        :return:
+        """
+        collection_id = id(occupant_collection)
+
+        if collection_id not in self._occupant_indices:
+            self._occupant_indices[collection_id] = (
+                occupant_collection,
+                collection_to_df(occupant_collection).index,
+            )
+
+        return self._occupant_indices[collection_id][1]
@@ -4,4 +4,5 @@ from .graph_3d_network import *
 from .linestring_route_elements import *
 from .point_route_elements import *
 from .polygon_route_elements import *
+from .route_element_frames import *
 from .route_elements import *
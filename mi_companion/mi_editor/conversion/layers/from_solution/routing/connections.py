@@ -5,12 +5,6 @@ import geopandas
 from geopandas import GeoDataFrame
 from pandas import json_normalize
 
-from jord.qgis_utilities import (
-    make_field_not_null,
-    make_field_reuse_last_entered_value,
-    make_field_unique,
-    set_field_widget,
-)
 from jord.qlive_utilities import add_dataframe_layer
 from mi_companion import INSERT_INDEX, MAKE_FLOOR_WISE_LAYERS
 from mi_companion.layer_descriptors import CONNECTORS_GROUP_DESCRIPTOR
@@ -19,6 +13,7 @@ from mi_companion.mi_editor.conversion.projection import (
     solve_target_crs_authid,
 )
 from sync_module.model import ConnectionCollection, Graph
+from ..field_config_templates import route_element_field_config_template
 
 logger = logging.getLogger(__name__)
 
@@ -74,6 +69,14 @@ def add_connection_layers(
 
     df["floor_index"] = df["floor_index"].astype(str)
 
+    connector_fields = ("floor_index", "connection_id", "connection_type")
+    field_config = route_element_field_config_template(
+        not_null_fields=connector_fields,
+        reuse_last_fields=connector_fields,
+        dropdown_widget=dropdown_widget,
+        route_element_type_column=route_element_type_column,
+    )
+
     if MAKE_FLOOR_WISE_LAYERS:
         doors_group = graph_group.insertGroup(INSERT_INDEX, CONNECTORS_GROUP_DESCRIPTOR)
 
@@ -114,18 +117,7 @@ def add_connection_layers(
                 )
                 added_layers.append(connectors_layer)
 
-                make_field_unique(connectors_layer, field_name="admin_id")
-
-                for field_name in ("floor_index", "connection_id", "connection_type"):
-                    make_field_not_null(connectors_layer, field_name=field_name)
-                    make_field_reuse_last_entered_value(
-                        connectors_layer, field_name=field_name
-                    )
-
-                if dropdown_widget:
-                    set_field_widget(
-                        connectors_layer, route_element_type_column, dropdown_widget
-                    )
+                field_config.apply(connectors_layer)
     else:
         empty_lines = df[df.is_empty]
         if not empty_lines.empty:
@@ -147,15 +139,6 @@ def add_connection_layers(
 
         added_layers.append(connectors_layer)
 
-        for field_name in ("floor_index", "connection_id", "connection_type"):
-            make_field_not_null(connectors_layer, field_name=field_name)
-            make_field_reuse_last_entered_value(connectors_layer, field_name=field_name)
-
-        make_field_unique(connectors_layer, field_name="admin_id")
-
-        if dropdown_widget:
-            set_field_widget(
-                connectors_layer, route_element_type_column, dropdown_widget
-            )
+        field_config.apply(connectors_layer)
 
     return added_layers
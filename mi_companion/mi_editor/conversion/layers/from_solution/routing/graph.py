@@ -18,12 +18,10 @@ from mi_companion.mi_editor.conversion.layers.from_solution.routing.graph_3d_net
 from mi_companion.mi_editor.conversion.layers.from_solution.routing.route_elements import (
     add_route_element_layers,
 )
-from mi_companion.mi_editor.conversion.projection import (
-    prepare_geom_for_editing_qgis,
-    solve_target_crs_authid,
-)
+from mi_companion.mi_editor.conversion.projection import solve_target_crs_authid
 from sync_module.model import Graph, Solution, Venue
 from sync_module.tools import osm_xml_to_lines
+from ..location_frames import FloorLocationFrames
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +40,7 @@ def add_graph_layers(
     connection_type_dropdown_widget: Optional[Any] = None,
     entry_point_type_dropdown_widget: Optional[Any] = None,
     edge_context_type_dropdown_widget: Optional[Any] = None,
+    location_frames: Optional[FloorLocationFrames] = None,
 ) -> None:
     """
 
@@ -55,8 +54,11 @@ def add_graph_layers(
     :param connection_type_dropdown_widget:
     :param entry_point_type_dropdown_widget:
     :param edge_context_type_dropdown_widget:
+    :param location_frames:
     :return:
     """
+    if location_frames is None:
+        location_frames = FloorLocationFrames()
 
     if DESCRIPTOR_BEFORE:
         graph_name = f"{GRAPH_GROUP_DESCRIPTOR} {graph.graph_id}"
@@ -74,7 +76,7 @@ def add_graph_layers(
         logger.warning(f"Graph {graph} has no boundary, defaulting to venue boundary")
         graph_boundary = venue.polygon
 
-    graph_boundary = prepare_geom_for_editing_qgis(graph_boundary, clean=False)
+    graph_boundary = location_frames.editing_geometry(graph_boundary, clean=False)
 
     graph_bound_layer = add_shapely_layer(
         qgis_instance_handle=qgis_instance_handle,
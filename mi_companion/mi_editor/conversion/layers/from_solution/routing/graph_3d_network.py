@@ -1,6 +1,7 @@
 import logging
-from typing import Any, Iterable
+from typing import Any, Iterable, List, Sequence
 
+import numpy
 import shapely
 
 from jord.qgis_utilities import (
@@ -20,16 +21,114 @@ from mi_companion.mi_editor.conversion.layers.from_solution.routing.styling.grad
     set_m_based_graduated_styling,
 )
 from mi_companion.mi_editor.conversion.projection import (
-    prepare_geom_for_editing_qgis,
+    get_forward_projection_qgis,
+    should_reproject_qgis,
     solve_target_crs_authid,
 )
+from mi_companion.qgis_utilities import InvalidReprojection
 
 logger = logging.getLogger(__name__)
 
-__all__ = ["add_graph_3d_network_layers"]
+__all__ = [
+    "add_graph_3d_network_layers",
+    "encode_linestring_zm_wkbs",
+    "z_augmented_line_wkbs",
+]
 
 EDGE_BASED_LEVELS = False  # OSM EXPORTER FROM MI SUCKS
 
+WKB_LITTLE_ENDIAN = 1
+WKB_LINESTRING_ZM = 3002  # ISO
+WKB_HEADER_DTYPE = numpy.dtype(
+    [("byte_order", "u1"), ("geometry_type", "<u4"), ("num_points", "<u4")]
+)  # Packed, 9 bytes
+WKB_POINT_ZM_SIZE = 4 * 8
+
+
+def encode_linestring_zm_wkbs(
+    xyzm: numpy.ndarray, line_index: numpy.ndarray, num_lines: int
+) -> List[bytes]:
+    """
+    Writes the little endian ISO LineStringZM WKB of all lines at once. The headers and vertices of all lines are
+    scattered into a single buffer, which is then cut into the WKB of each line.
+
+    :param xyzm: (N, 4) coordinates of all vertices of all lines, grouped by line in line order
+    :param line_index: (N,) the line of every vertex, as returned by shapely.get_coordinates(return_index=True)
+    :param num_lines: Lines without vertices are written as empty linestrings
+    :return: The WKB of every line
+    """
+    num_points = numpy.bincount(line_index, minlength=num_lines)
+    line_sizes = WKB_HEADER_DTYPE.itemsize + WKB_POINT_ZM_SIZE * num_points
+
+    line_ends = numpy.cumsum(line_sizes)
+    line_starts = line_ends - line_sizes
+
+    buffer = numpy.empty(int(line_ends[-1]) if num_lines else 0, dtype=numpy.uint8)
+
+    headers = numpy.empty(num_lines, dtype=WKB_HEADER_DTYPE)
+    headers["byte_order"] = WKB_LITTLE_ENDIAN
+    headers["geometry_type"] = WKB_LINESTRING_ZM
+    headers["num_points"] = num_points
+
+    header_offsets = numpy.arange(WKB_HEADER_DTYPE.itemsize)
+    buffer[line_starts[:, None] + header_offsets] = headers.view(numpy.uint8).reshape(
+        num_lines, WKB_HEADER_DTYPE.itemsize
+    )
+
+    if len(line_index):
+        first_points = numpy.cumsum(num_points) - num_points
+        point_ranks = numpy.arange(len(line_index)) - first_points[line_index]
+
+        point_starts = (
+            line_starts[line_index]
+            + WKB_HEADER_DTYPE.itemsize
+            + WKB_POINT_ZM_SIZE * point_ranks
+        )
+        buffer[point_starts[:, None] + numpy.arange(WKB_POINT_ZM_SIZE)] = (
+            numpy.ascontiguousarray(xyzm, dtype="<f8")
+            .view(numpy.uint8)
+            .reshape(len(line_index), WKB_POINT_ZM_SIZE)
+        )
+
+    return [
+        buffer[start:end].tobytes()
+        for start, end in zip(line_starts.tolist(), line_ends.tolist())
+    ]
+
+
+def z_augmented_line_wkbs(lines: Sequence[Any]) -> List[bytes]:
+    """
+    The graph edges as LineStringZM WKB, with the level of every vertex, its z as parsed by osm_xml_to_lines,
+    as M and the visualisation height FLOOR_HEIGHT/2 + level*FLOOR_HEIGHT as Z.
+    Coordinates of all edges are reprojected, augmented and encoded as arrays, in one pass.
+
+    :param lines: Shapely linestrings with the level as z
+    :return: The WKB of every line
+    """
+    line_array = numpy.asarray(lines, dtype=object)
+
+    coords, line_index = shapely.get_coordinates(
+        line_array, include_z=True, return_index=True
+    )
+
+    x, y, level = coords[:, 0], coords[:, 1], coords[:, 2]
+
+    if should_reproject_qgis():
+        x, y = get_forward_projection_qgis()(x, y)
+        x, y = numpy.asarray(x), numpy.asarray(y)
+
+        if not (numpy.isfinite(x).all() and numpy.isfinite(y).all()):
+            raise InvalidReprojection(
+                f"Reproject of {len(line_array)} graph lines resulted in some coordinates becoming infinity, please check you coordinate systems"
+            )
+
+    # Z coordinate is purely for visualisation, measurement is the actual level.
+    z = FLOOR_HEIGHT / 2.0 + level * FLOOR_HEIGHT
+
+    xyzm = numpy.column_stack((x, y, z, level))
+
+    return encode_linestring_zm_wkbs(xyzm, line_index, len(line_array))
+
 
 def add_graph_3d_network_layers(
     *,
@@ -54,65 +153,16 @@ def add_graph_3d_network_layers(
     :param qgis_instance_handle:
     :return:
     """
-    lines = [prepare_geom_for_editing_qgis(l, clean=False) for l in lines]
-
     logger.info(f"{len(lines)=} loaded!")
 
-    z_augment_lines = []
-    geom_measurements = []
-    for ith, (line, meta_data) in enumerate(zip(lines, lines_meta_data)):
-        edge_levels = meta_data.pop("level").split(";")
+    for meta_data in lines_meta_data:
+        meta_data.pop("level")
 
         for a in ("from", "to", "length", "distance", "oneway", "reversed", "osmid"):
             if a in meta_data:
                 _ = meta_data.pop(a)
 
-        coords = line.coords
-        num_coords = len(coords)
-        z_augmented_line_points = []
-        measurements = []
-        for ith_c, c in enumerate(coords):
-            if False:
-                if EDGE_BASED_LEVELS:  #
-                    if ith_c >= num_coords - 1:
-                        level = edge_levels[-1]
-                    else:
-                        level = edge_levels[ith_c]
-                else:
-                    level = c[
-                        2
-                    ]  # * FLOOR_HEIGHT # TODO: FIGURE OUT HOW TO MATCH FLOOR LEVEL
-
-                z_augmented_line_points.append((c[0], c[1], level))
-            else:
-                level = c[2]
-
-                if False:
-                    z_augmented_line_points.append((c[0], c[1], level))
-
-                    measurements.append(
-                        FLOOR_HEIGHT / 2.0
-                        + level * FLOOR_HEIGHT
-                        # Z coordinate is purely for visualisation, measurement is the actual level.
-                    )
-                else:
-                    z_augmented_line_points.append(  # WHEN SHAPELY SUPPORT LINESTRING ZM use the functionality
-                        (c[0], c[1], FLOOR_HEIGHT / 2.0 + level * FLOOR_HEIGHT, level)
-                    )
-
-        if False:
-            geom_measurements.append(measurements)
-
-            z_augment_lines.append(shapely.geometry.LineString(z_augmented_line_points))
-
-        else:
-            from osgeo import ogr
-
-            ogr_linestring = ogr.Geometry(ogr.wkbLineString)
-            for c in z_augmented_line_points:
-                ogr_linestring.AddPointZM(*c)
-
-            z_augment_lines.append(ogr_linestring.ExportToWkb())
+    z_augment_lines = z_augmented_line_wkbs(lines)
 
     graph_lines_layer = add_wkb_layer(
         qgis_instance_handle=qgis_instance_handle,
@@ -120,7 +170,7 @@ def add_graph_3d_network_layers(
         name=GRAPH_LINES_DESCRIPTOR,
         group=graph_group,
         columns=lines_meta_data,
-        measurements=measurements,
+        measurements=[],
         categorise_by_attribute="highway",
         visible=True,
         crs=solve_target_crs_authid(),
@@ -3,12 +3,6 @@ from typing import Any, List, Optional
 
 import geopandas
 
-from jord.qgis_utilities import (
-    make_field_not_null,
-    make_field_reuse_last_entered_value,
-    make_field_unique,
-    set_field_widget,
-)
 from jord.qlive_utilities import add_dataframe_layer
 from mi_companion import INSERT_INDEX, MAKE_FLOOR_WISE_LAYERS
 from mi_companion.layer_descriptors import DOORS_GROUP_DESCRIPTOR
@@ -18,6 +12,8 @@ from mi_companion.mi_editor.conversion.projection import (
 )
 from sync_module.model import DoorCollection, Graph
 from sync_module.pandas_utilities import locations_to_df
+from .route_element_frames import partition_route_elements_by_floor
+from ..field_config_templates import route_element_field_config_template
 
 logger = logging.getLogger(__name__)
 
@@ -53,41 +49,23 @@ def add_linestring_route_element_layers(
     if "fields" in df:  # TODO: Is this right?
         df.pop("fields")
 
+    field_config = route_element_field_config_template(
+        dropdown_widget=dropdown_widget,
+        route_element_type_column=route_element_type_column,
+    )
+
     if MAKE_FLOOR_WISE_LAYERS:
         doors_group = graph_group.insertGroup(INSERT_INDEX, doors_name)
 
         if not df.empty:
-            floor_indices = df["floor_index"].unique()
-            for floor_index in floor_indices:
-                sub_df = df[
-                    (df["floor_index"] == floor_index)
-                    & (df["graph.graph_id"] == graph.graph_id)
-                ]
-
-                linestring_df = geopandas.GeoDataFrame(
-                    sub_df[
-                        [
-                            c
-                            for c in sub_df.columns
-                            if ("." not in c) or ("fields." in c)
-                        ]
-                    ],
-                    geometry="linestring",
-                )
-
-                empty_lines = linestring_df[linestring_df.is_empty]
-                if not empty_lines.empty:
-                    logger.warning(f"Dropping {empty_lines}")
-
-                linestring_df = linestring_df[~linestring_df.is_empty]
-
-                # door_df["door_type"] = door_df["door_type"].apply(lambda x: x.name, axis=1)
-
-                reproject_geometry_df_qgis(linestring_df)
+            linestring_df, floor_slices = partition_route_elements_by_floor(
+                df, graph=graph, geometry_column="linestring", name=doors_name
+            )
 
+            for floor_index, floor_slice in floor_slices.items():
                 linestring_layer = add_dataframe_layer(
                     qgis_instance_handle=qgis_instance_handle,
-                    dataframe=linestring_df,
+                    dataframe=linestring_df.iloc[floor_slice],
                     geometry_column="linestring",
                     name=f"{floor_index}",
                     categorise_by_attribute="floor_index",
@@ -97,16 +75,7 @@ def add_linestring_route_element_layers(
 
                 added_layers.append(linestring_layer)
 
-                for field_name in ("floor_index",):
-                    make_field_not_null(linestring_layer, field_name=field_name)
-                    make_field_reuse_last_entered_value(linestring_layer, field_name)
-
-                make_field_unique(linestring_layer, field_name="admin_id")
-
-                if dropdown_widget:
-                    set_field_widget(
-                        linestring_layer, route_element_type_column, dropdown_widget
-                    )
+                field_config.apply(linestring_layer)
 
     else:
         linestring_df = geopandas.GeoDataFrame(
@@ -134,16 +103,7 @@ def add_linestring_route_element_layers(
             crs=solve_target_crs_authid(),
         )
 
-        for field_name in ("floor_index",):
-            make_field_not_null(linestring_layer, field_name=field_name)
-            make_field_reuse_last_entered_value(linestring_layer, field_name=field_name)
-
-        make_field_unique(linestring_layer, field_name="admin_id")
-
-        if dropdown_widget:
-            set_field_widget(
-                linestring_layer, route_element_type_column, dropdown_widget
-            )
+        field_config.apply(linestring_layer)
 
         added_layers.append(linestring_layer)
 
@@ -3,12 +3,6 @@ from typing import Any, List, Optional
 
 import geopandas
 
-from jord.qgis_utilities import (
-    make_field_not_null,
-    make_field_reuse_last_entered_value,
-    make_field_unique,
-    set_field_widget,
-)
 from jord.qlive_utilities import add_dataframe_layer
 from mi_companion import INSERT_INDEX, MAKE_FLOOR_WISE_LAYERS
 from mi_companion.mi_editor.conversion.projection import (
@@ -17,6 +11,8 @@ from mi_companion.mi_editor.conversion.projection import (
 )
 from sync_module.model import CollectionMixin, Graph
 from sync_module.pandas_utilities import locations_to_df
+from .route_element_frames import partition_route_elements_by_floor
+from ..field_config_templates import route_element_field_config_template
 
 __all__ = ["add_point_route_element_layers"]
 
@@ -53,40 +49,23 @@ def add_point_route_element_layers(
 
     added_layers = []
 
+    field_config = route_element_field_config_template(
+        dropdown_widget=dropdown_widget,
+        route_element_type_column=route_element_type_column,
+    )
+
     if MAKE_FLOOR_WISE_LAYERS:
         doors_group = graph_group.insertGroup(INSERT_INDEX, doors_name)
 
         if not df.empty:
-            floor_indices = df["floor_index"].unique()
-            for floor_index in floor_indices:
-                sub_df = df[
-                    (df["floor_index"] == floor_index)
-                    & (df["graph.graph_id"] == graph.graph_id)
-                ]
-                door_df = geopandas.GeoDataFrame(
-                    sub_df[
-                        [
-                            c
-                            for c in sub_df.columns
-                            if ("." not in c) or ("fields." in c)
-                        ]
-                    ],
-                    geometry="point",
-                )
-
-                # door_df["door_type"] = door_df["door_type"].apply(lambda x: x.name, axis=1)
-
-                empty_lines = door_df[door_df.is_empty]
-                if not empty_lines.empty:
-                    logger.warning(f"Dropping {empty_lines}")
-
-                door_df = door_df[~door_df.is_empty]
-
-                reproject_geometry_df_qgis(door_df)
+            door_df, floor_slices = partition_route_elements_by_floor(
+                df, graph=graph, geometry_column="point", name=doors_name
+            )
 
+            for floor_index, floor_slice in floor_slices.items():
                 point_layer = add_dataframe_layer(
                     qgis_instance_handle=qgis_instance_handle,
-                    dataframe=door_df,
+                    dataframe=door_df.iloc[floor_slice],
                     geometry_column="point",
                     name=f"{floor_index}",
                     categorise_by_attribute="floor_index",
@@ -96,21 +75,7 @@ def add_point_route_element_layers(
 
                 added_layers.append(point_layer)
 
-                for field_name in ("floor_index",):
-                    make_field_not_null(point_layer, field_name=field_name)
-                    make_field_reuse_last_entered_value(
-                        point_layer, field_name=field_name
-                    )
-
-                make_field_unique(point_layer, field_name="admin_id")
-
-                if (
-                    dropdown_widget is not None
-                    and route_element_type_column is not None
-                ):
-                    set_field_widget(
-                        point_layer, route_element_type_column, dropdown_widget
-                    )
+                field_config.apply(point_layer)
     else:
         door_df = geopandas.GeoDataFrame(
             df[[c for c in df.columns if ("." not in c)]],
@@ -139,13 +104,6 @@ def add_point_route_element_layers(
 
         added_layers.append(point_layer)
 
-        for field_name in ("floor_index",):
-            make_field_not_null(point_layer, field_name=field_name)
-            make_field_reuse_last_entered_value(point_layer, field_name=field_name)
-
-        make_field_unique(point_layer, field_name="admin_id")
-
-        if dropdown_widget is not None and route_element_type_column is not None:
-            set_field_widget(point_layer, route_element_type_column, dropdown_widget)
+        field_config.apply(point_layer)
 
     return added_layers
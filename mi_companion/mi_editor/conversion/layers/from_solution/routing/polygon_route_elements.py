@@ -3,12 +3,6 @@ from typing import Any, List, Optional
 
 import geopandas
 
-from jord.qgis_utilities import (
-    make_field_not_null,
-    make_field_reuse_last_entered_value,
-    make_field_unique,
-    set_field_widget,
-)
 from jord.qlive_utilities import add_dataframe_layer
 from mi_companion import INSERT_INDEX, MAKE_FLOOR_WISE_LAYERS
 from mi_companion.mi_editor.conversion.projection import (
@@ -17,6 +11,8 @@ from mi_companion.mi_editor.conversion.projection import (
 )
 from sync_module.model import CollectionMixin, Graph
 from sync_module.pandas_utilities import locations_to_df
+from .route_element_frames import partition_route_elements_by_floor
+from ..field_config_templates import route_element_field_config_template
 
 logger = logging.getLogger(__name__)
 
@@ -46,40 +42,23 @@ def add_polygon_route_element_layers(
     if "fields" in df:  # TODO: Is this right?
         df.pop("fields")
 
+    field_config = route_element_field_config_template(
+        dropdown_widget=dropdown_widget,
+        route_element_type_column=route_element_type_column,
+    )
+
     if MAKE_FLOOR_WISE_LAYERS:
         doors_group = graph_group.insertGroup(INSERT_INDEX, layer_name)
 
         if not df.empty:
-            floor_indices = df["floor_index"].unique()
-            for floor_index in floor_indices:
-                sub_df = df[
-                    (df["floor_index"] == floor_index)
-                    & (df["graph.graph_id"] == graph.graph_id)
-                ]
-                obstacle_df = geopandas.GeoDataFrame(
-                    sub_df[
-                        [
-                            c
-                            for c in sub_df.columns
-                            if ("." not in c) or ("fields." in c)
-                        ]
-                    ],
-                    geometry="polygon",
-                )
-
-                # door_df["door_type"] = door_df["door_type"].apply(lambda x: x.name, axis=1)
-
-                empty_lines = obstacle_df[obstacle_df.is_empty]
-                if not empty_lines.empty:
-                    logger.warning(f"Dropping {empty_lines}")
-
-                obstacle_df = obstacle_df[~obstacle_df.is_empty]
-
-                reproject_geometry_df_qgis(obstacle_df)
+            obstacle_df, floor_slices = partition_route_elements_by_floor(
+                df, graph=graph, geometry_column="polygon", name=layer_name
+            )
 
+            for floor_index, floor_slice in floor_slices.items():
                 obstacle_layer = add_dataframe_layer(
                     qgis_instance_handle=qgis_instance_handle,
-                    dataframe=obstacle_df,
+                    dataframe=obstacle_df.iloc[floor_slice],
                     geometry_column="polygon",
                     name=f"{floor_index}",
                     categorise_by_attribute="floor_index",
@@ -89,18 +68,7 @@ def add_polygon_route_element_layers(
 
                 added_layers.append(obstacle_layer)
 
-                for field_name in ("floor_index",):
-                    make_field_not_null(obstacle_layer, field_name=field_name)
-
-                make_field_unique(obstacle_layer, field_name="admin_id")
-
-                if (
-                    dropdown_widget is not None
-                    and route_element_type_column is not None
-                ):
-                    set_field_widget(
-                        obstacle_layer, route_element_type_column, dropdown_widget
-                    )
+                field_config.apply(obstacle_layer)
 
     else:
         obstacle_df = geopandas.GeoDataFrame(
@@ -130,13 +98,6 @@ def add_polygon_route_element_layers(
 
         added_layers.append(obstacle_layer)
 
-        for field_name in ("floor_index",):
-            make_field_not_null(obstacle_layer, field_name=field_name)
-            make_field_reuse_last_entered_value(obstacle_layer, field_name)
-
-        make_field_unique(obstacle_layer, field_name="admin_id")
-
-        if dropdown_widget is not None and route_element_type_column is not None:
-            set_field_widget(obstacle_layer, route_element_type_column, dropdown_widget)
+        field_config.apply(obstacle_layer)
 
     return added_layers
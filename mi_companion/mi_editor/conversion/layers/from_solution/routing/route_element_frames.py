@@ -0,0 +1,70 @@
+import logging
+from typing import Any, Dict, Hashable, Tuple
+
+import geopandas
+import pandas
+
+from mi_companion.mi_editor.conversion.projection import reproject_geometry_df_qgis
+from sync_module.model import Graph
+from ..location_frames import partition_frame_by_floor
+
+__all__ = ["partition_route_elements_by_floor"]
+
+logger = logging.getLogger(__name__)
+
+
+def _floor_index_order(floor_index: Any) -> Tuple[bool, Any]:
+    """
+    Orders floor indices numerically, the floor_index column is a string, where "10" sorts before "2".
+    Floor indices that are not numbers come last.
+
+    :param floor_index:
+    :return:
+    """
+    try:
+        return False, float(floor_index)
+    except (TypeError, ValueError):
+        return True, str(floor_index)
+
+
+def partition_route_elements_by_floor(
+    df: pandas.DataFrame, *, graph: Graph, geometry_column: str, name: str
+) -> Tuple[geopandas.GeoDataFrame, Dict[Hashable, slice]]:
+    """
+    Selects the route elements of the graph, drops those without a geometry and reprojects them all at once, then
+    sorts them by floor index once, so the route elements of every floor are a contiguous row range of the shared
+    frame. The partitions are ordered by numeric floor index, so the floor layers are added in that order.
+
+    Previously every floor boolean-masked the entire frame and reprojected its own copy,
+    which is O(floors x route elements).
+
+    :param df: As given by locations_to_df, with a string floor_index column
+    :param graph:
+    :param geometry_column:
+    :param name: Of the route element layers, for logging
+    :return: The sorted frame and a mapping from floor index to the row slice of that floor
+    """
+    graph_df = df[df["graph.graph_id"] == graph.graph_id]
+
+    route_element_df = geopandas.GeoDataFrame(
+        graph_df[[c for c in graph_df.columns if ("." not in c) or ("fields." in c)]],
+        geometry=geometry_column,
+    )
+
+    empty_geometries = route_element_df.is_empty
+    if empty_geometries.any():
+        logger.warning(f"Dropping {route_element_df[empty_geometries]} from {name}")
+        route_element_df = route_element_df[~empty_geometries]
+
+    reproject_geometry_df_qgis(route_element_df)
+
+    sorted_df, partitions = partition_frame_by_floor(
+        route_element_df, key_columns=("floor_index",)
+    )
+
+    return sorted_df, {
+        key[0]: floor_slice
+        for key, floor_slice in sorted(
+            partitions.items(), key=lambda item: _floor_index_order(item[0][0])
+        )
+    }
@@ -2,10 +2,7 @@ import logging
 from collections import defaultdict
 from typing import Any, Optional
 
-from jord.qgis_utilities import (
-    make_field_reuse_last_entered_value,
-    set_3d_view_settings,
-)
+from jord.qgis_utilities import set_3d_view_settings
 from mi_companion import (
     DOOR_HEIGHT_FACTOR,
     DOOR_LINE_COLOR,
@@ -105,9 +102,6 @@ def add_route_element_layers(
             doors=solution.doors,
         )
 
-        for field_name in ("door_type",):
-            make_field_reuse_last_entered_value(door_layers, field_name=field_name)
-
         if False:
             set_3d_view_settings(  # MAKE offset CONDITIONAL ON FLOOR_INDEX column
                 door_layers,
@@ -130,7 +124,7 @@ def add_route_element_layers(
                 dropdown_widget = entry_point_type_dropdown_widget
                 route_element_type_column = "entry_point_type"
 
-            added_point_layers = add_point_route_element_layers(
+            add_point_route_element_layers(
                 graph=graph,
                 graph_group=graph_group,
                 qgis_instance_handle=qgis_instance_handle,
@@ -140,12 +134,6 @@ def add_route_element_layers(
                 route_element_type_column=route_element_type_column,
             )
 
-            if desc == ENTRY_POINTS_GROUP_DESCRIPTOR:
-                for field_name in ("entry_point_type",):
-                    make_field_reuse_last_entered_value(
-                        added_point_layers, field_name=field_name
-                    )
-
         add_polygon_route_element_layers(
             graph=graph,
             graph_group=graph_group,
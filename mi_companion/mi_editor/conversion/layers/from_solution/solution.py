@@ -1,5 +1,5 @@
 import logging
-from typing import Any, Iterable, Optional, Tuple
+from typing import Any, Callable, Iterable, Optional, Set, Tuple
 
 # noinspection PyUnresolvedReferences
 from qgis.PyQt import QtWidgets
@@ -19,17 +19,23 @@ from mi_companion import (
     DESCRIPTOR_BEFORE,
     OSM_HIGHWAY_TYPES,
 )
-from mi_companion.configuration import read_bool_setting
+from mi_companion.configuration import (
+    PluginSettings,
+    read_bool_setting,
+    settings_snapshot,
+)
 from mi_companion.layer_descriptors import (
     DATABASE_GROUP_DESCRIPTOR,
     LOCATION_TYPE_DESCRIPTOR,
     SOLUTION_DATA_DESCRIPTOR,
     SOLUTION_GROUP_DESCRIPTOR,
 )
-from sync_module.mi import (
-    SolutionDepth,
-    get_remote_solution,
+from mi_companion.mi_editor.hierarchy.hierarchy_validation import (
+    suspended_hierarchy_validation,
 )
+from mi_companion.qgis_utilities.detached_layer_tree import detached_layer_tree
+from mi_companion.qgis_utilities.exceptions import DownloadCancelled
+from sync_module.mi import SolutionDepth
 from sync_module.model import (
     GraphEdgeContextTypes,
     IMPLEMENTATION_STATUS,
@@ -41,8 +47,16 @@ from sync_module.shared import (
     MIEntryPointType,
     MIVenueType,
 )
+from .location_frames import FloorLocationFrames
 from .location_type import add_location_type_layer, make_location_type_dropdown_widget
+from .solution_snapshots import (
+    SolutionSnapshotKey,
+    get_solution_snapshot_store,
+    load_or_fetch_solution,
+    refresh_snapshot_in_background,
+)
 from .venue import add_venue_layer
+from .venue_reload import patch_layer_features
 
 __all__ = ["solution_venue_to_layer_hierarchy", "add_solution_layers"]
 
@@ -56,48 +70,107 @@ def add_solution_layers(
     layer_tree_root: Any,
     mi_hierarchy_group_name: str = DATABASE_GROUP_DESCRIPTOR,
     progress_bar: Optional[QtWidgets.QProgressBar] = None,
+    location_frames: Optional[FloorLocationFrames] = None,
+    settings: Optional[PluginSettings] = None,
 ) -> None:
     """
+    Hierarchy validation is suspended while the layers are added, the added layers are validated once after.
+    If the download is cancelled, the groups and layers it added are removed again, DownloadCancelled is re-raised.
 
     :param qgis_instance_handle:
     :param solution:
     :param layer_tree_root:
     :param mi_hierarchy_group_name:
     :param progress_bar:
+    :param location_frames: Location frames already prepared for the solution, for instance by a VenueDownloadTask
+    :param settings: Pinned while the layers are added, the current snapshot if None
     :return:
     """
-    (
-        available_location_type_dropdown_widget,
-        connection_type_dropdown_widget,
-        door_type_dropdown_widget,
-        edge_context_type_dropdown_widget,
-        entry_point_type_dropdown_widget,
-        highway_type_dropdown_widget,
-        solution_group,
-        venue_type_dropdown_widget,
-        location_type_ref_layer,
-    ) = add_solution_group(
-        layer_tree_root,
-        mi_hierarchy_group_name,
-        progress_bar,
-        qgis_instance_handle,
-        solution,
-    )
+    layer_ids_before = set(QgsProject.instance().mapLayers())
+    group_names_before = {group.name() for group in layer_tree_root.findGroups(True)}
+
+    with settings_snapshot(settings), suspended_hierarchy_validation():
+        try:
+            (
+                available_location_type_dropdown_widget,
+                connection_type_dropdown_widget,
+                door_type_dropdown_widget,
+                edge_context_type_dropdown_widget,
+                entry_point_type_dropdown_widget,
+                highway_type_dropdown_widget,
+                solution_group,
+                venue_type_dropdown_widget,
+                location_type_ref_layer,
+            ) = add_solution_group(
+                layer_tree_root,
+                mi_hierarchy_group_name,
+                progress_bar,
+                qgis_instance_handle,
+                solution,
+            )
 
-    add_venue_layer(
-        progress_bar=progress_bar,
-        qgis_instance_handle=qgis_instance_handle,
-        solution=solution,
-        solution_group=solution_group,
-        location_type_ref_layer=location_type_ref_layer,
-        location_type_dropdown_widget=available_location_type_dropdown_widget,
-        door_type_dropdown_widget=door_type_dropdown_widget,
-        highway_type_dropdown_widget=highway_type_dropdown_widget,
-        venue_type_dropdown_widget=venue_type_dropdown_widget,
-        connection_type_dropdown_widget=connection_type_dropdown_widget,
-        entry_point_type_dropdown_widget=entry_point_type_dropdown_widget,
-        edge_context_type_dropdown_widget=edge_context_type_dropdown_widget,
-    )
+            add_venue_layer(
+                progress_bar=progress_bar,
+                qgis_instance_handle=qgis_instance_handle,
+                solution=solution,
+                solution_group=solution_group,
+                location_type_ref_layer=location_type_ref_layer,
+                location_type_dropdown_widget=available_location_type_dropdown_widget,
+                door_type_dropdown_widget=door_type_dropdown_widget,
+                highway_type_dropdown_widget=highway_type_dropdown_widget,
+                venue_type_dropdown_widget=venue_type_dropdown_widget,
+                connection_type_dropdown_widget=connection_type_dropdown_widget,
+                entry_point_type_dropdown_widget=entry_point_type_dropdown_widget,
+                edge_context_type_dropdown_widget=edge_context_type_dropdown_widget,
+                location_frames=location_frames,
+            )
+
+        except DownloadCancelled:
+            remove_added_solution_nodes(
+                layer_tree_root,
+                mi_hierarchy_group_name,
+                layer_ids_before=layer_ids_before,
+                group_names_before=group_names_before,
+            )
+            raise
+
+
+def remove_added_solution_nodes(
+    layer_tree_root: Any,
+    mi_hierarchy_group_name: str,
+    *,
+    layer_ids_before: Set[str],
+    group_names_before: Set[str],
+) -> None:
+    """
+    Removes the layers and groups under the database group that were not there before a cancelled download,
+    like its solution data and location type layers and a new solution group
+
+    :param layer_tree_root:
+    :param mi_hierarchy_group_name:
+    :param layer_ids_before: Ids of the map layers of the project before the download
+    :param group_names_before: Names of the groups of the layer tree before the download
+    :return:
+    """
+    mi_group = layer_tree_root.findGroup(mi_hierarchy_group_name)
+    if mi_group is None:
+        return
+
+    for layer_tree_layer in mi_group.findLayers():
+        if layer_tree_layer.layerId() not in layer_ids_before:
+            QgsProject.instance().removeMapLayer(layer_tree_layer.layerId())
+
+    added_groups = [
+        group
+        for group in mi_group.findGroups(True)
+        if group.name() not in group_names_before
+    ]
+    for group in added_groups:
+        if group.parent() is not None and group.parent() not in added_groups:
+            group.parent().removeChildNode(group)
+
+    if mi_group.name() not in group_names_before:
+        layer_tree_root.removeChildNode(mi_group)
 
 
 def add_solution_group(
@@ -265,8 +338,9 @@ def add_solution_group(
                 )
 
                 if reply == QtWidgets.QMessageBox.Yes:
-                    solution_group.removeChildNode(c)
-                    location_type_layer = None
+                    reload_location_type_layer(
+                        c.layer(), solution, qgis_instance_handle, solution_group
+                    )
                 else:
                     ...
 
@@ -323,6 +397,37 @@ def add_solution_group(
     )
 
 
+def reload_location_type_layer(
+    existing_layer: Any,
+    solution: Solution,
+    qgis_instance_handle: Any,
+    solution_group: Any,
+) -> None:
+    """
+    Patches the features of the loaded location type layer to those of the solution, keeping its id, so the
+    location type widgets, styling and lookups of the loaded venues, which all reference that id, stay valid.
+
+    :param existing_layer:
+    :param solution:
+    :param qgis_instance_handle:
+    :param solution_group:
+    :return:
+    """
+    with detached_layer_tree(
+        qgis_instance_handle, solution_group, LOCATION_TYPE_DESCRIPTOR, attach=False
+    ) as (location_type_group, location_type_instance_handle):
+        new_layers = add_location_type_layer(
+            solution,
+            qgis_instance_handle=location_type_instance_handle,
+            solution_group=location_type_group,
+            layer_name=LOCATION_TYPE_DESCRIPTOR,
+        )
+
+    if new_layers:
+        patch = patch_layer_features(existing_layer, new_layers[0])
+        logger.info(f"Reloaded location types: {patch._asdict()}")
+
+
 def solution_venue_to_layer_hierarchy(
     qgis_instance_handle: Any,
     solution_external_id: str,
@@ -333,10 +438,13 @@ def solution_venue_to_layer_hierarchy(
     include_occupants: bool = True,
     include_media: bool = False,
     depth: SolutionDepth = SolutionDepth.occupants,
+    on_snapshot_refreshed: Optional[Callable[[bool], None]] = None,
 ) -> Solution:
     """
     Return solution and created widget objects
 
+    With CACHE_SOLUTION_SNAPSHOTS on, a stored snapshot of the venue is loaded immediately if there is one,
+    and refreshed from the server in the background, on_snapshot_refreshed is called with whether it was stale.
 
     :param include_occupants:
     :param include_media:
@@ -349,6 +457,7 @@ def solution_venue_to_layer_hierarchy(
     :param mi_hierarchy_group_name:
     :param settings:
     :param progress_bar:
+    :param on_snapshot_refreshed:
     :return:
     """
     if progress_bar:
@@ -356,14 +465,17 @@ def solution_venue_to_layer_hierarchy(
 
     layer_tree_root = QgsProject.instance().layerTreeRoot()
 
-    solution = get_remote_solution(
+    snapshot_store = get_solution_snapshot_store()
+    snapshot_key = SolutionSnapshotKey(
         solution_external_id,
-        venue_keys=[venue_external_id],
+        venue_external_id,
+        depth=depth,
         include_occupants=include_occupants,
         include_media=include_media,
-        depth=depth,
     )
 
+    solution, from_snapshot = load_or_fetch_solution(snapshot_key, snapshot_store)
+
     add_solution_layers(
         qgis_instance_handle=qgis_instance_handle,
         solution=solution,
@@ -372,4 +484,9 @@ def solution_venue_to_layer_hierarchy(
         progress_bar=progress_bar,
     )
 
+    if from_snapshot:
+        refresh_snapshot_in_background(
+            snapshot_store, snapshot_key, on_snapshot_refreshed
+        )
+
     return solution
@@ -0,0 +1,294 @@
+import gzip
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, NamedTuple, Optional, Set, Tuple
+
+# noinspection PyUnresolvedReferences
+from qgis.core import QgsApplication, QgsTask
+
+from mi_companion import PROJECT_APP_PATH
+from mi_companion.configuration import (
+    read_bool_setting,
+    read_float_setting,
+    read_settings_snapshot,
+    settings_snapshot,
+)
+from sync_module.mi import SolutionDepth, get_remote_solution
+from sync_module.model import Solution
+from sync_module.tools import from_json, to_json
+
+__all__ = [
+    "SNAPSHOT_EXTENSION",
+    "SolutionSnapshotKey",
+    "SolutionSnapshotStore",
+    "get_solution_snapshot_store",
+    "read_solution_file",
+    "load_or_fetch_solution",
+    "refresh_snapshot_in_background",
+]
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_EXTENSION = ".json.gz"
+SNAPSHOT_DIRECTORY_NAME = "solution_snapshots"
+
+
+class SolutionSnapshotKey(NamedTuple):
+    solution_external_id: str
+    venue_key: str
+    depth: SolutionDepth = SolutionDepth.occupants
+    include_occupants: bool = True
+    include_media: bool = False
+
+    @property
+    def file_name(self) -> str:
+        parts = (
+            self.solution_external_id,
+            self.venue_key,
+            getattr(self.depth, "value", self.depth),
+            "with-occupants" if self.include_occupants else "",
+            "with-media" if self.include_media else "",
+        )
+
+        return (
+            "_".join(re.sub(r"[^A-Za-z0-9.-]", "-", str(p)) for p in parts if p)
+            + SNAPSHOT_EXTENSION
+        )
+
+
+def read_solution_file(path: Path) -> Solution:
+    """
+    Reads a serialized solution, gzip compressed snapshots as well as plain json exports
+
+    :param path:
+    :return:
+    """
+    path = Path(path)
+
+    if path.suffix == ".gz":
+        serialized = gzip.decompress(path.read_bytes()).decode("utf-8")
+    else:
+        serialized = path.read_text(encoding="utf-8")
+
+    return from_json(serialized)
+
+
+class SolutionSnapshotStore:
+    """
+    Fetched solutions on disk, one gzip compressed serialized solution per solution, venue, depth and inclusion
+    options. The least recently used snapshots are evicted once the store exceeds its disk budget,
+    the most recently used one is always kept.
+    """
+
+    def __init__(self, directory: Path, budget_bytes: int):
+        self.directory = Path(directory)
+        self.budget_bytes = budget_bytes
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def snapshot_path(self, key: SolutionSnapshotKey) -> Path:
+        return self.directory / key.file_name
+
+    def load(self, key: SolutionSnapshotKey) -> Optional[Solution]:
+        """
+
+        :param key:
+        :return: None if there is no snapshot for the key, or it could not be read
+        """
+        path = self.snapshot_path(key)
+        if not path.exists():
+            return None
+
+        try:
+            solution = read_solution_file(path)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable snapshot {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        os.utime(path)  # Most recently used
+
+        return solution
+
+    def save(self, key: SolutionSnapshotKey, solution: Solution) -> bool:
+        """
+        Stores the solution as the snapshot of the key, then evicts the least recently used snapshots over budget
+
+        :param key:
+        :param solution:
+        :return: Whether the stored snapshot differs from the one it replaced, True if there was none
+        """
+        path = self.snapshot_path(key)
+        serialized = to_json(solution).encode("utf-8")
+
+        changed = True
+        if path.exists():
+            try:
+                changed = gzip.decompress(path.read_bytes()) != serialized
+            except Exception as e:
+                logger.warning(f"Replacing unreadable snapshot {path}: {e}")
+
+        if changed:
+            # A unique temporary file, concurrent refreshes of the same key must not interleave their writes
+            with tempfile.NamedTemporaryFile(
+                dir=self.directory, prefix=f"{path.name}.", suffix=".tmp", delete=False
+            ) as temporary_file:
+                temporary_file.write(gzip.compress(serialized))
+
+            try:
+                os.replace(temporary_file.name, path)
+            except OSError:
+                Path(temporary_file.name).unlink(missing_ok=True)
+                raise
+        else:
+            os.utime(path)
+
+        self.evict()
+
+        return changed
+
+    def evict(self) -> None:
+        snapshots = sorted(
+            self.directory.glob(f"*{SNAPSHOT_EXTENSION}"),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+
+        total_bytes = 0
+        for ith, path in enumerate(snapshots):
+            total_bytes += path.stat().st_size
+
+            if ith > 0 and total_bytes > self.budget_bytes:
+                logger.info(f"Evicting snapshot {path}")
+                path.unlink(missing_ok=True)
+
+
+def get_solution_snapshot_store() -> Optional[SolutionSnapshotStore]:
+    """
+    The snapshot store in the plugin app cache dir, with the SOLUTION_SNAPSHOT_BUDGET_MB disk budget.
+
+    :return: None if CACHE_SOLUTION_SNAPSHOTS is off or the plugin app dir is not available
+    """
+    if not read_bool_setting("CACHE_SOLUTION_SNAPSHOTS") or PROJECT_APP_PATH is None:
+        return None
+
+    return SolutionSnapshotStore(
+        Path(PROJECT_APP_PATH.user_cache) / SNAPSHOT_DIRECTORY_NAME,
+        budget_bytes=int(read_float_setting("SOLUTION_SNAPSHOT_BUDGET_MB") * 2**20),
+    )
+
+
+def fetch_solution(key: SolutionSnapshotKey) -> Solution:
+    return get_remote_solution(
+        key.solution_external_id,
+        venue_keys=[key.venue_key],
+        include_occupants=key.include_occupants,
+        include_media=key.include_media,
+        depth=key.depth,
+    )
+
+
+def load_or_fetch_solution(
+    key: SolutionSnapshotKey, store: Optional[SolutionSnapshotStore] = None
+) -> Tuple[Solution, bool]:
+    """
+    The snapshot of the key if the store has one, otherwise the remote solution, which is then stored
+
+    :param key:
+    :param store: Always fetches if None
+    :return: The solution and whether it came from a snapshot, in which case it should be refreshed
+    """
+    if store is not None:
+        solution = store.load(key)
+        if solution is not None:
+            logger.info(f"Loaded {key.venue_key} from snapshot")
+            return solution, True
+
+    solution = fetch_solution(key)
+
+    if store is not None:
+        store.save(key, solution)
+
+    return solution, False
+
+
+class SolutionSnapshotRefreshTask(QgsTask):
+    """
+    Fetches the remote solution of a snapshot and stores it, on_refreshed is called on the main thread with whether
+    the remote solution differs from the snapshot.
+    """
+
+    def __init__(
+        self,
+        store: SolutionSnapshotStore,
+        key: SolutionSnapshotKey,
+        on_refreshed: Optional[Callable[[bool], None]] = None,
+    ):
+        super().__init__(f"Refreshing snapshot of {key.venue_key}", QgsTask.CanCancel)
+
+        self.store = store
+        self.key = key
+        self.on_refreshed = on_refreshed
+
+        self.settings = read_settings_snapshot()  # Read on the main thread
+
+        self.changed = False
+        self.exception: Optional[Exception] = None
+
+    def run(self) -> bool:
+        try:
+            with settings_snapshot(self.settings):
+                solution = fetch_solution(self.key)
+
+                if self.isCanceled():
+                    return False
+
+                self.changed = self.store.save(self.key, solution)
+
+            return True
+
+        except Exception as e:
+            self.exception = e
+            return False
+
+    def finished(self, result: bool) -> None:
+        REFRESH_TASKS.discard(self)
+
+        if result:
+            if self.changed:
+                logger.warning(
+                    f"{self.key.venue_key} has changed on the server since its snapshot, download it again to update"
+                )
+
+            if self.on_refreshed is not None:
+                self.on_refreshed(self.changed)
+
+        elif self.exception is not None:
+            logger.warning(
+                f"Could not refresh snapshot of {self.key.venue_key}: {self.exception}"
+            )
+
+
+REFRESH_TASKS: Set[Any] = set()  # The task manager does not keep the python side alive
+
+
+def refresh_snapshot_in_background(
+    store: SolutionSnapshotStore,
+    key: SolutionSnapshotKey,
+    on_refreshed: Optional[Callable[[bool], None]] = None,
+) -> None:
+    """
+    Checks the freshness of a snapshot against the server without blocking, and replaces it if it is stale.
+
+    :param store:
+    :param key:
+    :param on_refreshed: Called with whether the snapshot was stale
+    :return:
+    """
+    task = SolutionSnapshotRefreshTask(store, key, on_refreshed)
+    REFRESH_TASKS.add(task)
+
+    QgsApplication.taskManager().addTask(task)
@@ -30,14 +30,18 @@ from mi_companion.layer_descriptors import (
 from mi_companion.mi_editor.conversion.layers.from_solution.routing.graph import (
     add_graph_layers,
 )
-from mi_companion.mi_editor.conversion.projection import (
-    prepare_geom_for_editing_qgis,
-    solve_target_crs_authid,
-)
+from mi_companion.mi_editor.conversion.projection import solve_target_crs_authid
+from mi_companion.mi_editor.hierarchy.change_tracking import track_layer_changes
 from sync_module.model import FALLBACK_OSM_GRAPH, Solution, Venue
 from sync_module.tools import translations_to_flattened_dict
+from mi_companion.qgis_utilities.detached_layer_tree import detached_layer_tree
 from .building import add_building_layers
+from .field_config_templates import location_field_config_template
+from .location_frames import FloorLocationFrames
+from ...styling import LocationLayerStyling
 from .occupant import add_occupant_layer
+from .venue_reload import check_no_uncommitted_edits, reload_venue_group
+from .venue_storage import store_group_layers_in_geopackage, venue_geopackage_path
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +79,7 @@ def add_venue_layer(
     entry_point_type_dropdown_widget: Optional[Any] = None,
     edge_context_type_dropdown_widget: Optional[Any] = None,
     progress_bar: Optional[Any] = None,
+    location_frames: Optional[FloorLocationFrames] = None,
 ) -> None:
     """
 
@@ -90,11 +95,20 @@ def add_venue_layer(
     :param entry_point_type_dropdown_widget:
     :param edge_context_type_dropdown_widget:
     :param progress_bar:
+    :param location_frames:
     :return:
     """
     if True:
         assert len(solution.venues) > 0, "No venues found"
 
+    if location_frames is None:
+        location_frames = FloorLocationFrames()  # Shared by all venues of this download
+
+    location_styling = LocationLayerStyling(
+        location_type_ref_layer,
+        label_field_name=f"translations.{solution.default_language}.name",
+    )  # Shared by all venues of this download
+
     for venue in solution.venues:
         if venue is None:
             logger.warning("Venue was None!")
@@ -105,11 +119,11 @@ def add_venue_layer(
         else:
             venue_name = f"{venue.translations[solution.default_language].name} {VENUE_GROUP_DESCRIPTOR}"
 
-        venue_group = solution_group.findGroup(venue_name)
+        existing_venue_group = solution_group.findGroup(venue_name)
         if (
             not ALLOW_DUPLICATE_VENUES_IN_PROJECT
         ):  # TODO: base this in external ids rather than group name
-            if venue_group:
+            if existing_venue_group:
                 logger.error(
                     f"Venue {venue.translations[solution.default_language].name} already loaded!"
                 )
@@ -119,91 +133,187 @@ def add_venue_layer(
                     f"Would you like to reload the {venue.translations[solution.default_language].name} venue from the MI Database?",
                 )
 
-                if reply == QtWidgets.QMessageBox.Yes:
-                    solution_group.removeChildNode(venue_group)
-                else:
+                if reply != QtWidgets.QMessageBox.Yes:
                     continue
+        else:
+            existing_venue_group = None
 
-        venue_group = solution_group.insertGroup(
-            INSERT_INDEX, venue_name
-        )  # Skip solution data
-
-        venue_group.setExpanded(True)
-        venue_group.setExpanded(False)
-
-        if INSERT_INDEX <= 0:
-            add_venue_polygon_layer(
-                qgis_instance_handle, venue, venue_group, venue_type_dropdown_widget
-            )
+        if existing_venue_group is not None:
+            check_no_uncommitted_edits(existing_venue_group)
 
-        if progress_bar:
-            progress_bar.setValue(20)
+        # The venue is built off the project and attached in one step once complete, or patched into the already
+        # loaded venue on a reload, a cancelled download (DownloadCancelled) leaves nothing behind
+        with detached_layer_tree(
+            qgis_instance_handle,
+            solution_group,
+            venue_name,
+            INSERT_INDEX,  # Skip solution data
+            attach=existing_venue_group is None,
+        ) as (venue_group, venue_instance_handle):
+            venue_group.setExpanded(True)
+            venue_group.setExpanded(False)
 
-        occupant_dropdown_widget = None
-        if ADD_OCCUPANT_LAYERS:
-            occupant_layer = add_occupant_layer(
+            add_venue_group_layers(
+                qgis_instance_handle=venue_instance_handle,
                 solution=solution,
+                venue=venue,
                 venue_group=venue_group,
-                qgis_instance_handle=qgis_instance_handle,
+                location_type_ref_layer=location_type_ref_layer,
+                location_type_dropdown_widget=location_type_dropdown_widget,
+                door_type_dropdown_widget=door_type_dropdown_widget,
+                highway_type_dropdown_widget=highway_type_dropdown_widget,
+                venue_type_dropdown_widget=venue_type_dropdown_widget,
+                connection_type_dropdown_widget=connection_type_dropdown_widget,
+                entry_point_type_dropdown_widget=entry_point_type_dropdown_widget,
+                edge_context_type_dropdown_widget=edge_context_type_dropdown_widget,
+                progress_bar=progress_bar,
+                location_frames=location_frames,
+                location_styling=location_styling,
             )
-            if occupant_layer:
-                assert len(occupant_layer) == 1
-                occupant_layer = occupant_layer[0]
-                occupant_dropdown_widget = make_value_relation_widget(
-                    occupant_layer.id(),
-                    allow_null_values=True,
-                )
 
-        add_building_layers(
+            if existing_venue_group is None and read_bool_setting(
+                "STORE_VENUES_IN_GEOPACKAGE"
+            ):
+                geopackage_path = venue_geopackage_path(solution, venue)
+                if geopackage_path is not None:
+                    store_group_layers_in_geopackage(venue_group, geopackage_path)
+
+        if existing_venue_group is not None:
+            reload_venue_group(existing_venue_group, venue_group, location_styling)
+            venue_group = existing_venue_group
+
+        track_layer_changes(venue_group, solution)
+
+
+def add_venue_group_layers(
+    *,
+    qgis_instance_handle: Any,
+    solution: Solution,
+    venue: Venue,
+    venue_group: Any,
+    location_type_ref_layer: Optional[Any],
+    location_type_dropdown_widget: Optional[Any],
+    door_type_dropdown_widget: Optional[Any],
+    highway_type_dropdown_widget: Optional[Any],
+    venue_type_dropdown_widget: Optional[Any],
+    connection_type_dropdown_widget: Optional[Any],
+    entry_point_type_dropdown_widget: Optional[Any],
+    edge_context_type_dropdown_widget: Optional[Any],
+    progress_bar: Optional[Any],
+    location_frames: FloorLocationFrames,
+    location_styling: Optional[LocationLayerStyling] = None,
+) -> None:
+    """
+    Adds the venue polygon, occupant, building and graph layers of a venue to its venue group
+
+    :param qgis_instance_handle:
+    :param solution:
+    :param venue:
+    :param venue_group:
+    :param location_type_ref_layer:
+    :param location_type_dropdown_widget:
+    :param door_type_dropdown_widget:
+    :param highway_type_dropdown_widget:
+    :param venue_type_dropdown_widget:
+    :param connection_type_dropdown_widget:
+    :param entry_point_type_dropdown_widget:
+    :param edge_context_type_dropdown_widget:
+    :param progress_bar:
+    :param location_frames:
+    :param location_styling: Styling of the room, area and POI layers, shared by the venues of a download
+    :return:
+    """
+    if INSERT_INDEX <= 0:
+        add_venue_polygon_layer(
+            qgis_instance_handle,
+            venue,
+            venue_group,
+            venue_type_dropdown_widget,
+            location_frames=location_frames,
+        )
+
+    if progress_bar:
+        progress_bar.setValue(20)
+
+    occupant_dropdown_widget = None
+    if ADD_OCCUPANT_LAYERS:
+        occupant_layer = add_occupant_layer(
             solution=solution,
-            progress_bar=progress_bar,
-            venue=venue,
             venue_group=venue_group,
             qgis_instance_handle=qgis_instance_handle,
-            location_type_ref_layer=location_type_ref_layer,
-            location_type_dropdown_widget=location_type_dropdown_widget,
-            occupant_dropdown_widget=occupant_dropdown_widget,
         )
+        if occupant_layer:
+            assert len(occupant_layer) == 1
+            occupant_layer = occupant_layer[0]
+            occupant_dropdown_widget = make_value_relation_widget(
+                occupant_layer.id(),
+                allow_null_values=True,
+            )
+
+    location_field_config = location_field_config_template(
+        location_type_dropdown_widget=location_type_dropdown_widget,
+        occupant_dropdown_widget=occupant_dropdown_widget,
+    )  # Shared by the room, area and POI layers of every floor of the venue
 
-        if read_bool_setting("ADD_GRAPH"):  # add graph
+    add_building_layers(
+        solution=solution,
+        progress_bar=progress_bar,
+        venue=venue,
+        venue_group=venue_group,
+        qgis_instance_handle=qgis_instance_handle,
+        location_type_ref_layer=location_type_ref_layer,
+        location_type_dropdown_widget=location_type_dropdown_widget,
+        occupant_dropdown_widget=occupant_dropdown_widget,
+        location_frames=location_frames,
+        location_field_config=location_field_config,
+        location_styling=location_styling,
+    )
+
+    if read_bool_setting("ADD_GRAPH"):  # add graph
+        graph = venue.graph
+
+        if graph is None and read_bool_setting("ADD_DUMMY_GRAPH_IF_MISSING"):
+            graph_name = _sanitize_graph_name(venue.translations['en'].name)
+            graph_key = solution.add_graph(
+                graph_id=f"{graph_name}_graph",
+                osm_xml=FALLBACK_OSM_GRAPH,
+                boundary=venue.polygon,
+            )
+            solution.update_venue(venue.key, graph_key=graph_key)
             graph = venue.graph
 
-            if graph is None and read_bool_setting("ADD_DUMMY_GRAPH_IF_MISSING"):
-                graph_name = _sanitize_graph_name(venue.translations['en'].name)
-                graph_key = solution.add_graph(
-                    graph_id=f"{graph_name}_graph",
-                    osm_xml=FALLBACK_OSM_GRAPH,
-                    boundary=venue.polygon,
-                )
-                solution.update_venue(venue.key, graph_key=graph_key)
-                graph = venue.graph
-
-            if graph is not None:
-
-                add_graph_layers(
-                    graph=graph,
-                    venue_group=venue_group,
-                    qgis_instance_handle=qgis_instance_handle,
-                    solution=solution,
-                    venue=venue,
-                    highway_type_dropdown_widget=highway_type_dropdown_widget,
-                    door_type_dropdown_widget=door_type_dropdown_widget,
-                    connection_type_dropdown_widget=connection_type_dropdown_widget,
-                    entry_point_type_dropdown_widget=entry_point_type_dropdown_widget,
-                    edge_context_type_dropdown_widget=edge_context_type_dropdown_widget,
-                )
+        if graph is not None:
 
-        if INSERT_INDEX > 0:
-            add_venue_polygon_layer(
-                qgis_instance_handle, venue, venue_group, venue_type_dropdown_widget
+            add_graph_layers(
+                graph=graph,
+                venue_group=venue_group,
+                qgis_instance_handle=qgis_instance_handle,
+                solution=solution,
+                venue=venue,
+                highway_type_dropdown_widget=highway_type_dropdown_widget,
+                door_type_dropdown_widget=door_type_dropdown_widget,
+                connection_type_dropdown_widget=connection_type_dropdown_widget,
+                entry_point_type_dropdown_widget=entry_point_type_dropdown_widget,
+                edge_context_type_dropdown_widget=edge_context_type_dropdown_widget,
+                location_frames=location_frames,
             )
 
+    if INSERT_INDEX > 0:
+        add_venue_polygon_layer(
+            qgis_instance_handle,
+            venue,
+            venue_group,
+            venue_type_dropdown_widget,
+            location_frames=location_frames,
+        )
+
 
 def add_venue_polygon_layer(
     qgis_instance_handle: Any,
     venue: Venue,
     venue_group: Any,
     venue_type_dropdown_widget: Any,
+    location_frames: Optional[FloorLocationFrames] = None,
 ) -> None:
     """
 
@@ -211,11 +321,15 @@ def add_venue_polygon_layer(
     :param venue:
     :param venue_group:
     :param venue_type_dropdown_widget:
+    :param location_frames:
     :return:
     """
+    if location_frames is None:
+        location_frames = FloorLocationFrames()
+
     venue_layer = add_shapely_layer(
         qgis_instance_handle=qgis_instance_handle,
-        geoms=[prepare_geom_for_editing_qgis(venue.polygon)],
+        geoms=[location_frames.editing_geometry(venue.polygon)],
         name=VENUE_POLYGON_DESCRIPTOR,
         columns=[
             {
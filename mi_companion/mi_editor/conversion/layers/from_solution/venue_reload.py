@@ -0,0 +1,390 @@
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# noinspection PyUnresolvedReferences
+from qgis.core import (
+    QgsCategorizedSymbolRenderer,
+    QgsCoordinateTransform,
+    QgsEditorWidgetSetup,
+    QgsFeature,
+    QgsGeometry,
+    QgsLayerTreeGroup,
+    QgsLayerTreeLayer,
+    QgsProject,
+    QgsVectorLayer,
+)
+
+from mi_companion.qgis_utilities.detached_layer_tree import frozen_map_canvas
+from mi_companion.qgis_utilities.exceptions import UncommittedEdits
+
+__all__ = ["reload_venue_group", "patch_layer_features", "check_no_uncommitted_edits"]
+
+logger = logging.getLogger(__name__)
+
+RELOAD_KEY_FIELD = "admin_id"
+WIDGET_LAYER_ID_KEYS = ("Layer", "LayerId", "ReferencedLayerId")
+
+
+class FeaturePatch(NamedTuple):
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+
+
+def _keyed_features(layer: Any, key_index: int) -> Optional[Dict[Any, QgsFeature]]:
+    """
+
+    :param layer:
+    :param key_index:
+    :return: None if a key is missing or not unique
+    """
+    features = {}
+
+    for feature in layer.getFeatures():
+        key = feature.attributes()[key_index]
+        if key is None or key in features:
+            return None
+        features[key] = feature
+
+    return features
+
+
+def patch_layer_features(existing_layer: Any, new_layer: Any) -> FeaturePatch:
+    """
+    Makes the features of the existing layer equal to the features of the new layer, matched by admin id,
+    with bulk inserts, updates and deletes through the data provider of the existing layer.
+    The existing layer keeps its id, renderer, labels and field configuration.
+    Fields of the new layer that the existing layer lacks are added to it.
+    Layers without unique admin ids have all their features replaced.
+    A layer with uncommitted edits is not patched, UncommittedEdits is raised instead of discarding them.
+    Geometries are transformed to the CRS of the existing layer, which differs from that of the new layer if the
+    project CRS changed since the existing layer was downloaded.
+
+    :param existing_layer:
+    :param new_layer:
+    :return: Number of inserted, updated and deleted features
+    """
+    if existing_layer.isEditable():
+        if existing_layer.isModified():
+            raise UncommittedEdits(
+                f"{existing_layer.name()} has uncommitted edits, save or discard them before reloading"
+            )
+        existing_layer.rollBack()  # Leaves edit mode, there is nothing to discard
+
+    provider = existing_layer.dataProvider()
+    new_fields = new_layer.fields()
+
+    missing_fields = [
+        field
+        for field in new_fields
+        if existing_layer.fields().indexFromName(field.name()) < 0
+    ]
+    if missing_fields:
+        provider.addAttributes(missing_fields)
+        existing_layer.updateFields()
+
+    existing_fields = existing_layer.fields()
+    field_index_map = [
+        existing_fields.indexFromName(field.name()) for field in new_fields
+    ]  # New field index to existing field index
+
+    transform = None
+    if existing_layer.isSpatial() and existing_layer.crs() != new_layer.crs():
+        transform = QgsCoordinateTransform(
+            new_layer.crs(), existing_layer.crs(), QgsProject.instance()
+        )
+
+    def as_existing_geometry(new_feature: QgsFeature) -> QgsGeometry:
+        geometry = QgsGeometry(new_feature.geometry())
+        if transform is not None and not geometry.isNull():
+            geometry.transform(transform)
+        return geometry
+
+    def as_existing_feature(new_feature: QgsFeature) -> QgsFeature:
+        feature = QgsFeature(existing_fields)
+        for new_index, value in enumerate(new_feature.attributes()):
+            feature.setAttribute(field_index_map[new_index], value)
+        feature.setGeometry(as_existing_geometry(new_feature))
+        return feature
+
+    existing_features = None
+    new_features = None
+    if (
+        new_fields.indexFromName(RELOAD_KEY_FIELD) >= 0
+        and existing_fields.indexFromName(RELOAD_KEY_FIELD) >= 0
+    ):
+        existing_features = _keyed_features(
+            existing_layer, existing_fields.indexFromName(RELOAD_KEY_FIELD)
+        )
+        new_features = _keyed_features(
+            new_layer, new_fields.indexFromName(RELOAD_KEY_FIELD)
+        )
+
+    if existing_features is None or new_features is None:
+        deleted_ids = [feature.id() for feature in existing_layer.getFeatures()]
+        inserted = [as_existing_feature(f) for f in new_layer.getFeatures()]
+
+        provider.deleteFeatures(deleted_ids)
+        provider.addFeatures(inserted)
+
+        patch = FeaturePatch(inserted=len(inserted), deleted=len(deleted_ids))
+    else:
+        deleted_ids = [
+            feature.id()
+            for key, feature in existing_features.items()
+            if key not in new_features
+        ]
+        inserted = []
+        attribute_changes = {}
+        geometry_changes = {}
+
+        for key, new_feature in new_features.items():
+            existing_feature = existing_features.get(key)
+
+            if existing_feature is None:
+                inserted.append(as_existing_feature(new_feature))
+                continue
+
+            existing_attributes = existing_feature.attributes()
+            changed_attributes = {
+                field_index_map[new_index]: value
+                for new_index, value in enumerate(new_feature.attributes())
+                if existing_attributes[field_index_map[new_index]] != value
+            }
+            if changed_attributes:
+                attribute_changes[existing_feature.id()] = changed_attributes
+
+            if not existing_layer.isSpatial():  # Like the location types layer
+                continue
+
+            new_geometry = as_existing_geometry(new_feature)
+            if not existing_feature.geometry().equals(new_geometry):
+                geometry_changes[existing_feature.id()] = new_geometry
+
+        if deleted_ids:
+            provider.deleteFeatures(deleted_ids)
+        if inserted:
+            provider.addFeatures(inserted)
+        if attribute_changes:
+            provider.changeAttributeValues(attribute_changes)
+        if geometry_changes:
+            provider.changeGeometryValues(geometry_changes)
+
+        patch = FeaturePatch(
+            inserted=len(inserted),
+            updated=len(set(attribute_changes) | set(geometry_changes)),
+            deleted=len(deleted_ids),
+        )
+
+    if any(patch):
+        existing_layer.updateExtents()
+        existing_layer.dataChanged.emit()  # Provider edits do not, caches of the layer listen for it
+        existing_layer.triggerRepaint()
+
+    return patch
+
+
+def _layers_below(node: Any) -> List[Any]:
+    if isinstance(node, QgsLayerTreeLayer):
+        layers = [node.layer()]
+    else:
+        layers = [layer_node.layer() for layer_node in node.findLayers()]
+
+    return [layer for layer in layers if layer is not None]
+
+
+def _remove(existing_group: Any, existing_child: Any) -> None:
+    layer_ids = [layer.id() for layer in _layers_below(existing_child)]
+
+    existing_group.removeChildNode(existing_child)
+    QgsProject.instance().removeMapLayers(layer_ids)
+
+
+def _graft(
+    existing_group: Any,
+    new_group: Any,
+    new_child: Any,
+    index: int,
+    grafted_layers: List[Any],
+) -> None:
+    """
+    Moves a node of the new tree into the existing tree, registering its layers with the project
+
+    :param existing_group:
+    :param new_group:
+    :param new_child:
+    :param index:
+    :param grafted_layers: The layers of the node are appended
+    :return:
+    """
+    layers = _layers_below(new_child)
+    grafted_layers.extend(layers)
+
+    QgsProject.instance().addMapLayers(layers, False)
+
+    clone = new_child.clone()
+    new_group.removeChildNode(new_child)
+    existing_group.insertChildNode(index, clone)
+
+
+def _remap_widget_layer_ids(layer: Any, layer_ids: Dict[str, str]) -> None:
+    """
+    Points the value relation and relation reference widgets of the layer at the existing layers that replaced the
+    detached layers they were configured with
+
+    :param layer:
+    :param layer_ids: Detached layer id to existing layer id
+    :return:
+    """
+    if not isinstance(layer, QgsVectorLayer):
+        return
+
+    for field_index, field in enumerate(layer.fields()):
+        widget_setup = field.editorWidgetSetup()
+        config = widget_setup.config()
+
+        remapped = {
+            key: (
+                layer_ids.get(value, value)
+                if key in WIDGET_LAYER_ID_KEYS and isinstance(value, str)
+                else value
+            )
+            for key, value in config.items()
+        }
+
+        if remapped != config:
+            layer.setEditorWidgetSetup(
+                field_index, QgsEditorWidgetSetup(widget_setup.type(), remapped)
+            )
+
+
+def _patch_group(
+    existing_group: Any,
+    new_group: Any,
+    totals: Dict[str, int],
+    layer_ids: Dict[str, str],
+    grafted_layers: List[Any],
+    patched_layers: List[Any],
+) -> None:
+    existing_children = defaultdict(list)
+    for child in existing_group.children():
+        existing_children[child.name()].append(child)
+
+    for index, new_child in enumerate(list(new_group.children())):
+        candidates = existing_children.get(new_child.name())
+        existing_child = candidates.pop(0) if candidates else None
+
+        if isinstance(new_child, QgsLayerTreeGroup) and isinstance(
+            existing_child, QgsLayerTreeGroup
+        ):
+            _patch_group(
+                existing_child,
+                new_child,
+                totals,
+                layer_ids,
+                grafted_layers,
+                patched_layers,
+            )
+
+        elif (
+            isinstance(new_child, QgsLayerTreeLayer)
+            and isinstance(existing_child, QgsLayerTreeLayer)
+            and isinstance(existing_child.layer(), QgsVectorLayer)
+            and isinstance(new_child.layer(), QgsVectorLayer)
+        ):
+            patch = patch_layer_features(existing_child.layer(), new_child.layer())
+            for name, count in patch._asdict().items():
+                totals[name] += count
+
+            layer_ids[new_child.layer().id()] = existing_child.layer().id()
+            patched_layers.append(existing_child.layer())
+
+        else:
+            if existing_child is not None:
+                _remove(existing_group, existing_child)
+            _graft(
+                existing_group,
+                new_group,
+                new_child,
+                min(index, len(existing_group.children())),
+                grafted_layers,
+            )
+            totals["grafted"] += 1
+
+    for removed_children in existing_children.values():
+        for removed_child in removed_children:
+            _remove(existing_group, removed_child)
+            totals["removed"] += 1
+
+
+def check_no_uncommitted_edits(group: Any) -> None:
+    """
+    Raises UncommittedEdits if a layer below the group has uncommitted edits, which a reload would have to discard.
+    Check before building the detached tree to reload from, so a refused reload does not build it for nothing.
+
+    :param group:
+    :return:
+    """
+    edited_layers = [
+        layer.name()
+        for layer in _layers_below(group)
+        if isinstance(layer, QgsVectorLayer) and layer.isModified()
+    ]
+    if edited_layers:
+        raise UncommittedEdits(
+            f"{group.name()} has uncommitted edits in {edited_layers}, save or discard them before reloading"
+        )
+
+
+def reload_venue_group(
+    existing_venue_group: Any,
+    new_venue_group: Any,
+    location_styling: Optional[Any] = None,
+) -> None:
+    """
+    Patches an already loaded venue group to match a freshly built, detached one.
+    Groups and layers are matched by name. Matching layers have their features patched in place,
+    new groups and layers are moved over from the detached tree, and groups and layers that no longer exist are
+    removed. Expanded state, styles and layer ids of the existing tree are kept, the widgets of moved over layers
+    that referenced a detached layer, like the occupant dropdown, reference the existing layer it was patched into.
+    Nothing is patched if a layer of the existing venue has uncommitted edits, UncommittedEdits is raised instead.
+    Patched layers categorised by location type get their categories rebuilt, so added location types are styled.
+
+    :param existing_venue_group:
+    :param new_venue_group: Detached, its layers are not registered with the project
+    :param location_styling: The LocationLayerStyling the new venue group was styled with
+    :return:
+    """
+    # Checked again, as edits may have started while the detached tree was built
+    check_no_uncommitted_edits(existing_venue_group)
+
+    totals = defaultdict(int)
+    layer_ids = {}
+    grafted_layers = []
+    patched_layers = []
+
+    with frozen_map_canvas():
+        _patch_group(
+            existing_venue_group,
+            new_venue_group,
+            totals,
+            layer_ids,
+            grafted_layers,
+            patched_layers,
+        )
+
+        for layer in grafted_layers:
+            _remap_widget_layer_ids(layer, layer_ids)
+
+        if location_styling is not None:
+            location_styling.apply_renderer(
+                [
+                    layer
+                    for layer in patched_layers
+                    if isinstance(layer.renderer(), QgsCategorizedSymbolRenderer)
+                    and layer.renderer().classAttribute() == location_styling.field_name
+                ]
+            )
+
+    logger.info(f"Reloaded {existing_venue_group.name()}: {dict(totals)}")
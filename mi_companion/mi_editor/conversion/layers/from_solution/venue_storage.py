@@ -0,0 +1,222 @@
+import logging
+import re
+import time
+import unicodedata
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+# noinspection PyUnresolvedReferences
+from qgis.core import (
+    QgsDataProvider,
+    QgsLayerTreeGroup,
+    QgsProject,
+    QgsVectorFileWriter,
+    QgsVectorLayer,
+)
+
+from mi_companion import PROJECT_APP_PATH
+from mi_companion.configuration import read_float_setting
+from mi_companion.mi_editor.constants import GEOPACKAGE_FID_COLUMN
+from sync_module.model import Solution, Venue
+
+__all__ = [
+    "venue_geopackage_path",
+    "prune_venue_geopackages",
+    "store_group_layers_in_geopackage",
+]
+
+logger = logging.getLogger(__name__)
+
+VENUE_GEOPACKAGE_DIRECTORY_NAME = "venues"
+GEOPACKAGE_SIDECAR_SUFFIXES = ("-wal", "-shm", "-journal")
+
+
+def _sanitize_table_name(name: str) -> str:
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    name = re.sub(r"[^a-z0-9_]", "_", name.lower())
+    name = re.sub(r"_+", "_", name)
+
+    return name.strip("_") or "layer"
+
+
+def venue_geopackage_path(solution: Solution, venue: Venue) -> Optional[Path]:
+    """
+    A new GeoPackage for a download of the venue, in the plugin app data dir. Every download gets its own file,
+    so GeoPackages of venues that are still open in the project are never overwritten. Older GeoPackages of the
+    venue beyond VENUE_GEOPACKAGES_TO_KEEP are pruned first.
+
+    :param solution:
+    :param venue:
+    :return: None if the plugin app dir is not available
+    """
+    if PROJECT_APP_PATH is None:
+        return None
+
+    directory = (
+        Path(PROJECT_APP_PATH.user_data)
+        / VENUE_GEOPACKAGE_DIRECTORY_NAME
+        / _sanitize_table_name(str(solution.external_id))
+    )
+    directory.mkdir(parents=True, exist_ok=True)
+
+    venue_name = _sanitize_table_name(str(venue.admin_id))
+
+    prune_venue_geopackages(
+        directory,
+        venue_name,
+        keep=max(int(read_float_setting("VENUE_GEOPACKAGES_TO_KEEP")) - 1, 0),
+    )
+
+    # The random suffix keeps downloads within the same second apart
+    return (
+        directory
+        / f"{venue_name}_{time.strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:8]}.gpkg"
+    )
+
+
+def project_data_sources() -> Set[Path]:
+    """
+    The files the layers of the project read from
+
+    :return:
+    """
+    return {
+        Path(layer.source().split("|")[0]).resolve()
+        for layer in QgsProject.instance().mapLayers().values()
+        if layer.source()
+    }
+
+
+def prune_venue_geopackages(directory: Path, venue_name: str, keep: int) -> int:
+    """
+    Deletes the GeoPackages of the venue in the directory, except the newest ones and those a layer of the project
+    reads from
+
+    :param directory:
+    :param venue_name:
+    :param keep: Number of the newest GeoPackages to keep
+    :return: Number of deleted GeoPackages
+    """
+    name_pattern = re.compile(
+        rf"{re.escape(venue_name)}_\d{{8}}T\d{{6}}(_[0-9a-f]{{8}})?\.gpkg"
+    )  # Not the GeoPackages of other venues whose names start with this one
+
+    geopackages = sorted(
+        (p for p in directory.glob("*.gpkg") if name_pattern.fullmatch(p.name)),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    if len(geopackages) <= keep:
+        return 0
+
+    in_use = project_data_sources()
+
+    num_deleted = 0
+    for geopackage in geopackages[keep:]:
+        if geopackage.resolve() in in_use:
+            continue
+
+        try:
+            for sidecar_suffix in GEOPACKAGE_SIDECAR_SUFFIXES:
+                geopackage.with_name(geopackage.name + sidecar_suffix).unlink(
+                    missing_ok=True
+                )
+            geopackage.unlink()
+            num_deleted += 1
+        except OSError as e:
+            logger.warning(f"Could not delete {geopackage}: {e}")
+
+    if num_deleted:
+        logger.info(f"Deleted {num_deleted} old GeoPackages of {venue_name}")
+
+    return num_deleted
+
+
+def layer_table_name(layer_tree_layer: Any, root_group: Any) -> str:
+    """
+    The names of the groups between the root group and the layer, and the layer name, e.g. one table per floor
+    and entity type
+
+    :param layer_tree_layer:
+    :param root_group:
+    :return:
+    """
+    names = [layer_tree_layer.name()]
+
+    parent = layer_tree_layer.parent()
+    while parent is not None and parent is not root_group:
+        names.append(parent.name())
+        parent = parent.parent()
+
+    return _sanitize_table_name("_".join(reversed(names)))
+
+
+def store_group_layers_in_geopackage(group: QgsLayerTreeGroup, path: Path) -> int:
+    """
+    Writes every memory layer below the group to a table of the GeoPackage, with a spatial index,
+    and switches the layer to read from it. The layer keeps its id, symbology, labels and field configuration.
+    Layers that cannot be written are left as memory layers.
+
+    :param group:
+    :param path:
+    :return: Number of layers moved to the GeoPackage
+    """
+    transform_context = QgsProject.instance().transformContext()
+    provider_options = QgsDataProvider.ProviderOptions()
+    provider_options.transformContext = transform_context
+
+    table_names: Dict[str, int] = {}
+    num_stored = 0
+
+    for layer_tree_layer in group.findLayers():
+        layer = layer_tree_layer.layer()
+        if (
+            not isinstance(layer, QgsVectorLayer)
+            or layer.providerType() != "memory"
+            or layer.isEditable()
+        ):
+            continue
+
+        table_name = layer_table_name(layer_tree_layer, group)
+        if table_name in table_names:  # Same names within a group
+            table_names[table_name] += 1
+            table_name = f"{table_name}_{table_names[table_name]}"
+        else:
+            table_names[table_name] = 0
+
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = "GPKG"
+        options.layerName = table_name
+        options.fileEncoding = "UTF-8"
+        options.layerOptions = ["SPATIAL_INDEX=YES", f"FID={GEOPACKAGE_FID_COLUMN}"]
+        options.actionOnExistingFile = (
+            QgsVectorFileWriter.CreateOrOverwriteLayer
+            if path.exists()
+            else QgsVectorFileWriter.CreateOrOverwriteFile
+        )
+
+        error, error_message, *_ = QgsVectorFileWriter.writeAsVectorFormatV3(
+            layer, str(path), transform_context, options
+        )
+
+        if error != QgsVectorFileWriter.NoError:
+            logger.warning(
+                f"Could not store {layer.name()} in {path}, keeping it in memory: {error_message}"
+            )
+            continue
+
+        uri = f"{path}|layername={table_name}"
+        if not QgsVectorLayer(uri, table_name, "ogr").isValid():
+            logger.warning(
+                f"Could not load {table_name} from {path}, keeping it in memory"
+            )
+            continue
+
+        layer.setDataSource(uri, layer.name(), "ogr", provider_options)
+
+        num_stored += 1
+
+    logger.info(f"Stored {num_stored} layers of {group.name()} in {path}")
+
+    return num_stored
@@ -1,12 +1,12 @@
 import logging
 import typing
-from typing import Optional
+from typing import Dict, Optional, Sequence, Tuple, Union
 
 import numpy
 import pyproj
 import shapely
 import shapely.geometry
-from geopandas import GeoDataFrame
+from geopandas import GeoDataFrame, GeoSeries
 
 from jord.shapely_utilities import clean_shape
 from mi_companion.configuration import read_bool_setting
@@ -32,6 +32,14 @@ __all__ = [
     "get_target_crs_auth_id",
     "forward_project_qgis",
     "back_project_qgis",
+    "forward_project_geoms_qgis",
+    "back_project_geoms_qgis",
+    "prepare_geoms_for_mi_db_qgis",
+    "prepare_geoms_for_editing_qgis",
+    "get_cached_transformer",
+    "clear_projection_cache",
+    "add_projection_cache_invalidation_listener",
+    "remove_projection_cache_invalidation_listener",
 ]
 
 
@@ -43,29 +51,84 @@ __all__ = [
 
 logger = logging.getLogger(__name__)
 
+GeometryBatch = Union[Sequence[shapely.geometry.base.BaseGeometry], GeoSeries]
 
-def get_back_projection_qgis() -> typing.Callable:
+TRANSFORMER_CACHE: Dict[Tuple[str, str], pyproj.Transformer] = {}
+TARGET_CRS_CACHE: Dict[str, typing.Any] = {}
+
+
+def clear_projection_cache() -> None:
     """
+    Forget all cached transformers and the cached project crs, called when the QgsProject crs changes
 
     :return:
     """
-    destination_crs = pyproj.CRS(get_target_crs_auth_id())
+    TRANSFORMER_CACHE.clear()
+    TARGET_CRS_CACHE.clear()
 
-    return pyproj.Transformer.from_crs(
-        destination_crs, MI_CRS, always_xy=True
-    ).transform
 
+def add_projection_cache_invalidation_listener() -> None:
+    """
 
-def get_forward_projection_qgis() -> typing.Callable:
+    :return:
+    """
+    # noinspection PyUnresolvedReferences
+    from qgis.core import QgsProject
+
+    remove_projection_cache_invalidation_listener()
+
+    QgsProject.instance().crsChanged.connect(clear_projection_cache)
+
+
+def remove_projection_cache_invalidation_listener() -> None:
+    """
+
+    :return:
+    """
+    # noinspection PyUnresolvedReferences
+    from qgis.core import QgsProject
+
+    try:
+        QgsProject.instance().crsChanged.disconnect(clear_projection_cache)
+    except (TypeError, RuntimeError):
+        ...
+
+
+def get_cached_transformer(source_crs: str, target_crs: str) -> pyproj.Transformer:
+    """
+    Building a pyproj Transformer is expensive, so one is kept per (source, target) pair
+
+    :param source_crs: Auth id of the source crs
+    :param target_crs: Auth id of the target crs
+    :return:
+    """
+    key = (source_crs, target_crs)
+
+    transformer = TRANSFORMER_CACHE.get(key)
+    if transformer is None:
+        transformer = TRANSFORMER_CACHE[key] = pyproj.Transformer.from_crs(
+            MI_CRS if source_crs == MI_CRS_AUTHID else pyproj.CRS(source_crs),
+            MI_CRS if target_crs == MI_CRS_AUTHID else pyproj.CRS(target_crs),
+            always_xy=True,
+        )
+
+    return transformer
+
+
+def get_back_projection_qgis() -> typing.Callable:
     """
 
     :return:
     """
-    destination_crs = pyproj.CRS(get_target_crs_auth_id())
+    return get_cached_transformer(get_target_crs_auth_id(), MI_CRS_AUTHID).transform
 
-    return pyproj.Transformer.from_crs(
-        MI_CRS, destination_crs, always_xy=True
-    ).transform
+
+def get_forward_projection_qgis() -> typing.Callable:
+    """
+
+    :return:
+    """
+    return get_cached_transformer(MI_CRS_AUTHID, get_target_crs_auth_id()).transform
 
 
 def back_project_qgis(
@@ -90,6 +153,68 @@ def forward_project_qgis(
     return geom
 
 
+def transform_geoms(
+    geoms: GeometryBatch, transformer: pyproj.Transformer
+) -> GeometryBatch:
+    """
+    Reprojects all coordinates of all geometries with a single vectorized transformer call per dimensionality.
+
+    :param geoms:
+    :param transformer:
+    :return: The same kind of container as given, a GeoSeries keeps its index
+    """
+    geom_array = numpy.asarray(
+        geoms.values if isinstance(geoms, GeoSeries) else geoms, dtype=object
+    )
+
+    def transform_xy(coords: numpy.ndarray) -> numpy.ndarray:
+        return numpy.column_stack(transformer.transform(coords[:, 0], coords[:, 1]))
+
+    def transform_xyz(coords: numpy.ndarray) -> numpy.ndarray:
+        return numpy.column_stack(
+            transformer.transform(coords[:, 0], coords[:, 1], coords[:, 2])
+        )
+
+    result = geom_array.copy()
+
+    has_z = shapely.has_z(geom_array)
+    if has_z.any():  # Keep z only on the geometries that had it
+        result[has_z] = shapely.transform(
+            geom_array[has_z], transform_xyz, include_z=True
+        )
+
+    flat = ~has_z
+    if flat.any():
+        result[flat] = shapely.transform(geom_array[flat], transform_xy)
+
+    if isinstance(geoms, GeoSeries):
+        return GeoSeries(result, index=geoms.index, crs=geoms.crs)
+
+    return list(result)
+
+
+def back_project_geoms_qgis(geoms: GeometryBatch) -> GeometryBatch:
+    """
+
+    :param geoms:
+    :return:
+    """
+    return transform_geoms(
+        geoms, get_cached_transformer(get_target_crs_auth_id(), MI_CRS_AUTHID)
+    )
+
+
+def forward_project_geoms_qgis(geoms: GeometryBatch) -> GeometryBatch:
+    """
+
+    :param geoms:
+    :return:
+    """
+    return transform_geoms(
+        geoms, get_cached_transformer(MI_CRS_AUTHID, get_target_crs_auth_id())
+    )
+
+
 def should_reproject_qgis() -> bool:
     """
 
@@ -120,8 +245,8 @@ def any_infinite_coords(geom_shapely: shapely.geometry.base.BaseGeometry) -> boo
     :param geom_shapely:
     :return:
     """
-    coords = numpy.array(shapely.get_coordinates(geom_shapely))
-    if any(not numpy.isfinite(coord) for coord in coords.flatten()):
+    coords = shapely.get_coordinates(geom_shapely)
+    if not numpy.isfinite(coords).all():
 
         logger.warning("Reprojection resulted in infinite coordinates")
         return True
@@ -253,6 +378,70 @@ def prepare_geom_for_editing_qgis(
     return geom_shapely
 
 
+def prepare_geoms_for_mi_db_qgis(
+    geoms: GeometryBatch, clean: bool = True
+) -> GeometryBatch:
+    """
+    Batch variant of prepare_geom_for_mi_db_qgis, reprojects all geometries at once
+
+    :param geoms:
+    :param clean:
+    :return:
+    """
+    if should_reproject_qgis():
+        geoms = back_project_geoms_qgis(geoms)
+
+    geom_list = list(geoms)
+
+    if any_infinite_coords(geom_list):
+        raise InvalidReprojection(
+            f"Reproject of {len(geom_list)} geometries resulted in some coordinates becoming infinity, please check you coordinate systems"
+        )
+
+    if not is_valid_lon_lat_fast(geom_list):
+        raise InvalidReprojection(
+            f"Reprojection of {len(geom_list)} geometries resulted in coordinates outside valid longitude/latitude range"
+        )
+
+    if clean:
+        return _with_values(geoms, [clean_shape(g) for g in geom_list])
+
+    return geoms
+
+
+def prepare_geoms_for_editing_qgis(
+    geoms: GeometryBatch, clean: bool = True
+) -> GeometryBatch:
+    """
+    Batch variant of prepare_geom_for_editing_qgis, reprojects all geometries at once
+
+    :param geoms:
+    :param clean:
+    :return:
+    """
+    if should_reproject_qgis():
+        geoms = forward_project_geoms_qgis(geoms)
+
+    geom_list = list(geoms)
+
+    if any_infinite_coords(geom_list):
+        raise InvalidReprojection(
+            f"Reproject of {len(geom_list)} geometries resulted in some coordinates becoming infinity, please check you coordinate systems"
+        )
+
+    if clean:
+        return _with_values(geoms, [clean_shape(g) for g in geom_list])
+
+    return geoms
+
+
+def _with_values(geoms: GeometryBatch, values: list) -> GeometryBatch:
+    if isinstance(geoms, GeoSeries):
+        return GeoSeries(values, index=geoms.index, crs=geoms.crs)
+
+    return values
+
+
 def reproject_geometry_df_qgis(df: GeoDataFrame) -> GeoDataFrame:
     """
 
@@ -307,11 +496,16 @@ def get_target_crs_auth_id() -> str:
 
     :return:
     """
-    if should_reproject_to_project_qgis:
-        # noinspection PyUnresolvedReferences
-        from qgis.core import QgsProject
+    if should_reproject_to_project_qgis():
+        target_crs = TARGET_CRS_CACHE.get("authid")
+
+        if target_crs is None:
+            # noinspection PyUnresolvedReferences
+            from qgis.core import QgsProject
 
-        target_crs = QgsProject.instance().crs().authid()
+            target_crs = TARGET_CRS_CACHE["authid"] = (
+                QgsProject.instance().crs().authid()
+            )
     else:
         target_crs = EDITING_CRS_AUTHID
 
@@ -323,7 +517,7 @@ def get_target_crs_srsid() -> int:
 
     :return:
     """
-    if should_reproject_to_project_qgis:
+    if should_reproject_to_project_qgis():
         # noinspection PyUnresolvedReferences
         from qgis.core import QgsProject
 
@@ -1,4 +1,6 @@
 from .anchor_symbol import *
+from .fill_color import *
+from .location_layer_styling import *
 from .location_styling import *
 from .raster_symbol import *
 from .svg_symbol import *
@@ -0,0 +1,81 @@
+import logging
+from typing import Optional
+
+import numpy
+import pandas
+
+# noinspection PyUnresolvedReferences
+from qgis.PyQt.QtGui import QColor
+
+# noinspection PyUnresolvedReferences
+from qgis.core import QgsProperty
+
+__all__ = [
+    "FILL_COLOR_FIELD_NAME",
+    "FILL_COLOR_DEFAULT_EXPRESSION",
+    "FILL_COLOR_PROPERTY",
+    "display_rule_fill_color_column",
+]
+
+logger = logging.getLogger(__name__)
+
+FILL_COLOR_SOURCE_FIELD_NAME = "display_rule.polygon.fill_color"
+FILL_OPACITY_SOURCE_FIELD_NAME = "display_rule.polygon.fill_opacity"
+
+# Not prefixed with display_rule., so it is not read back into the solution on upload
+FILL_COLOR_FIELD_NAME = "fill_rgba"
+
+# Keeps the field in sync when either source field is edited, same result as display_rule_fill_color_column
+FILL_COLOR_DEFAULT_EXPRESSION = f"""
+set_color_part(
+  "{FILL_COLOR_SOURCE_FIELD_NAME}",
+  'alpha',
+  round(clamp(0, coalesce("{FILL_OPACITY_SOURCE_FIELD_NAME}", 1), 1) * 255)
+)
+"""
+
+# A NULL field value leaves the colour of the symbol
+FILL_COLOR_PROPERTY = QgsProperty.fromField(FILL_COLOR_FIELD_NAME)
+
+
+def _rgb(value: str) -> Optional[str]:
+    """
+
+    :param value: A colour string as QColor reads it, like #RRGGBB or a colour name
+    :return: "r,g,b" or None if not a colour
+    """
+    color = QColor(value)
+    if not color.isValid():
+        return None
+
+    return f"{color.red()},{color.green()},{color.blue()}"
+
+
+def display_rule_fill_color_column(df: pandas.DataFrame) -> Optional[pandas.Series]:
+    """
+    The effective fill colour of every row as an "r,g,b,a" colour string, the fill colour of the display rule with
+    the fill opacity of the display rule as alpha. Computed for all rows at once, instead of a data defined
+    expression evaluating it for every feature on every repaint. Only the distinct fill colours are parsed.
+
+    :param df:
+    :return: None if the frame has no fill colour column, None for rows without a valid fill colour
+    """
+    if FILL_COLOR_SOURCE_FIELD_NAME not in df:
+        return None
+
+    fill_colors = df[FILL_COLOR_SOURCE_FIELD_NAME].fillna("").astype(str).str.strip()
+    rgb = fill_colors.map({u: _rgb(u) for u in fill_colors.unique()})
+
+    opacity = pandas.Series(1.0, index=df.index)
+    if FILL_OPACITY_SOURCE_FIELD_NAME in df:
+        opacity = pandas.to_numeric(
+            df[FILL_OPACITY_SOURCE_FIELD_NAME], errors="coerce"
+        ).fillna(1.0)
+
+    alpha = numpy.floor(opacity.clip(0.0, 1.0) * 255 + 0.5).astype(int)  # Half up
+
+    has_rgb = rgb.notna()
+    fill_rgba = pandas.Series(None, index=df.index, dtype=object)
+    fill_rgba[has_rgb] = rgb[has_rgb] + "," + alpha[has_rgb].astype(str)
+
+    return fill_rgba
@@ -0,0 +1,324 @@
+import logging
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# noinspection PyUnresolvedReferences
+from qgis.PyQt.QtCore import QVariant
+
+# noinspection PyUnresolvedReferences
+from qgis.PyQt.QtGui import QColor
+
+# noinspection PyUnresolvedReferences
+from qgis.core import (
+    NULL,
+    QgsCategorizedSymbolRenderer,
+    QgsProject,
+    QgsRendererCategory,
+    QgsSymbol,
+    QgsSymbolLayer,
+    QgsWkbTypes,
+)
+
+from jord.qgis_utilities import set_3d_view_settings, set_label_styling
+from mi_companion.configuration import read_bool_setting
+from mi_companion.qgis_utilities import (
+    LOCATION_TYPE_LOOKUP_CACHE,
+    flatten_layers,
+    get_cached_lookup_field_expression,
+    get_materialized_lookup_field_expression,
+)
+from .fill_color import FILL_COLOR_PROPERTY
+from .raster_symbol import add_raster_with_geometry_generator
+from .svg_symbol import add_svg_with_geometry_generator
+
+__all__ = ["LocationLayerStyling"]
+
+logger = logging.getLogger(__name__)
+
+FILL_COLOR_KEY = "display_rule.polygon.fillColor"  # As read by styled_field_value_categorised of jord
+KEY_FIELD_NAME = "admin_id"
+FALLBACK_LAYER_NAME = "solution_config"
+
+LOOKUP_FIELD_NAMES = {
+    "model2d_lookup_expression": "display_rule.model2d.model",
+    "height_lookup_expression": "display_rule.model2d.height_meters",
+    "width_lookup_expression": "display_rule.model2d.width_meters",
+    "bearing_lookup_expression": "display_rule.model2d.bearing",
+}
+
+
+class LocationLayerStyling:
+    """
+    Styles room, area and POI layers like styled_field_value_categorised, add_raster_symbol, add_svg_symbol,
+    set_label_styling and set_3d_view_settings would, but builds the category symbols, with their raster and SVG
+    geometry generators, the labeling and the 3D renderers once per solution and gives every layer clones of them.
+
+    The model2d, width, height and bearing lookups of the raster and SVG symbols are not evaluated against the
+    location type layer at render time. With MATERIALIZE_LOCATION_TYPE_LOOKUPS the values of each location type are
+    baked into the symbol of its category, and the default category, as well as every category without the setting,
+    looks them up through the cached mi_location_type_attribute expression function.
+    When the location type layer changes, the categories of the styled layers still in the project are rebuilt.
+    Polygon categories fill a location with its precomputed display rule fill colour field, if it has one.
+
+    Build it once the location type reference layer exists, it is read into the lookup cache right away.
+    """
+
+    def __init__(
+        self,
+        location_type_ref_layer: Optional[Any] = None,
+        *,
+        field_name: str = "location_type",
+        label_field_name: str = "translations.en.name",
+    ):
+        """
+
+        :param location_type_ref_layer: Layer of the location types, keyed by admin_id
+        :param field_name: Field of the location layers referencing a location type
+        :param label_field_name: Field of the location type layer the categories are labelled with
+        """
+        self.location_type_ref_layer_id = None
+        if location_type_ref_layer is not None:
+            self.location_type_ref_layer_id = location_type_ref_layer.id()
+            LOCATION_TYPE_LOOKUP_CACHE.ensure_primed(
+                location_type_ref_layer, KEY_FIELD_NAME
+            )
+            LOCATION_TYPE_LOOKUP_CACHE.ensure_fallback_primed(FALLBACK_LAYER_NAME)
+            LOCATION_TYPE_LOOKUP_CACHE.add_listener(
+                self.location_type_ref_layer_id, self.on_location_types_changed
+            )
+
+        self.field_name = field_name
+        self.label_field_name = label_field_name
+
+        self._location_type_styles: Optional[
+            Dict[Hashable, Tuple[str, Optional[str]]]
+        ] = None
+        self._lookup_expressions: Optional[Dict[str, str]] = None
+        self._category_symbols: Dict[Tuple[Any, Hashable], Any] = {}
+        self._labelings: Dict[Hashable, Any] = {}
+        self._renderers_3d: Dict[Hashable, Any] = {}
+        self._styled_layer_ids: Dict[str, None] = {}  # Ordered set
+
+    def location_type_styles(self) -> Dict[Hashable, Tuple[str, Optional[str]]]:
+        """
+
+        :return: Label and fill colour of every location type, by admin_id
+        """
+        if self._location_type_styles is None:
+            self._location_type_styles = {}
+
+            for admin_id, attributes in self._location_types().items():
+                label = attributes.get(self.label_field_name, admin_id)
+
+                fill_color = None
+                if "#" in str(attributes.get(FILL_COLOR_KEY)):
+                    fill_color = str(attributes[FILL_COLOR_KEY])
+
+                self._location_type_styles[admin_id] = (str(label), fill_color)
+
+        return self._location_type_styles
+
+    def _location_types(self) -> Dict[Hashable, Dict[str, Any]]:
+        if self.location_type_ref_layer_id is None:
+            return {}
+
+        return LOCATION_TYPE_LOOKUP_CACHE.table(
+            self.location_type_ref_layer_id, KEY_FIELD_NAME
+        )
+
+    def lookup_expressions(
+        self, layer: Any, location_type: Optional[Hashable] = None
+    ) -> Dict[str, str]:
+        """
+        The model2d lookup expressions of add_raster_symbol and add_svg_symbol. For a location type with
+        MATERIALIZE_LOCATION_TYPE_LOOKUPS, the values of the location type are baked in. Otherwise they look the
+        values up through the cached expression function. Those only depend on the location type widget, which all
+        location layers of a solution share, so they are built from the first layer.
+
+        :param layer:
+        :param location_type: None for the default category
+        :return:
+        """
+        if location_type is not None and read_bool_setting(
+            "MATERIALIZE_LOCATION_TYPE_LOOKUPS"
+        ):
+            return {
+                expression_name: get_materialized_lookup_field_expression(
+                    look_up_field_name,
+                    LOCATION_TYPE_LOOKUP_CACHE.value(
+                        self.location_type_ref_layer_id,
+                        KEY_FIELD_NAME,
+                        location_type,
+                        look_up_field_name,
+                        FALLBACK_LAYER_NAME,
+                    ),
+                )
+                for expression_name, look_up_field_name in LOOKUP_FIELD_NAMES.items()
+            }
+
+        if self._lookup_expressions is None:
+            self._lookup_expressions = {
+                expression_name: get_cached_lookup_field_expression(
+                    layer,
+                    look_up_field_name=look_up_field_name,
+                    second_level_referenced_field_name=KEY_FIELD_NAME,
+                    fallback_layer_name=FALLBACK_LAYER_NAME,
+                    referenced_layer_id=self.location_type_ref_layer_id,
+                )
+                for expression_name, look_up_field_name in LOOKUP_FIELD_NAMES.items()
+            }
+
+        return self._lookup_expressions
+
+    def category_symbol(self, layer: Any, location_type: Hashable) -> Any:
+        """
+        The cached symbol of a location type for the geometry type of the layer, None is the default category.
+        Clone it before handing it to a renderer.
+
+        :param layer:
+        :param location_type:
+        :return:
+        """
+        key = (layer.geometryType(), location_type)
+
+        if key not in self._category_symbols:
+            symbol = QgsSymbol.defaultSymbol(layer.geometryType())
+
+            if location_type is not None:
+                _, fill_color = self.location_type_styles().get(
+                    location_type, (None, None)
+                )
+                if fill_color is not None:
+                    symbol.setColor(QColor(fill_color))
+
+            if layer.geometryType() == QgsWkbTypes.PolygonGeometry:
+                symbol.symbolLayer(0).setDataDefinedProperty(
+                    QgsSymbolLayer.PropertyFillColor, FILL_COLOR_PROPERTY
+                )  # The precomputed display rule fill colour of a location, if it has one
+
+            if read_bool_setting("ADD_SVG_AND_RASTER_SYMBOLS"):
+                lookup_expressions = self.lookup_expressions(layer, location_type)
+                add_raster_with_geometry_generator(symbol, **lookup_expressions)
+                add_svg_with_geometry_generator(symbol, **lookup_expressions)
+
+            self._category_symbols[key] = symbol
+
+        return self._category_symbols[key]
+
+    def on_location_types_changed(self) -> None:
+        """
+        Rebuilds the categories of the styled layers that are still in the project, so they pick up added location
+        types and changed colours and baked in lookup values. Stops listening once none are left.
+
+        :return:
+        """
+        self._location_type_styles = None
+        self._category_symbols = {}
+
+        project = QgsProject.instance()
+        layers = [
+            project.mapLayer(layer_id)
+            for layer_id in self._styled_layer_ids
+            if project.mapLayer(layer_id) is not None
+        ]
+
+        if self._styled_layer_ids and not layers:
+            LOCATION_TYPE_LOOKUP_CACHE.remove_listener(
+                self.location_type_ref_layer_id, self.on_location_types_changed
+            )
+
+        self._styled_layer_ids = {}
+        self.apply_renderer(layers)
+
+    def apply_renderer(self, layers: Any) -> None:
+        """
+        Categorises the layers by location type, with a category for each location type present in the layer and
+        a default category
+
+        :param layers:
+        :return:
+        """
+        location_type_styles = self.location_type_styles()
+
+        for layer in flatten_layers(layers):
+            field_index = layer.fields().indexFromName(self.field_name)
+            if field_index < 0:
+                continue
+
+            location_types = [
+                location_type
+                for location_type in layer.uniqueValues(field_index)
+                if location_type is not None and location_type != NULL
+            ]
+
+            categories = []
+            for location_type in sorted(location_types, key=str):
+                label, _ = location_type_styles.get(
+                    location_type, (str(location_type), None)
+                )
+                categories.append(
+                    QgsRendererCategory(
+                        QVariant(location_type),
+                        symbol=self.category_symbol(layer, location_type).clone(),
+                        label=label,
+                        render=True,
+                        uuid=str(location_type),
+                    )
+                )
+
+            categories.append(
+                QgsRendererCategory(
+                    QVariant(None),
+                    symbol=self.category_symbol(layer, None).clone(),
+                    label="",
+                    render=True,
+                )
+            )
+
+            layer.setRenderer(QgsCategorizedSymbolRenderer(self.field_name, categories))
+            layer.triggerRepaint()
+
+            self._styled_layer_ids[layer.id()] = None
+
+    def apply_labeling(self, layers: Any, **label_kwargs: Any) -> None:
+        """
+        Labels the layers as set_label_styling with the same keyword arguments would
+
+        :param layers:
+        :param label_kwargs: Passed to set_label_styling
+        :return:
+        """
+        key = tuple(sorted(label_kwargs.items()))
+
+        for layer in flatten_layers(layers):
+            labeling = self._labelings.get(key)
+
+            if labeling is None:
+                set_label_styling([layer], **label_kwargs)
+                if layer.labeling() is not None:
+                    self._labelings[key] = layer.labeling().clone()
+                continue
+
+            layer.setLabelsEnabled(True)
+            layer.setLabeling(labeling.clone())
+            layer.triggerRepaint()
+
+    def apply_3d_view_settings(self, layers: Any, **view_kwargs: Any) -> None:
+        """
+        Sets the 3D renderer of the layers as set_3d_view_settings with the same keyword arguments would
+
+        :param layers:
+        :param view_kwargs: Passed to set_3d_view_settings
+        :return:
+        """
+        for layer in flatten_layers(layers):
+            key = (layer.geometryType(), *sorted(view_kwargs.items()))
+            renderer_3d = self._renderers_3d.get(key)
+
+            if renderer_3d is None:
+                set_3d_view_settings([layer], **view_kwargs)
+                if layer.renderer3D() is not None:
+                    self._renderers_3d[key] = layer.renderer3D().clone()
+                continue
+
+            layer.setRenderer3D(renderer_3d.clone())
+            layer.triggerRepaint()
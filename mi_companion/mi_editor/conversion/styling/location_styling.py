@@ -45,9 +45,7 @@ from .anchor_symbol import (
     make_anchor_symbology_layer,
     make_rot_and_sca_symbology_layer,
 )
-from mi_companion.qgis_utilities import (
-    HEX_COLOR_POLY_FILL_EXPRESSION,
-)
+from .fill_color import FILL_COLOR_PROPERTY
 
 
 logger = logging.getLogger(__name__)
@@ -282,7 +280,7 @@ def make_display_rule_styled_symbol():
     symbol_layer = special_symbol.symbolLayer(0)
     # Set data-defined properties for colors
     symbol_layer.setDataDefinedProperty(
-        QgsSymbolLayer.PropertyFillColor, HEX_COLOR_POLY_FILL_EXPRESSION
+        QgsSymbolLayer.PropertyFillColor, FILL_COLOR_PROPERTY
     )
     symbol_layer.setDataDefinedProperty(
         QgsSymbolLayer.PropertyStrokeColor,
@@ -34,7 +34,7 @@ from qgis.utils import iface
 from mi_companion.configuration import read_bool_setting
 from mi_companion.qgis_utilities import (
     ANCHOR_GEOMETRY_GENERATOR_EXPRESSION,
-    get_hierarchical_lookup_field_expression,
+    get_cached_lookup_field_expression,
 )
 
 logger = logging.getLogger(__name__)
@@ -193,14 +193,14 @@ def add_svg_symbol(layers: Iterable[Any]) -> None:
 
         modified = False
 
-        model2d_lookup_expression = get_hierarchical_lookup_field_expression(layer)
-        height_lookup_expression = get_hierarchical_lookup_field_expression(
+        model2d_lookup_expression = get_cached_lookup_field_expression(layer)
+        height_lookup_expression = get_cached_lookup_field_expression(
             layer, look_up_field_name="display_rule.model2d.height_meters"
         )
-        width_lookup_expression = get_hierarchical_lookup_field_expression(
+        width_lookup_expression = get_cached_lookup_field_expression(
             layer, look_up_field_name="display_rule.model2d.width_meters"
         )
-        bearing_lookup_expression = get_hierarchical_lookup_field_expression(
+        bearing_lookup_expression = get_cached_lookup_field_expression(
             layer, look_up_field_name="display_rule.model2d.bearing"
         )
 
@@ -1,3 +1,4 @@
+from .change_tracking import *
 from .hierarchy_model import *
 from .hierarchy_utilities import *
 from .hierarchy_validation import *
@@ -0,0 +1,232 @@
+import logging
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+# noinspection PyUnresolvedReferences
+from qgis.core import QgsProject, QgsVectorLayer
+
+from jord.qgis_utilities import disconnect_signal, reconnect_signal
+from sync_module.model import Solution
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "SolutionSnapshot",
+    "track_layer_changes",
+    "mark_layer_changed",
+    "unchanged_layer_snapshot",
+    "has_changed_layers",
+    "add_layer_change_listener",
+    "remove_layer_change_listener",
+]
+
+LAYER_CHANGE_SIGNALS = (
+    "featureAdded",  # Edit buffer
+    "featureDeleted",
+    "attributeValueChanged",
+    "geometryChanged",
+    "attributeAdded",
+    "attributeDeleted",
+    "committedFeaturesAdded",  # Committed edits
+    "committedFeaturesRemoved",
+    "committedAttributeValuesChanges",
+    "committedGeometriesChanges",
+    "dataChanged",  # Provider side changes and reloads
+)
+PROVIDER_CHANGE_SIGNALS = ("dataChanged",)  # Edits made directly on the data provider
+
+
+class SolutionSnapshot:
+    """
+    The solution a set of layers was populated from, its collections are indexed by admin id on first use
+    """
+
+    def __init__(self, solution: Solution):
+        self.solution = solution
+        self._admin_id_indices: Dict[str, Dict[str, Any]] = {}
+
+    def by_admin_id(self, collection_name: str) -> Dict[str, Any]:
+        """
+
+        :param collection_name: Name of the collection on the solution, e.g. "rooms" or "doors"
+        :return:
+        """
+        if collection_name not in self._admin_id_indices:
+            collection = getattr(self.solution, collection_name, None)
+
+            self._admin_id_indices[collection_name] = (
+                {item.admin_id: item for item in collection if item is not None}
+                if collection
+                else {}
+            )
+
+        return self._admin_id_indices[collection_name]
+
+
+LAYER_SNAPSHOTS: Dict[str, SolutionSnapshot] = {}
+CHANGED_LAYER_IDS: Set[str] = set()
+LAYER_CHANGE_HANDLERS: Dict[str, Callable] = {}
+LAYER_TREE_PATHS: Dict[str, Tuple[str, ...]] = {}
+LAYER_FEATURE_COUNTS: Dict[str, int] = {}
+
+
+def mark_layer_changed(layer_id: str, *_) -> None:
+    CHANGED_LAYER_IDS.add(layer_id)
+
+
+def layer_tree_path(
+    layer_tree_layer: Any, *, below: Optional[Any] = None, depth: Optional[int] = None
+) -> Tuple[str, ...]:
+    """
+    Names of the layer tree node and its ancestors, innermost first
+
+    :param layer_tree_layer:
+    :param below: Stop before this group
+    :param depth: Stop after this many names
+    :return:
+    """
+    names = []
+
+    node = layer_tree_layer
+    while node is not None and node != below and (depth is None or len(names) < depth):
+        names.append(node.name())
+        node = node.parent()
+
+    return tuple(names)
+
+
+def _provider_signals(layer: Any) -> Iterable[Any]:
+    provider = layer.dataProvider()
+    if provider is None:
+        return ()
+
+    return tuple(
+        getattr(provider, signal_name) for signal_name in PROVIDER_CHANGE_SIGNALS
+    )
+
+
+def track_layer_changes(group: Any, solution: Solution) -> None:
+    """
+    Records the solution the vector layers of the group were just populated from and marks them as unchanged.
+    From then on any edit, commit or provider side change of a layer marks it as changed, as does moving it to
+    another place in the group, for instance another floor, or a changed feature count.
+
+    :param group: Layer tree group, for instance a venue group
+    :param solution:
+    :return:
+    """
+    snapshot = SolutionSnapshot(solution)
+
+    for layer_tree_layer in group.findLayers():
+        layer = layer_tree_layer.layer()
+        if not isinstance(layer, QgsVectorLayer):
+            continue
+
+        layer_id = layer.id()
+
+        if layer_id not in LAYER_CHANGE_HANDLERS:
+            handler = partial(mark_layer_changed, layer_id)
+            for signal_name in LAYER_CHANGE_SIGNALS:
+                getattr(layer, signal_name).connect(handler)
+            for signal in _provider_signals(layer):
+                signal.connect(handler)
+            LAYER_CHANGE_HANDLERS[layer_id] = handler
+
+        LAYER_SNAPSHOTS[layer_id] = snapshot
+        LAYER_TREE_PATHS[layer_id] = layer_tree_path(layer_tree_layer, below=group)
+        LAYER_FEATURE_COUNTS[layer_id] = layer.featureCount()
+        CHANGED_LAYER_IDS.discard(layer_id)
+
+
+def unchanged_layer_snapshot(
+    layer: Any, layer_tree_layer: Optional[Any] = None
+) -> Optional[SolutionSnapshot]:
+    """
+    The snapshot of the solution the layer was populated from, if the layer has not changed since
+
+    :param layer:
+    :param layer_tree_layer: The node of the layer, if given the layer must also be where it was populated
+    :return: None if the layer is not tracked, has changed, has uncommitted edits or was moved
+    """
+    if layer is None:
+        return None
+
+    layer_id = layer.id()
+
+    if layer_id in CHANGED_LAYER_IDS or layer.isModified():
+        return None
+
+    if LAYER_FEATURE_COUNTS.get(layer_id) != layer.featureCount():
+        return None
+
+    if layer_tree_layer is not None:
+        tree_path = LAYER_TREE_PATHS.get(layer_id)
+        if tree_path is None or tree_path != layer_tree_path(
+            layer_tree_layer, depth=len(tree_path)
+        ):
+            return None
+
+    return LAYER_SNAPSHOTS.get(layer_id)
+
+
+def has_changed_layers(group: Any) -> bool:
+    """
+    Whether any vector layer in the group has changed since it was populated, or was never tracked
+
+    :param group:
+    :return:
+    """
+    for layer_tree_layer in group.findLayers():
+        layer = layer_tree_layer.layer()
+        if (
+            isinstance(layer, QgsVectorLayer)
+            and unchanged_layer_snapshot(layer, layer_tree_layer) is None
+        ):
+            return True
+
+    return False
+
+
+def forget_layers(layer_ids: Iterable[str]) -> None:
+    project = QgsProject.instance()
+
+    for layer_id in layer_ids:
+        handler = LAYER_CHANGE_HANDLERS.pop(layer_id, None)
+
+        if handler is not None:
+            layer = project.mapLayer(layer_id)
+            if layer is not None:
+                for signal_name in LAYER_CHANGE_SIGNALS:
+                    disconnect_signal(getattr(layer, signal_name), handler)
+                for signal in _provider_signals(layer):
+                    disconnect_signal(signal, handler)
+
+        LAYER_SNAPSHOTS.pop(layer_id, None)
+        LAYER_TREE_PATHS.pop(layer_id, None)
+        LAYER_FEATURE_COUNTS.pop(layer_id, None)
+        CHANGED_LAYER_IDS.discard(layer_id)
+
+
+def forget_all_layers() -> None:
+    forget_layers(list(LAYER_CHANGE_HANDLERS))
+
+    LAYER_SNAPSHOTS.clear()
+    LAYER_TREE_PATHS.clear()
+    LAYER_FEATURE_COUNTS.clear()
+    CHANGED_LAYER_IDS.clear()
+
+
+def add_layer_change_listener() -> None:
+    project = QgsProject.instance()
+
+    reconnect_signal(project.layersWillBeRemoved, forget_layers, forget_layers)
+    reconnect_signal(project.cleared, forget_all_layers, forget_all_layers)
+
+
+def remove_layer_change_listener() -> None:
+    project = QgsProject.instance()
+
+    disconnect_signal(project.layersWillBeRemoved, forget_layers)
+    disconnect_signal(project.cleared, forget_all_layers)
+
+    forget_all_layers()
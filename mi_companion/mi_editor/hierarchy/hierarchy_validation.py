@@ -1,5 +1,6 @@
 import logging
-from typing import Any, Optional
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional
 
 # noinspection PyUnresolvedReferences
 from qgis.PyQt import QtGui, QtWidgets
@@ -31,6 +32,7 @@ from .hierarchy_utilities import (
     transfer_node_ownership,
 )
 from .validation_dialog_utilities import (
+    collected_validation_messages,
     make_hierarchy_validation_dialog,
     make_temporary_toast,
 )
@@ -40,11 +42,17 @@ logger = logging.getLogger(__name__)
 __all__ = [
     "add_solution_hierarchy_change_listener",
     "remove_solution_hierarchy_change_listener",
+    "suspended_hierarchy_validation",
 ]
 
 PREVIOUS_PARENT = {}
 PREVIOUS_NAME = {}
 
+SUSPENSION_DEPTH = 0
+QUEUED_NODES: List[Any] = []  # Added or renamed while validation was suspended
+
+MAX_SUMMARY_MESSAGES = 20
+
 # NAMES_TO_BE_REMOVED_FROM = defaultdict(list)
 
 
@@ -115,6 +123,11 @@ def hierarchy_change(node, signal_provider=None) -> None:
 
 
 def name_changed(node, new_name) -> None:
+    if SUSPENSION_DEPTH:
+        PREVIOUS_NAME[node] = new_name
+        QUEUED_NODES.append(node)
+        return
+
     result = validate_hierarchy(node)
 
     if result == ValidationResultEnum.rejected:
@@ -152,7 +165,6 @@ def will_remove_children(node, index_from, index_to) -> None:
     for child in existing_children[index_from : index_to + 1]:
         PREVIOUS_PARENT[child.name()] = node
 
-    logger.error([f"{c}:{node.name()}" for c, node in PREVIOUS_PARENT.items()])
     # NAMES_TO_BE_REMOVED_FROM[node.name()] = [child.name() for child in existing_children]
 
 
@@ -166,6 +178,10 @@ def added_children(node, index_from, index_to) -> None:
     if False:
         logger.error(f"{node.name()}, {index_from}, {index_to}, {new_children}")
 
+    if SUSPENSION_DEPTH:
+        QUEUED_NODES.extend(new_children)
+        return
+
     for child in new_children:
         child_name = child.name()
         previous_parent = None
@@ -185,6 +201,88 @@ def added_children(node, index_from, index_to) -> None:
             PREVIOUS_PARENT[child_name] = node
 
 
+def iter_subtree(node: Any) -> Iterator[Any]:
+    yield node
+
+    for child in node.children():
+        yield from iter_subtree(child)
+
+
+def validate_queued_nodes() -> None:
+    """
+    Validates every node queued while validation was suspended, and the subtrees below them, once.
+    Nodes that were removed again in the meantime are skipped. Instead of a dialog per issue,
+    a single summary of all the issues found is shown.
+
+    :return:
+    """
+    queued_nodes = QUEUED_NODES.copy()
+    QUEUED_NODES.clear()
+
+    visited = set()
+    num_validated = 0
+
+    with collected_validation_messages() as messages:
+        for queued_node in queued_nodes:
+            try:
+                if queued_node.parent() is None:  # Removed again
+                    continue
+
+                for node in iter_subtree(queued_node):
+                    if node in visited:
+                        continue
+                    visited.add(node)
+
+                    validate_hierarchy(node)
+                    num_validated += 1
+
+                    PREVIOUS_NAME[node] = node.name()
+                    PREVIOUS_PARENT[node.name()] = node.parent()
+            except RuntimeError as e:  # The underlying C++ object was deleted
+                logger.warning(f"Skipping validation of a removed node: {e}")
+
+    logger.info(f"Validated {num_validated} layer tree nodes")
+
+    if messages:
+        summary = "\n".join(
+            f"{header}: {message}"
+            for header, message in messages[:MAX_SUMMARY_MESSAGES]
+        )
+        if len(messages) > MAX_SUMMARY_MESSAGES:
+            summary += f"\n... and {len(messages) - MAX_SUMMARY_MESSAGES} more"
+
+        make_hierarchy_validation_dialog(
+            "Hierarchy Validation",
+            f"Found {len(messages)} issues in the added layers:\n{summary}",
+            level=QMessageBox.Warning,
+        )
+
+
+@contextmanager
+def suspended_hierarchy_validation() -> Iterator[None]:
+    """
+    Pauses the hierarchy change listener during plugin initiated bulk changes of the layer tree, like downloads,
+    imports and duplications. The added and renamed nodes are queued and validated in one batch when the
+    outermost context exits. If the bulk change raises, the queued nodes are discarded unvalidated.
+
+    :return:
+    """
+    global SUSPENSION_DEPTH
+
+    SUSPENSION_DEPTH += 1
+    try:
+        yield
+    except BaseException:
+        SUSPENSION_DEPTH -= 1
+        if not SUSPENSION_DEPTH:
+            QUEUED_NODES.clear()
+        raise
+
+    SUSPENSION_DEPTH -= 1
+    if not SUSPENSION_DEPTH:
+        validate_queued_nodes()
+
+
 def remove_node(child: Any) -> None:
     NODE_TO_BE_REMOVED.add(child)
 
@@ -219,6 +317,7 @@ def add_solution_hierarchy_change_listener() -> None:
 def remove_solution_hierarchy_change_listener() -> None:
     layer_tree_root = QgsProject.instance().layerTreeRoot()
     clear_mappings()
+    QUEUED_NODES.clear()
 
     disconnect_signal(layer_tree_root.nameChanged, name_changed)
     disconnect_signal(layer_tree_root.addedChildren, added_children)
@@ -1,5 +1,6 @@
 import logging
-from typing import Any
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Tuple
 
 # noinspection PyUnresolvedReferences
 from qgis.PyQt.QtGui import QIcon
@@ -39,8 +40,29 @@ __all__ = [
     "make_hierarchy_validation_dialog",
     "make_validation_action_toast",
     "make_temporary_toast",
+    "collected_validation_messages",
 ]
 
+COLLECTED_VALIDATION_MESSAGES: Optional[List[Tuple[str, str]]] = None
+
+
+@contextmanager
+def collected_validation_messages() -> Iterator[List[Tuple[str, str]]]:
+    """
+    Collects the (header, message) of every hierarchy validation dialog instead of showing it,
+    the dialogs are accepted as if the user had pressed the accept button.
+
+    :return: The collected messages, filled while the context is active
+    """
+    global COLLECTED_VALIDATION_MESSAGES
+
+    previous = COLLECTED_VALIDATION_MESSAGES
+    messages = COLLECTED_VALIDATION_MESSAGES = []
+    try:
+        yield messages
+    finally:
+        COLLECTED_VALIDATION_MESSAGES = previous
+
 
 def make_hierarchy_validation_dialog(
     header: str,
@@ -55,6 +77,10 @@ def make_hierarchy_validation_dialog(
 ) -> Any:
     logger.error(message)
 
+    if COLLECTED_VALIDATION_MESSAGES is not None:
+        COLLECTED_VALIDATION_MESSAGES.append((header, message))
+        return QMessageBox.AcceptRole
+
     resource_path = read_plugin_setting(
         "RESOURCES_BASE_PATH",
         default_value=DEFAULT_PLUGIN_SETTINGS["RESOURCES_BASE_PATH"],
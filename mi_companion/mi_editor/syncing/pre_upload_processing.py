@@ -1,128 +1,163 @@
 import logging
 from collections import defaultdict
-from itertools import chain
-from typing import Union
+from typing import Collection, Dict, List, Optional
 
+import numpy
 import shapely
 
-from jord.shapely_utilities import is_multi
 from mi_companion.configuration import read_bool_setting
-from sync_module.model import Area, PointOfInterest, Room, Solution
+from sync_module.model import Solution
 
 logger = logging.getLogger(__name__)
 
 __all__ = ["post_process_solution"]
 
+MULTI_GEOMETRY_TYPE_IDS = (
+    shapely.GeometryType.MULTIPOINT,
+    shapely.GeometryType.MULTILINESTRING,
+    shapely.GeometryType.MULTIPOLYGON,
+    shapely.GeometryType.GEOMETRYCOLLECTION,
+)
 
-def post_process_solution(solution: Solution) -> None:
+
+def union_groups(groups: Dict[str, List[shapely.Geometry]]) -> numpy.ndarray:
+    """
+    The union of each group of geometries, in the order of the groups
+
+    :param groups:
+    :return:
     """
+    return numpy.array(
+        [
+            shapely.union_all(numpy.asarray(geoms, dtype=object))
+            for geoms in groups.values()
+        ],
+        dtype=object,
+    )
+
+
+def multi_geometry_mask(geoms: numpy.ndarray) -> numpy.ndarray:
+    return numpy.isin(shapely.get_type_id(geoms), MULTI_GEOMETRY_TYPE_IDS)
+
+
+def post_process_solution(
+    solution: Solution, changed_keys: Optional[Collection[str]] = None
+) -> None:
+    """
+    Fits floors to their rooms, buildings to their floors and venues to everything in them,
+    depending on the POST_FIT_FLOORS, POST_FIT_BUILDINGS and POST_FIT_VENUES settings.
+
+    Rooms, areas, points of interest, floors and buildings are grouped by their parent in a single pass each,
+    and the fitted geometries are all computed before any of them are updated.
 
     :param solution:
+    :param changed_keys: Keys of the floors, buildings and venues with changed layers. Only with
+    POST_FIT_CHANGED_ONLY are just these and the buildings and venues containing them fitted, otherwise everything.
     :return:
     """
-    floor_child_geoms = defaultdict(list)
-    floor_child_geoms_extras = defaultdict(list)
-    for floor in solution.floors:
-        for feat in chain(solution.rooms, solution.areas, solution.points_of_interest):
-            assert hasattr(feat, "floor")
-            feat: Union[Room, Area, PointOfInterest]
-            if feat.floor.key == floor.key:
-                if isinstance(feat, Room):  #
-                    floor_child_geoms[floor.key].append(feat.polygon)
-                    floor_child_geoms_extras[floor.key].append(feat.polygon)
-                elif isinstance(feat, Area):  #
-                    floor_child_geoms_extras[floor.key].append(feat.polygon)
-                else:
-                    floor_child_geoms_extras[floor.key].append(feat.point)  # POI
+    fit_floors = read_bool_setting("POST_FIT_FLOORS")
+    fit_buildings = read_bool_setting("POST_FIT_BUILDINGS")
+    fit_venues = read_bool_setting("POST_FIT_VENUES")
 
-    building_floor_polygons = defaultdict(list)
-    building_floor_extras = defaultdict(list)
-    for building in solution.buildings:
-        for floor in solution.floors:
-            if floor.building.key == building.key:
-                building_floor_polygons[building.key].append(floor.polygon)
-                # EXTRAS FOR LATER USE IN HIERARCHY
-                building_floor_extras[building.key].append(floor.polygon)
-                building_floor_extras[building.key].extend(floor_child_geoms[floor.key])
-                building_floor_extras[building.key].extend(
-                    floor_child_geoms_extras[floor.key]
-                )
+    if not (fit_floors or fit_buildings or fit_venues):
+        return
 
-    venue_building_polygons = defaultdict(list)
-    venue_building_extras = defaultdict(list)
-    for venue in solution.venues:
+    if not read_bool_setting("POST_FIT_CHANGED_ONLY"):
+        changed_keys = None
+
+    # A changed floor changes its building, which changes its venue
+    if changed_keys is not None:
+        changed_keys = set(changed_keys)
+        for floor in solution.floors:
+            if floor.key in changed_keys:
+                changed_keys.add(floor.building.key)
         for building in solution.buildings:
-            if building.venue.key == venue.key:
-                venue_building_polygons[venue.key].append(building.polygon)
-                # EXTRAS FOR LATER USE IN HIERARCHY
-                venue_building_extras[venue.key].append(building.polygon)
-                venue_building_extras[venue.key].extend(
-                    building_floor_polygons[building.key]
-                )
-                venue_building_extras[venue.key].extend(
-                    building_floor_extras[building.key]
-                )
+            if building.key in changed_keys:
+                changed_keys.add(building.venue.key)
+
+    def should_fit(key: str) -> bool:
+        return changed_keys is None or key in changed_keys
+
+    floor_room_polygons = defaultdict(list)
+    floor_extras = defaultdict(list)  # Rooms, areas and points of interest
+    for room in solution.rooms:
+        floor_room_polygons[room.floor.key].append(room.polygon)
+        floor_extras[room.floor.key].append(room.polygon)
+    for area in solution.areas:
+        floor_extras[area.floor.key].append(area.polygon)
+    for poi in solution.points_of_interest:
+        floor_extras[poi.floor.key].append(poi.point)
 
-    if read_bool_setting("POST_FIT_FLOORS"):
-        logger.warning(f"Post fitting floors")
-        if False:
-            logger.error(floor_child_geoms)
+    building_floor_polygons = defaultdict(list)
+    building_extras = defaultdict(list)  # Floors and everything on them
+    for floor in solution.floors:
+        building_floor_polygons[floor.building.key].append(floor.polygon)
+        building_extras[floor.building.key].append(floor.polygon)
+        building_extras[floor.building.key].extend(floor_extras[floor.key])
 
-        for f_id, f_polys in floor_child_geoms.items():
-            new_floor_poly = shapely.unary_union(f_polys)
-            if is_multi(new_floor_poly):
+    venue_building_polygons = defaultdict(list)
+    venue_extras = defaultdict(list)  # Buildings and everything in them
+    for building in solution.buildings:
+        venue_building_polygons[building.venue.key].append(building.polygon)
+        venue_extras[building.venue.key].extend(building_extras[building.key])
+
+    floor_groups = {
+        floor.key: floor_room_polygons[floor.key]
+        for floor in solution.floors
+        if floor_room_polygons[floor.key] and should_fit(floor.key)
+    }
+    building_groups = {
+        building.key: building_floor_polygons[building.key]
+        for building in solution.buildings
+        if building_floor_polygons[building.key] and should_fit(building.key)
+    }
+    venue_groups = {
+        venue.key: venue_building_polygons[venue.key] + venue_extras[venue.key]
+        for venue in solution.venues
+        if venue_building_polygons[venue.key] and should_fit(venue.key)
+    }
+
+    if fit_floors and floor_groups:
+        logger.warning(f"Post fitting {len(floor_groups)} floors")
+
+        new_floor_polys = union_groups(floor_groups)
+        is_multis = multi_geometry_mask(new_floor_polys)
+
+        for f_id, new_floor_poly, is_multi_ in zip(
+            floor_groups, new_floor_polys, is_multis
+        ):
+            if is_multi_:
                 logger.error(new_floor_poly)
-                logger.error(f_polys)
+                logger.error(floor_groups[f_id])
                 logger.error(
                     f"Building {f_id}, {new_floor_poly=} and thus not valid, skipping fit"
                 )
                 continue
             solution.update_floor(f_id, polygon=new_floor_poly)
 
-    if read_bool_setting("POST_FIT_BUILDINGS"):
-        logger.warning(f"Post fitting buildings")
-        if False:
-            logger.error(building_floor_polygons)
+    if fit_buildings and building_groups:
+        logger.warning(f"Post fitting {len(building_groups)} buildings")
 
-        for b_id, b_f_polys in building_floor_polygons.items():
-            new_building_poly = shapely.unary_union(b_f_polys)
-            if False:  # INCLUDE ALL FLOOR_GEOM not just "Floor outline"
-                new_building_poly = shapely.unary_union(
-                    (new_building_poly, *building_floor_extras[b_id])
-                )
+        new_building_polys = union_groups(building_groups)
+        is_multis = multi_geometry_mask(new_building_polys)
 
-            if is_multi(new_building_poly):
+        for b_id, new_building_poly, is_multi_ in zip(
+            building_groups, new_building_polys, is_multis
+        ):
+            if is_multi_:
                 logger.error(new_building_poly)
-                # logger.error(b_f_polys)
                 logger.error(
                     f"Building {b_id}, {new_building_poly=} and thus not valid, skipping fit"
                 )
                 continue
             solution.update_building(b_id, polygon=new_building_poly)
 
-    if read_bool_setting("POST_FIT_VENUES"):
-        logger.warning(f"Post fitting venues")
-        if False:
-            logger.error(venue_building_polygons)
-
-        for v_id, v_b_polys in venue_building_polygons.items():
-            new_venue_poly = shapely.unary_union(v_b_polys)
-
-            if True:  # INCLUDE ALL FLOOR_GEOM not just "Building outline"
-                new_venue_poly = shapely.unary_union(
-                    (new_venue_poly, *venue_building_extras[v_id])
-                )
-
-            if False:
-                if is_multi(new_venue_poly):
-                    logger.error(new_venue_poly)
-                    # logger.error(v_b_polys)
-                    logger.error(
-                        f"Venue {v_id}, {new_venue_poly=} and thus not valid, skipping fit"
-                    )
-                    continue
+    if fit_venues and venue_groups:
+        logger.warning(f"Post fitting {len(venue_groups)} venues")
 
-            # new_venue_poly = shapely.concave_hull(new_venue_poly)
-            new_venue_poly = shapely.concave_hull(new_venue_poly)
+        new_venue_polys = shapely.concave_hull(
+            union_groups(venue_groups)
+        )  # Include all floor geometries, not just the building outlines
 
+        for v_id, new_venue_poly in zip(venue_groups, new_venue_polys):
             solution.update_venue(v_id, polygon=new_venue_poly)
@@ -26,8 +26,9 @@ def upload_venue(
     solution_name,
     upload_venues,
     venue_key,
+    changed_keys=None,
 ) -> None:
-    post_process_solution(solution)
+    post_process_solution(solution, changed_keys=changed_keys)
 
     if collect_invalid:
         assert upload_venues is False, "Cannot upload venues if collecting invalid"
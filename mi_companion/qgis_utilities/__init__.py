@@ -1,9 +1,13 @@
 # from .split_detection import *
 from .anchor_centering import *
 from .creation_mode import *
+from .detached_layer_tree import *
 from .dialogs import *
 from .exceptions import *
 from .expressions import *
+from .field_config_template import *
+from .location_type_lookup import *
 from .paths import *
 from .qgis_logging import *
+from .review_layers import *
 from .string_parsing import *
@@ -1,10 +1,9 @@
 import logging
-from typing import Iterable
+from typing import Any, Iterable, Optional
 
 # noinspection PyUnresolvedReferences
 from qgis.core import (
     Qgis,
-    QgsDefaultValue,
     QgsFieldConstraints,
 )
 
@@ -13,76 +12,68 @@ from .expressions import (
     RESET_ANCHOR_TO_CENTROID_COMPONENT,
     RESET_ANCHOR_TO_CENTROID_IF_MOVED_OUTSIDE_GEOMETRY_COMPONENT,
 )
+from .field_config_template import FieldConfigTemplate
 
-__all__ = ["auto_center_anchors_when_outside"]
+__all__ = ["auto_center_anchors_when_outside", "add_anchor_centering_config"]
 
 
 logger = logging.getLogger(__name__)
 
 
+def _qgis_policy(enum_name: str, member_name: str, qgis_version: str) -> Optional[Any]:
+    policy = getattr(getattr(Qgis, enum_name, None), member_name, None)
+
+    if policy is None:
+        logger.warning(
+            f"Qgis.{enum_name} is only available in QGIS >={qgis_version}, please upgrade your QGIS to fix this"
+        )
+
+    return policy
+
+
+def add_anchor_centering_config(
+    template: Optional[FieldConfigTemplate] = None,
+) -> FieldConfigTemplate:
+    """
+    Configures the anchor_x and anchor_y fields to be reset to the centroid of the geometry, when it is moved outside
+    of it or always depending on ONLY_RESET_ANCHOR_IF_OUTSIDE, also when splitting, merging and duplicating features
+
+    :param template: A new template if None
+    :return: The template
+    """
+    if template is None:
+        template = FieldConfigTemplate()
+
+    default_expression = RESET_ANCHOR_TO_CENTROID_COMPONENT
+
+    if ONLY_RESET_ANCHOR_IF_OUTSIDE:
+        default_expression = (
+            RESET_ANCHOR_TO_CENTROID_IF_MOVED_OUTSIDE_GEOMETRY_COMPONENT
+        )
+
+    split_policy = _qgis_policy("FieldDomainSplitPolicy", "GeometryRatio", "3.30.0")
+    merge_policy = _qgis_policy("FieldDomainMergePolicy", "DefaultValue", "3.44.0")
+    duplicate_policy = _qgis_policy("FieldDuplicatePolicy", "Duplicate", "3.38.0")
+
+    for c, v in {"anchor_x": "x", "anchor_y": "y"}.items():
+        template.make_not_null(c)
+        template.add_constraint(c, QgsFieldConstraints.ConstraintExpression)
+
+        # Reset the anchor component to the centroid
+        template.set_default(
+            c, default_expression.format(component=v), apply_on_update=True
+        )
+
+        # Use default value when splitting and merging, duplicate when duplicating
+        template.set_policies(
+            c,
+            split_policy=split_policy,
+            merge_policy=merge_policy,
+            duplicate_policy=duplicate_policy,
+        )
+
+    return template
+
+
 def auto_center_anchors_when_outside(layers: Iterable) -> None:
-    for layers_inner in layers:
-
-        for c, v in {"anchor_x": "x", "anchor_y": "y"}.items():
-            fields = layers_inner.fields()
-
-            # Find name fields, including translations
-            for field_idx in range(fields.count()):
-                field_name = fields.at(field_idx).name()
-
-                if c in field_name:
-                    layers_inner.setFieldConstraint(
-                        field_idx,
-                        QgsFieldConstraints.ConstraintNotNull,
-                        QgsFieldConstraints.ConstraintStrengthHard,
-                    )
-
-                    layers_inner.setFieldConstraint(
-                        field_idx,
-                        QgsFieldConstraints.ConstraintExpression,
-                        QgsFieldConstraints.ConstraintStrengthHard,
-                    )
-
-                    default_expression = RESET_ANCHOR_TO_CENTROID_COMPONENT
-
-                    if ONLY_RESET_ANCHOR_IF_OUTSIDE:
-                        default_expression = (
-                            RESET_ANCHOR_TO_CENTROID_IF_MOVED_OUTSIDE_GEOMETRY_COMPONENT
-                        )
-
-                    # Set default value for the name field
-                    default_value = QgsDefaultValue(
-                        default_expression.format(component=v),
-                        applyOnUpdate=True,
-                    )
-                    layers_inner.setDefaultValueDefinition(field_idx, default_value)
-
-                    try:
-                        # Set policy to use default value when splitting
-                        layers_inner.setFieldSplitPolicy(
-                            field_idx, Qgis.FieldDomainSplitPolicy.GeometryRatio
-                        )
-                    except Exception as e:
-                        logger.warning(
-                            "QgsVectorLayer.setFieldSplitPolicy is only available in QGIS >=3.30.0, please upgrade your QGIS to fix this"
-                        )
-
-                    try:
-                        # Set policy to use default value when merging
-                        layers_inner.setFieldMergePolicy(
-                            field_idx, Qgis.FieldDomainMergePolicy.DefaultValue
-                        )
-                    except Exception as e:
-                        logger.warning(
-                            "QgsVectorLayer.setFieldMergePolicy is only available in QGIS >=3.44.0, please upgrade your QGIS to fix this"
-                        )
-
-                    try:
-                        # Set policy to use default value when duplicating
-                        layers_inner.setFieldDuplicatePolicy(
-                            field_idx, Qgis.FieldDuplicatePolicy.Duplicate
-                        )
-                    except Exception as e:
-                        logger.warning(
-                            "QgsVectorLayer.setFieldDuplicatePolicy is only available in QGIS >=3.38.0, please upgrade your QGIS to fix this"
-                        )
+    add_anchor_centering_config().apply(layers)
@@ -0,0 +1,122 @@
+import logging
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, List, Tuple
+
+# noinspection PyUnresolvedReferences
+from qgis.core import QgsLayerTreeGroup, QgsProject
+
+# noinspection PyUnresolvedReferences
+from qgis.utils import iface
+
+__all__ = [
+    "DetachedProject",
+    "DetachedInstanceHandle",
+    "detached_layer_tree",
+    "frozen_map_canvas",
+]
+
+logger = logging.getLogger(__name__)
+
+
+class DetachedProject:
+    """
+    Stands in for the project while a layer subtree is built off the project.
+
+    Layers are collected instead of being registered, and the detached group is the layer tree root,
+    so layer tree lookups of the layer creation helpers resolve within the subtree.
+    Everything else is delegated to the project.
+    """
+
+    def __init__(self, project: Any, root_group: Any):
+        self._project = project
+        self._root_group = root_group
+        self.layers: List[Any] = []
+
+    def addMapLayer(self, layer: Any, add_to_legend: bool = True) -> Any:
+        self.layers.append(layer)
+        return layer
+
+    def addMapLayers(
+        self, layers: Iterable[Any], add_to_legend: bool = True
+    ) -> List[Any]:
+        layers = list(layers)
+        self.layers.extend(layers)
+        return layers
+
+    def layerTreeRoot(self) -> Any:
+        return self._root_group
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._project, item)
+
+
+class DetachedInstanceHandle:
+    """
+    A qgis instance handle whose qgis_project is a DetachedProject, everything else is delegated to the wrapped
+    handle.
+    """
+
+    def __init__(self, qgis_instance_handle: Any, qgis_project: DetachedProject):
+        self._qgis_instance_handle = qgis_instance_handle
+        self.qgis_project = qgis_project
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._qgis_instance_handle, item)
+
+
+@contextmanager
+def frozen_map_canvas() -> Iterator[None]:
+    canvas = iface.mapCanvas() if iface is not None else None
+
+    if canvas is None:
+        yield
+        return
+
+    was_frozen = canvas.isFrozen()
+    canvas.freeze(True)
+    try:
+        yield
+    finally:
+        canvas.freeze(was_frozen)
+        if not was_frozen:
+            canvas.refresh()
+
+
+@contextmanager
+def detached_layer_tree(
+    qgis_instance_handle: Any,
+    parent_group: Any,
+    name: str,
+    index: int = 0,
+    *,
+    attach: bool = True,
+) -> Iterator[Tuple[Any, DetachedInstanceHandle]]:
+    """
+    Builds a group and everything below it off the project. Layers created through the yielded handle are
+    collected rather than registered. When the context exits, all of them are registered in a single addMapLayers
+    call, and the group is inserted into the parent group in a single insert, with the map canvas frozen meanwhile.
+    If the context raises, nothing is added to the project.
+
+    :param qgis_instance_handle:
+    :param parent_group: The group the built group is inserted into
+    :param name: Name of the built group
+    :param index: Where in the parent group the built group is inserted
+    :param attach: If False the group stays detached and its layers unregistered, for instance to patch an
+    existing tree from
+    :return: The detached group and the handle to create its layers with
+    """
+    project = QgsProject.instance()
+
+    group = QgsLayerTreeGroup(name)
+    detached_project = DetachedProject(project, group)
+
+    yield group, DetachedInstanceHandle(qgis_instance_handle, detached_project)
+
+    if not attach:
+        return
+
+    with frozen_map_canvas():
+        project.addMapLayers(detached_project.layers, False)
+        parent_group.insertChildNode(index, group)
+
+    logger.info(f"Attached {name} with {len(detached_project.layers)} layers")
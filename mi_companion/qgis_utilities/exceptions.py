@@ -1,2 +1,10 @@
 class InvalidReprojection(Exception):
     pass
+
+
+class DownloadCancelled(Exception):
+    pass
+
+
+class UncommittedEdits(Exception):
+    pass
@@ -156,16 +156,11 @@ string_to_array( represent_value(location_type) , '>')[-1]
 """
 
 
-def get_hierarchical_lookup_field_expression(
-    current_layer,
-    look_up_field_name: str = "display_rule.model2d.model",
-    first_level_reference_field_name="location_type",
-    second_level_referenced_field_name="admin_id",
-    fallback_layer_name="solution_config",
-):
+def get_referenced_layer_id(
+    current_layer, first_level_reference_field_name="location_type"
+) -> str:
     """
-    Creates a QGIS expression that looks up the 2D model from location_types layer
-    dynamically finding the layer referenced by the relation editor widget.
+    Finds the id of the layer referenced by the relation editor widget of a field.
     Supports both RelationReference and ValueRelation widget types.
     """
     # Add the missing imports
@@ -202,6 +197,28 @@ def get_hierarchical_lookup_field_expression(
         else:
             raise Exception(f"A location type reference layer was not found!")
 
+    return referenced_layer_id
+
+
+def get_hierarchical_lookup_field_expression(
+    current_layer,
+    look_up_field_name: str = "display_rule.model2d.model",
+    first_level_reference_field_name="location_type",
+    second_level_referenced_field_name="admin_id",
+    fallback_layer_name="solution_config",
+):
+    """
+    Creates a QGIS expression that looks up the 2D model from location_types layer
+    dynamically finding the layer referenced by the relation editor widget.
+    Supports both RelationReference and ValueRelation widget types.
+
+    The lookup runs for every feature at render time, get_cached_lookup_field_expression and
+    get_materialized_lookup_field_expression do not.
+    """
+    referenced_layer_id = get_referenced_layer_id(
+        current_layer, first_level_reference_field_name
+    )
+
     return f"""
 with_variable(
   'look_up_field_name',
@@ -0,0 +1,218 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+# noinspection PyUnresolvedReferences
+from qgis.core import (
+    QgsDefaultValue,
+    QgsFieldConstraints,
+)
+
+from jord.qgis_utilities.helpers.widgets import (
+    CHECKBOX_WIDGET,
+    NULLABLE_CHECKBOX_WIDGET,
+)
+
+__all__ = ["FieldConfig", "FieldConfigTemplate", "flatten_layers"]
+
+logger = logging.getLogger(__name__)
+
+UNIQUE_ID_DEFAULT_EXPRESSION = "rtrim( ltrim( uuid(), '{'), '}')"
+
+
+class FieldConfig:
+    """
+    Editor widget, default value, constraints, reuse last value flag and split, merge and duplicate policies
+    of a single field, None or empty for what is left as is.
+    """
+
+    __slots__ = (
+        "widget",
+        "default_value",
+        "constraints",
+        "reuse_last_value",
+        "split_policy",
+        "merge_policy",
+        "duplicate_policy",
+    )
+
+    def __init__(self):
+        self.widget: Optional[Any] = None
+        self.default_value: Optional[Any] = None
+        self.constraints: List[Tuple[Any, Any]] = []
+        self.reuse_last_value: bool = False
+        self.split_policy: Optional[Any] = None
+        self.merge_policy: Optional[Any] = None
+        self.duplicate_policy: Optional[Any] = None
+
+
+def flatten_layers(layers: Any) -> List[Any]:
+    """
+    A layer, or a possibly nested sequence of layers as returned by the layer creation helpers, as a flat list
+
+    :param layers:
+    :return:
+    """
+    if layers is None:
+        return []
+
+    if hasattr(layers, "fields"):  # A single layer
+        return [layers]
+
+    flat = []
+    for layers_inner in layers:
+        if layers_inner is None:
+            continue
+
+        if hasattr(layers_inner, "fields"):
+            flat.append(layers_inner)
+        else:
+            flat.extend(layer for layer in layers_inner if layer is not None)
+
+    return flat
+
+
+class FieldConfigTemplate:
+    """
+    The field configuration of a kind of layer, by field name. Built once and applied to every new layer of that
+    kind, in a single pass over the configured fields, with the edit form config read and written once per layer.
+
+    Configuring a field again overrides the earlier configuration, as calling the jord field helpers in that order
+    would. Fields a layer does not have are skipped.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, FieldConfig] = {}
+
+    def field(self, field_name: str) -> FieldConfig:
+        if field_name not in self.fields:
+            self.fields[field_name] = FieldConfig()
+
+        return self.fields[field_name]
+
+    def set_widget(self, field_name: str, form_widget: Any) -> "FieldConfigTemplate":
+        self.field(field_name).widget = form_widget
+        return self
+
+    def set_default(
+        self,
+        field_name: str,
+        default_expression: str = "'None'",
+        apply_on_update: bool = False,
+    ) -> "FieldConfigTemplate":
+        self.field(field_name).default_value = QgsDefaultValue(
+            default_expression, applyOnUpdate=apply_on_update
+        )
+        return self
+
+    def add_constraint(
+        self,
+        field_name: str,
+        constraint: Any,
+        strength: Any = QgsFieldConstraints.ConstraintStrengthHard,
+    ) -> "FieldConfigTemplate":
+        self.field(field_name).constraints.append((constraint, strength))
+        return self
+
+    def make_not_null(self, field_name: str) -> "FieldConfigTemplate":
+        return self.add_constraint(field_name, QgsFieldConstraints.ConstraintNotNull)
+
+    def make_unique(self, field_name: str = "id") -> "FieldConfigTemplate":
+        """
+        Not null and unique, with a generated uuid as default value, like make_field_unique of jord
+
+        :param field_name:
+        :return:
+        """
+        self.set_default(field_name, UNIQUE_ID_DEFAULT_EXPRESSION)
+        self.make_not_null(field_name)
+        return self.add_constraint(field_name, QgsFieldConstraints.ConstraintUnique)
+
+    def make_boolean(
+        self, field_name: str, nullable: bool = True
+    ) -> "FieldConfigTemplate":
+        return self.set_widget(
+            field_name, NULLABLE_CHECKBOX_WIDGET if nullable else CHECKBOX_WIDGET
+        )
+
+    def reuse_last_entered_value(self, field_name: str) -> "FieldConfigTemplate":
+        self.field(field_name).reuse_last_value = True
+        return self
+
+    def set_policies(
+        self,
+        field_name: str,
+        *,
+        split_policy: Optional[Any] = None,
+        merge_policy: Optional[Any] = None,
+        duplicate_policy: Optional[Any] = None,
+    ) -> "FieldConfigTemplate":
+        field_config = self.field(field_name)
+        if split_policy is not None:
+            field_config.split_policy = split_policy
+        if merge_policy is not None:
+            field_config.merge_policy = merge_policy
+        if duplicate_policy is not None:
+            field_config.duplicate_policy = duplicate_policy
+        return self
+
+    def apply(self, layers: Any) -> None:
+        """
+        Applies the template to a layer, or to every layer of a possibly nested sequence of layers
+
+        :param layers:
+        :return:
+        """
+        for layer in flatten_layers(layers):
+            self.apply_to_layer(layer)
+
+    def apply_to_layer(self, layer: Any) -> None:
+        fields = layer.fields()
+        form_config = None
+
+        for field_name, field_config in self.fields.items():
+            field_index = fields.indexFromName(field_name)
+            if field_index < 0:
+                continue
+
+            if field_config.widget is not None:
+                layer.setEditorWidgetSetup(field_index, field_config.widget)
+
+            if field_config.default_value is not None:
+                layer.setDefaultValueDefinition(field_index, field_config.default_value)
+
+            for constraint, strength in field_config.constraints:
+                layer.setFieldConstraint(field_index, constraint, strength)
+
+            if field_config.reuse_last_value:
+                if form_config is None:
+                    form_config = layer.editFormConfig()
+                form_config.setReuseLastValue(field_index, True)
+
+            if field_config.split_policy is not None:
+                try:
+                    layer.setFieldSplitPolicy(field_index, field_config.split_policy)
+                except Exception as e:
+                    logger.warning(
+                        "QgsVectorLayer.setFieldSplitPolicy is only available in QGIS >=3.30.0, please upgrade your QGIS to fix this"
+                    )
+
+            if field_config.merge_policy is not None:
+                try:
+                    layer.setFieldMergePolicy(field_index, field_config.merge_policy)
+                except Exception as e:
+                    logger.warning(
+                        "QgsVectorLayer.setFieldMergePolicy is only available in QGIS >=3.44.0, please upgrade your QGIS to fix this"
+                    )
+
+            if field_config.duplicate_policy is not None:
+                try:
+                    layer.setFieldDuplicatePolicy(
+                        field_index, field_config.duplicate_policy
+                    )
+                except Exception as e:
+                    logger.warning(
+                        "QgsVectorLayer.setFieldDuplicatePolicy is only available in QGIS >=3.38.0, please upgrade your QGIS to fix this"
+                    )
+
+        if form_config is not None:
+            layer.setEditFormConfig(form_config)
@@ -0,0 +1,437 @@
+import logging
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+# noinspection PyUnresolvedReferences
+from qgis.PyQt.QtCore import QCoreApplication, QObject, QThread, pyqtSignal
+
+# noinspection PyUnresolvedReferences
+from qgis.core import NULL, QgsExpression, QgsProject, qgsfunction
+
+from .expressions import get_referenced_layer_id
+
+__all__ = [
+    "LOCATION_TYPE_LOOKUP_FUNCTION_NAME",
+    "LocationTypeLookupCache",
+    "LOCATION_TYPE_LOOKUP_CACHE",
+    "register_location_type_lookup_function",
+    "unregister_location_type_lookup_function",
+    "get_cached_lookup_field_expression",
+    "get_materialized_lookup_field_expression",
+]
+
+logger = logging.getLogger(__name__)
+
+LOCATION_TYPE_LOOKUP_FUNCTION_NAME = "mi_location_type_attribute"
+
+
+def _is_set(value: Any) -> bool:
+    """
+    Truthiness as the if() of a QGIS expression sees it, NULL is not set
+    """
+    return value is not None and value != NULL and bool(value)
+
+
+class _PrimeRequests(QObject):
+    """
+    Lives on the main thread, so emitting requested from a render thread queues the call to on_requested there
+    """
+
+    requested = pyqtSignal()
+
+    def __init__(self, on_requested: Callable[[], None]):
+        super().__init__()
+
+        self._on_requested = on_requested
+        self.requested.connect(self.on_requested)
+
+    def on_requested(self, *args: Any) -> None:  # Also connected to layersAdded
+        self._on_requested()
+
+
+def _on_main_thread() -> bool:
+    application = QCoreApplication.instance()
+    return application is not None and QThread.currentThread() == application.thread()
+
+
+class LocationTypeLookupCache:
+    """
+    Attributes of referenced layers, like the location types layer, by layer id, key field and key.
+
+    Tables are read on the main thread and looked up by the registered expression function from any thread,
+    render threads included, without touching the layers. Tables are replaced whole and never mutated,
+    so a lookup always sees a complete table.
+
+    Read layers are read again when their data changes, after which the listeners of the layer are called.
+    Only layer ids are kept, so caching a layer does not keep it alive.
+
+    Tables that have not been read, like those referenced by the expressions of a project that was just opened, are
+    read from the project layer on the first lookup. On the main thread right away, otherwise the lookup is queued on
+    the main thread, which then repaints the project layers.
+    """
+
+    def __init__(self):
+        self._tables: Dict[Tuple[str, str], Dict[Hashable, Dict[str, Any]]] = {}
+        self._fallbacks: Dict[str, Dict[str, Any]] = {}  # By layer name
+        self._fallback_layer_ids: Dict[str, str] = {}  # Layer id to layer name
+        self._listeners: Dict[str, List[Callable[[], None]]] = {}
+        self._watched_layer_ids = set()
+        self._pending_tables: Set[Tuple[str, str]] = set()
+        self._pending_fallbacks: Set[str] = set()
+        self._prime_requests: Optional[_PrimeRequests] = None
+
+    def prime(self, layer: Any, key_field_name: str = "admin_id") -> Dict:
+        """
+        Reads all the features of the layer into the table of the layer and key field. Main thread only.
+
+        :param layer:
+        :param key_field_name:
+        :return: The table, attributes by field name by key
+        """
+        names = layer.fields().names()
+
+        table = {}
+        if key_field_name in names:
+            for feature in layer.getFeatures():
+                key = feature[key_field_name]
+                if key is None or key == NULL:
+                    continue
+                table[key] = dict(zip(names, feature.attributes()))
+
+        self._tables[(layer.id(), key_field_name)] = table
+        self._watch(layer)
+
+        return table
+
+    def table(self, layer_id: str, key_field_name: str = "admin_id") -> Dict:
+        """
+
+        :param layer_id:
+        :param key_field_name:
+        :return: Attributes by field name by key, empty if the layer has not been read
+        """
+        return self._tables.get((layer_id, key_field_name), {})
+
+    def ensure_primed(self, layer: Any, key_field_name: str = "admin_id") -> Dict:
+        table = self._tables.get((layer.id(), key_field_name))
+        if table is None:
+            table = self.prime(layer, key_field_name)
+
+        return table
+
+    def prime_fallback(self, layer_name: str) -> Dict[str, Any]:
+        """
+        Reads the first feature of the project layer with the name, as get_feature_by_id(layer_name, 1) would.
+        Main thread only.
+
+        :param layer_name:
+        :return:
+        """
+        fallback = {}
+
+        for layer in QgsProject.instance().mapLayersByName(layer_name):
+            feature = layer.getFeature(1)
+            if feature.isValid():
+                fallback = dict(zip(layer.fields().names(), feature.attributes()))
+
+            self._fallback_layer_ids[layer.id()] = layer_name
+            self._watch(layer)
+            break
+
+        self._fallbacks[layer_name] = fallback
+
+        return fallback
+
+    def ensure_fallback_primed(self, layer_name: str) -> Dict[str, Any]:
+        fallback = self._fallbacks.get(layer_name)
+        if fallback is None:
+            fallback = self.prime_fallback(layer_name)
+
+        return fallback
+
+    def _watch(self, layer: Any) -> None:
+        layer_id = layer.id()
+        if layer_id in self._watched_layer_ids:
+            return
+
+        self._watched_layer_ids.add(layer_id)
+        for changed_signal in (
+            layer.dataChanged,
+            layer.layerModified,  # Edit buffer changes
+            layer.afterRollBack,
+        ):
+            changed_signal.connect(lambda: self._on_data_changed(layer_id))
+        layer.willBeDeleted.connect(lambda: self.forget(layer_id))
+
+    def _on_data_changed(self, layer_id: str) -> None:
+        layer = QgsProject.instance().mapLayer(layer_id)
+        if layer is None:
+            return
+
+        for table_layer_id, key_field_name in list(self._tables):
+            if table_layer_id == layer_id:
+                self.prime(layer, key_field_name)
+
+        if layer_id in self._fallback_layer_ids:
+            self.prime_fallback(self._fallback_layer_ids[layer_id])
+
+        for listener in list(self._listeners.get(layer_id, [])):
+            listener()
+
+    def add_listener(self, layer_id: str, listener: Callable[[], None]) -> None:
+        """
+        Calls the listener on the main thread, after the tables of the layer have been read again
+
+        :param layer_id:
+        :param listener:
+        :return:
+        """
+        self._listeners.setdefault(layer_id, []).append(listener)
+
+    def remove_listener(self, layer_id: str, listener: Callable[[], None]) -> None:
+        listeners = self._listeners.get(layer_id, [])
+        if listener in listeners:
+            listeners.remove(listener)
+
+    def prime_pending(self) -> None:
+        """
+        Reads the tables and fallbacks looked up off the main thread before they were read, then repaints the project
+        layers. Those whose layer is not in the project are kept pending until it is added. Main thread only.
+
+        :return:
+        """
+        project = QgsProject.instance()
+        primed = False
+
+        for layer_id, key_field_name in list(self._pending_tables):
+            layer = project.mapLayer(layer_id)
+            if layer is not None:
+                self._pending_tables.discard((layer_id, key_field_name))
+                self.ensure_primed(layer, key_field_name)
+                primed = True
+
+        for layer_name in list(self._pending_fallbacks):
+            if project.mapLayersByName(layer_name):
+                self._pending_fallbacks.discard(layer_name)
+                self.ensure_fallback_primed(layer_name)
+                primed = True
+
+        if primed:
+            for layer in project.mapLayers().values():
+                layer.triggerRepaint()
+
+    def _request_prime(self) -> None:
+        # Created on the main thread by register_location_type_lookup_function
+        if self._prime_requests is None:
+            return
+
+        self._prime_requests.requested.emit()
+
+    def watch_project(self) -> None:
+        """
+        Creates the main thread receiver of lookups queued from other threads, and retries pending lookups when layers
+        are added to the project. Main thread only.
+
+        :return:
+        """
+        if self._prime_requests is None and _on_main_thread():
+            self._prime_requests = _PrimeRequests(self.prime_pending)
+            QgsProject.instance().layersAdded.connect(self._prime_requests.on_requested)
+
+    def unwatch_project(self) -> None:
+        if self._prime_requests is not None:
+            QgsProject.instance().layersAdded.disconnect(
+                self._prime_requests.on_requested
+            )
+            self._prime_requests = None
+
+    def _table_for_lookup(self, layer_id: str, key_field_name: str) -> Dict:
+        table = self._tables.get((layer_id, key_field_name))
+        if table is not None:
+            return table
+
+        if _on_main_thread():
+            layer = QgsProject.instance().mapLayer(layer_id)
+            if layer is not None:
+                return self.prime(layer, key_field_name)
+
+        if (layer_id, key_field_name) not in self._pending_tables:
+            self._pending_tables.add((layer_id, key_field_name))
+            self._request_prime()
+
+        return {}
+
+    def _fallback_for_lookup(self, layer_name: str) -> Dict[str, Any]:
+        fallback = self._fallbacks.get(layer_name)
+        if fallback is not None:
+            return fallback
+
+        if _on_main_thread() and QgsProject.instance().mapLayersByName(layer_name):
+            return self.prime_fallback(layer_name)
+
+        if layer_name not in self._pending_fallbacks:
+            self._pending_fallbacks.add(layer_name)
+            self._request_prime()
+
+        return {}
+
+    def forget(self, layer_id: str) -> None:
+        for key in [key for key in self._tables if key[0] == layer_id]:
+            del self._tables[key]
+
+        self._fallback_layer_ids.pop(layer_id, None)
+        self._listeners.pop(layer_id, None)
+        self._watched_layer_ids.discard(layer_id)
+
+    def value(
+        self,
+        layer_id: str,
+        key_field_name: str,
+        key: Any,
+        field_name: str,
+        fallback_layer_name: Optional[str] = None,
+    ) -> Optional[Any]:
+        """
+        The value of the field for the feature with the key, otherwise the value of the field of the fallback layer,
+        as the lookup of get_hierarchical_lookup_field_expression would resolve it. Safe from any thread,
+        tables that have not been read are read as described on the class.
+
+        :param layer_id:
+        :param key_field_name:
+        :param key:
+        :param field_name:
+        :param fallback_layer_name:
+        :return: None if neither is set
+        """
+        if key is not None and key != NULL:
+            row = self._table_for_lookup(layer_id, key_field_name).get(key)
+            if row is not None and _is_set(row.get(field_name)):
+                return row[field_name]
+
+        if fallback_layer_name:
+            value = self._fallback_for_lookup(fallback_layer_name).get(field_name)
+            if _is_set(value):
+                return value
+
+        return None
+
+
+LOCATION_TYPE_LOOKUP_CACHE = LocationTypeLookupCache()
+
+
+# noinspection PyUnusedLocal
+@qgsfunction(
+    args="auto",
+    group="MapsIndoors",
+    handlesnull=True,
+    referenced_columns=[],
+    register=False,
+)
+def mi_location_type_attribute(
+    layer_id, key_field_name, key, field_name, fallback_layer_name, feature, parent
+):
+    """
+    Returns the value of a field of the feature with the key in a layer cached by the MapsIndoors plugin,
+    otherwise the value of that field of the fallback layer, otherwise NULL.
+
+    <h4>Syntax</h4>
+    <p>mi_location_type_attribute(layer_id, key_field_name, key, field_name, fallback_layer_name)</p>
+    """
+    value = LOCATION_TYPE_LOOKUP_CACHE.value(
+        layer_id, key_field_name, key, field_name, fallback_layer_name
+    )
+
+    if value is None:
+        return NULL
+
+    return value
+
+
+def register_location_type_lookup_function() -> None:
+    LOCATION_TYPE_LOOKUP_CACHE.watch_project()
+
+    if not QgsExpression.isFunctionName(LOCATION_TYPE_LOOKUP_FUNCTION_NAME):
+        QgsExpression.registerFunction(mi_location_type_attribute)
+
+
+def unregister_location_type_lookup_function() -> None:
+    LOCATION_TYPE_LOOKUP_CACHE.unwatch_project()
+
+    if QgsExpression.isFunctionName(LOCATION_TYPE_LOOKUP_FUNCTION_NAME):
+        QgsExpression.unregisterFunction(LOCATION_TYPE_LOOKUP_FUNCTION_NAME)
+
+
+def get_cached_lookup_field_expression(
+    current_layer: Any,
+    look_up_field_name: str = "display_rule.model2d.model",
+    first_level_reference_field_name: str = "location_type",
+    second_level_referenced_field_name: str = "admin_id",
+    fallback_layer_name: str = "solution_config",
+    *,
+    referenced_layer_id: Optional[str] = None,
+) -> str:
+    """
+    Same lookup as get_hierarchical_lookup_field_expression, but through the registered
+    mi_location_type_attribute function, which reads the cached location types instead of the layer.
+    A referenced layer in the project is cached here if it is not already, and kept in sync with its data from then
+    on.
+
+    :param current_layer:
+    :param look_up_field_name:
+    :param first_level_reference_field_name:
+    :param second_level_referenced_field_name:
+    :param fallback_layer_name:
+    :param referenced_layer_id: Id of the referenced layer, otherwise it is found through the widget of the
+    reference field. A layer that is not in the project must already be cached.
+    :return:
+    """
+    register_location_type_lookup_function()
+
+    if referenced_layer_id is None:
+        referenced_layer_id = get_referenced_layer_id(
+            current_layer, first_level_reference_field_name
+        )
+
+    referenced_layer = QgsProject.instance().mapLayer(referenced_layer_id)
+    if referenced_layer is not None:
+        LOCATION_TYPE_LOOKUP_CACHE.ensure_primed(
+            referenced_layer, second_level_referenced_field_name
+        )
+    LOCATION_TYPE_LOOKUP_CACHE.ensure_fallback_primed(fallback_layer_name)
+
+    return f"""
+if(
+  attribute('{look_up_field_name}'),
+  attribute('{look_up_field_name}'),
+  {LOCATION_TYPE_LOOKUP_FUNCTION_NAME}(
+    '{referenced_layer_id}',
+    '{second_level_referenced_field_name}',
+    "{first_level_reference_field_name}",
+    '{look_up_field_name}',
+    '{fallback_layer_name}'
+  )
+)
+"""
+
+
+def get_materialized_lookup_field_expression(
+    look_up_field_name: str, location_type_value: Optional[Any]
+) -> str:
+    """
+    The lookup of get_hierarchical_lookup_field_expression for features of a single location type,
+    with the value of that location type baked in as a literal, so nothing is looked up at render time.
+
+    :param look_up_field_name:
+    :param location_type_value: The resolved value of the location type, or the fallback
+    :return:
+    """
+    literal = "NULL"
+    if _is_set(location_type_value):
+        literal = QgsExpression.quotedValue(location_type_value)
+
+    return f"""
+if(
+  attribute('{look_up_field_name}'),
+  attribute('{look_up_field_name}'),
+  {literal}
+)
+"""
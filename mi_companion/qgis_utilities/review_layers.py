@@ -0,0 +1,77 @@
+import logging
+from typing import Any, Iterable, List, Mapping, Optional
+
+# noinspection PyUnresolvedReferences
+from qgis.core import QgsLayerTreeLayer, QgsProject
+
+from jord.qlive_utilities import add_shapely_layer
+from mi_companion.layer_descriptors import REVIEW_GROUP_DESCRIPTOR
+
+__all__ = ["get_review_group", "replace_review_layer"]
+
+logger = logging.getLogger(__name__)
+
+
+def get_review_group() -> Any:
+    """
+    The group of review layers at the top of the layer tree, outside the MapsIndoors database group, so review
+    layers are neither validated as part of the hierarchy nor uploaded. Created if missing.
+
+    :return:
+    """
+    layer_tree_root = QgsProject.instance().layerTreeRoot()
+
+    review_group = layer_tree_root.findGroup(REVIEW_GROUP_DESCRIPTOR)
+    if review_group is None:
+        review_group = layer_tree_root.insertGroup(0, REVIEW_GROUP_DESCRIPTOR)
+
+    return review_group
+
+
+def replace_review_layer(
+    name: str,
+    geoms: Iterable[Any],
+    columns: Iterable[Mapping[str, Any]],
+    crs: str,
+) -> Optional[List[Any]]:
+    """
+    Removes the review layers with the name and adds a new one with the geometries, if there are any.
+    Without geometries the review group is not created, only stale layers of an existing one are removed.
+
+    :param name:
+    :param geoms: Shapely geometries
+    :param columns: Attributes of each geometry
+    :param crs: Authid of the CRS of the geometries
+    :return: The added layers, None if there were no geometries
+    """
+    geoms = list(geoms)
+
+    if geoms:
+        review_group = get_review_group()
+    else:
+        review_group = (
+            QgsProject.instance().layerTreeRoot().findGroup(REVIEW_GROUP_DESCRIPTOR)
+        )
+
+    if review_group is not None:
+        for review_item in review_group.children():
+            if (
+                isinstance(review_item, QgsLayerTreeLayer)
+                and review_item.name() == name
+            ):
+                QgsProject.instance().removeMapLayer(review_item.layerId())
+
+    if not geoms:
+        return None
+
+    logger.info(f"Adding review layer {name} with {len(geoms)} features")
+
+    return add_shapely_layer(
+        qgis_instance_handle=QgsProject.instance(),
+        geoms=geoms,
+        name=name,
+        group=review_group,
+        columns=list(columns),
+        visible=True,
+        crs=crs,
+    )
@@ -0,0 +1,228 @@
+"""Synthetic solutions of configurable size, for benchmarking the conversion paths."""
+
+from typing import List, NamedTuple, Tuple
+
+import shapely
+
+from sync_module.model import Solution
+from sync_module.shared import LanguageBundle, MIDoorType
+
+__all__ = ["SyntheticVenueScale", "make_synthetic_solution", "make_synthetic_osm_xml"]
+
+ORIGIN = (10.0, 56.0)  # lon, lat
+BUILDING_SIZE = 0.002  # degrees
+BUILDING_SPACING = 0.003
+VENUE_SPACING = 0.05
+
+
+class SyntheticVenueScale(NamedTuple):
+    """
+    Counts per parent, e.g. rooms is the number of rooms on every floor
+    """
+
+    venues: int = 1
+    buildings: int = 1
+    floors: int = 2
+    rooms: int = 16
+    areas: int = 4
+    pois: int = 8
+    doors: int = 8
+    graph_edges: int = 32
+
+    @property
+    def num_floors(self) -> int:
+        return self.venues * self.buildings * self.floors
+
+    @property
+    def num_locations(self) -> int:
+        return self.num_floors * (self.rooms + self.areas + self.pois)
+
+
+def grid_cells(
+    count: int, min_x: float, min_y: float, size: float
+) -> List[Tuple[float, float, float, float]]:
+    """
+    Splits a square into at least count equally sized cells, row by row
+
+    :param count:
+    :param min_x:
+    :param min_y:
+    :param size:
+    :return: (min_x, min_y, max_x, max_y) of the first count cells
+    """
+    side = 1
+    while side * side < count:
+        side += 1
+
+    cell = size / side
+
+    return [
+        (
+            min_x + (i % side) * cell,
+            min_y + (i // side) * cell,
+            min_x + (i % side + 1) * cell,
+            min_y + (i // side + 1) * cell,
+        )
+        for i in range(count)
+    ]
+
+
+def make_synthetic_osm_xml(
+    floor_boxes: List[Tuple[int, Tuple[float, float, float, float]]],
+    edges_per_floor: int,
+) -> str:
+    """
+    A chain of footway edges across every floor box, with a level tag per floor
+
+    :param floor_boxes: (floor index, building box) pairs
+    :param edges_per_floor:
+    :return:
+    """
+    nodes = []
+    ways = []
+    node_id = 0
+    way_id = 0
+
+    for floor_index, (min_x, min_y, max_x, max_y) in floor_boxes:
+        first_node_id = node_id - 1
+        for i in range(edges_per_floor + 1):
+            node_id -= 1
+            t = i / max(edges_per_floor, 1)
+            nodes.append(
+                f'<node id="{node_id}" lat="{min_y + t * (max_y - min_y):.9f}" '
+                f'lon="{min_x + t * (max_x - min_x):.9f}">'
+                f'<tag k="level" v="{floor_index}"/></node>'
+            )
+
+        for i in range(edges_per_floor):
+            way_id -= 1
+            ways.append(
+                f'<way id="{way_id}"><nd ref="{first_node_id - i}"/><nd ref="{first_node_id - i - 1}"/>'
+                f'<tag k="highway" v="footway"/><tag k="level" v="{floor_index}"/></way>'
+            )
+
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><osm version="0.6" generator="synthetic">'
+        + "".join(nodes)
+        + "".join(ways)
+        + "</osm>"
+    )
+
+
+def make_synthetic_solution(
+    scale: SyntheticVenueScale = SyntheticVenueScale(), name: str = "synthetic"
+) -> Solution:
+    """
+    Builds a solution with scale.venues venues, each with a graph, its buildings laid out in a row,
+    and every floor tiled with rooms, areas, points of interest and doors.
+
+    :param scale:
+    :param name:
+    :return:
+    """
+    solution = Solution(_external_id=name, _name=name, _customer_id=name)
+
+    location_type_key = solution.add_location_type(
+        admin_id="synthetic", translations={"en": LanguageBundle(name="synthetic")}
+    )
+    door_type = next(iter(MIDoorType))
+
+    for ith_venue in range(scale.venues):
+        venue_x = ORIGIN[0] + ith_venue * VENUE_SPACING
+        venue_y = ORIGIN[1]
+
+        building_boxes = [
+            (
+                venue_x + ith_building * BUILDING_SPACING,
+                venue_y,
+                venue_x + ith_building * BUILDING_SPACING + BUILDING_SIZE,
+                venue_y + BUILDING_SIZE,
+            )
+            for ith_building in range(scale.buildings)
+        ]
+        venue_polygon = shapely.box(
+            building_boxes[0][0],
+            venue_y,
+            building_boxes[-1][2],
+            venue_y + BUILDING_SIZE,
+        )
+
+        venue_admin_id = f"{name}_v{ith_venue}"
+        venue_key = solution.add_venue(
+            admin_id=venue_admin_id,
+            polygon=venue_polygon,
+            translations={"en": LanguageBundle(name=venue_admin_id)},
+        )
+
+        graph_key = solution.add_graph(
+            graph_id=f"{venue_admin_id}_graph",
+            osm_xml=make_synthetic_osm_xml(
+                [
+                    (floor_index, building_box)
+                    for building_box in building_boxes
+                    for floor_index in range(scale.floors)
+                ],
+                scale.graph_edges,
+            ),
+            boundary=venue_polygon,
+        )
+        solution.update_venue(venue_key, graph_key=graph_key)
+
+        for ith_building, building_box in enumerate(building_boxes):
+            building_admin_id = f"{venue_admin_id}_b{ith_building}"
+            building_polygon = shapely.box(*building_box)
+
+            building_key = solution.add_building(
+                admin_id=building_admin_id,
+                polygon=building_polygon,
+                venue_key=venue_key,
+                translations={"en": LanguageBundle(name=building_admin_id)},
+            )
+
+            cells = grid_cells(
+                scale.rooms + scale.areas + scale.pois,
+                building_box[0],
+                building_box[1],
+                BUILDING_SIZE,
+            )
+
+            for floor_index in range(scale.floors):
+                floor_admin_id = f"{building_admin_id}_f{floor_index}"
+
+                floor_key = solution.add_floor(
+                    floor_index,
+                    polygon=building_polygon,
+                    building_key=building_key,
+                    translations={"en": LanguageBundle(name=floor_admin_id)},
+                )
+
+                for ith, cell in enumerate(cells):
+                    admin_id = f"{floor_admin_id}_l{ith}"
+                    common_kvs = dict(
+                        admin_id=admin_id,
+                        floor_key=floor_key,
+                        location_type_key=location_type_key,
+                        translations={"en": LanguageBundle(name=admin_id)},
+                    )
+
+                    if ith < scale.rooms:
+                        solution.add_room(polygon=shapely.box(*cell), **common_kvs)
+                    elif ith < scale.rooms + scale.areas:
+                        solution.add_area(polygon=shapely.box(*cell), **common_kvs)
+                    else:
+                        solution.add_point_of_interest(
+                            point=shapely.box(*cell).centroid, **common_kvs
+                        )
+
+                for ith, cell in enumerate(cells[: scale.doors]):
+                    solution.add_door(
+                        f"{floor_admin_id}_d{ith}",
+                        linestring=shapely.LineString(
+                            [(cell[0], cell[1]), (cell[2], cell[1])]
+                        ),
+                        door_type=door_type,
+                        floor_index=floor_index,
+                        graph_key=graph_key,
+                    )
+
+    return solution
@@ -0,0 +1,238 @@
+"""
+Download and upload throughput on synthetic venues, run headless with
+
+    QT_QPA_PLATFORM=offscreen pytest tests/benchmarks --benchmark-only
+
+Wall time is reported by pytest-benchmark, memory and feature counts of each stage are added to the extra info of
+every benchmark, compare runs with --benchmark-autosave and --benchmark-compare.
+
+python_peak_memory_mib only covers Python allocations, as traced by tracemalloc. max_rss_mib is the peak resident
+set size of the process after the stage, which includes the allocations of QGIS, but also those of every earlier
+stage, as it never decreases.
+
+Uploads are benchmarked with every layer marked as changed, which extracts and converts every feature, and
+with unchanged layers, which copies them from the download snapshot.
+"""
+
+import os
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pytest
+
+try:
+    import resource
+except ImportError:  # Not on Windows
+    resource = None
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("qgis.core")
+
+# noinspection PyUnresolvedReferences
+from qgis.core import QgsProject, QgsVectorLayer
+
+from mi_companion.layer_descriptors import DATABASE_GROUP_DESCRIPTOR
+from mi_companion.mi_editor.conversion.layers.from_hierarchy import (
+    solution as from_hierarchy_solution,
+)
+from mi_companion.mi_editor.conversion.layers.from_hierarchy.solution import (
+    convert_solution_layers_to_solution,
+)
+from mi_companion.mi_editor.conversion.layers.from_solution.solution import (
+    add_solution_layers,
+)
+from mi_companion.mi_editor.hierarchy.change_tracking import mark_layer_changed
+from .synthetic_venue import SyntheticVenueScale, make_synthetic_solution
+from ..utilities import get_qgis_app_crashing
+
+SCALES = {
+    "small": SyntheticVenueScale(),
+    "medium": SyntheticVenueScale(
+        buildings=2, floors=5, rooms=64, areas=16, pois=32, doors=32, graph_edges=128
+    ),
+    "large": SyntheticVenueScale(
+        venues=2,
+        buildings=4,
+        floors=10,
+        rooms=128,
+        areas=32,
+        pois=64,
+        doors=64,
+        graph_edges=512,
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def qgis_instance_handle() -> Any:
+    _, _, iface, _ = get_qgis_app_crashing()
+
+    return SimpleNamespace(
+        iface=iface, iface_=iface, qgis_project=QgsProject.instance()
+    )
+
+
+def count_project_features() -> Dict[str, int]:
+    layers = [
+        layer
+        for layer in QgsProject.instance().mapLayers().values()
+        if isinstance(layer, QgsVectorLayer)
+    ]
+
+    return {
+        "layers": len(layers),
+        "features": sum(layer.featureCount() for layer in layers),
+    }
+
+
+def max_rss_mib() -> Optional[float]:
+    """
+    Peak resident set size of the process so far, None where it can not be read
+
+    :return:
+    """
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if os.uname().sysname == "Darwin":  # Bytes, kilobytes elsewhere
+        return max_rss / 2**20
+
+    return max_rss / 2**10
+
+
+def measure_memory(stage: Callable[[], Any]) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Runs the stage once under tracemalloc, outside of the timed rounds
+
+    :param stage:
+    :return: The result of the stage and its memory extra info
+    """
+    tracemalloc.start()
+    try:
+        result = stage()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    max_rss = max_rss_mib()
+
+    return result, {
+        "python_peak_memory_mib": round(peak / 2**20, 1),
+        "max_rss_mib": None if max_rss is None else round(max_rss, 1),
+    }
+
+
+def download(qgis_instance_handle: Any, solution: Any) -> None:
+    add_solution_layers(
+        qgis_instance_handle=qgis_instance_handle,
+        solution=solution,
+        layer_tree_root=QgsProject.instance().layerTreeRoot(),
+    )
+
+
+def mark_all_layers_changed() -> None:
+    """
+    Makes the upload extract and convert every layer, instead of copying them from the download snapshot
+
+    :return:
+    """
+    for layer_id in QgsProject.instance().mapLayers():
+        mark_layer_changed(layer_id)
+
+
+def upload(qgis_instance_handle: Any) -> Any:
+    return convert_solution_layers_to_solution(
+        qgis_instance_handle,
+        progress_bar=None,
+        mi_group=QgsProject.instance()
+        .layerTreeRoot()
+        .findGroup(DATABASE_GROUP_DESCRIPTOR),
+        upload_venues=False,
+    )
+
+
+@pytest.fixture
+def offline_upload(monkeypatch: Any) -> None:
+    """
+    The synthetic solution does not exist remotely, so no existing solution is fetched for it
+    """
+    monkeypatch.setattr(
+        from_hierarchy_solution, "get_solution_name_external_id_map", lambda: {}
+    )
+
+
+@pytest.mark.parametrize("scale_name", list(SCALES))
+def test_add_solution_layers(
+    benchmark: Any, qgis_instance_handle: Any, scale_name: str
+) -> None:
+    scale = SCALES[scale_name]
+    benchmark.group = f"download-{scale_name}"
+
+    solution = make_synthetic_solution(scale)
+
+    QgsProject.instance().clear()
+    _, memory = measure_memory(lambda: download(qgis_instance_handle, solution))
+    counts = count_project_features()
+
+    benchmark.extra_info.update(
+        stage="add_solution_layers",
+        **memory,
+        floors=scale.num_floors,
+        locations=scale.num_locations,
+        **counts,
+    )
+
+    benchmark.pedantic(
+        download,
+        args=(qgis_instance_handle, solution),
+        setup=QgsProject.instance().clear,
+        rounds=3,
+        iterations=1,
+    )
+
+    assert count_project_features() == counts
+
+
+@pytest.mark.parametrize("layers_changed", [True, False], ids=["changed", "unchanged"])
+@pytest.mark.parametrize("scale_name", list(SCALES))
+def test_convert_solution_layers_to_solution(
+    benchmark: Any,
+    qgis_instance_handle: Any,
+    offline_upload: None,
+    scale_name: str,
+    layers_changed: bool,
+) -> None:
+    scale = SCALES[scale_name]
+    benchmark.group = f"upload-{scale_name}"
+
+    QgsProject.instance().clear()
+    download(qgis_instance_handle, make_synthetic_solution(scale))
+    counts = count_project_features()
+
+    setup = mark_all_layers_changed if layers_changed else None
+    if setup is not None:
+        setup()
+
+    solutions, memory = measure_memory(lambda: upload(qgis_instance_handle))
+
+    benchmark.extra_info.update(
+        stage="convert_solution_layers_to_solution",
+        layers_changed=layers_changed,
+        **memory,
+        floors=scale.num_floors,
+        locations=scale.num_locations,
+        **counts,
+    )
+
+    benchmark.pedantic(
+        upload, args=(qgis_instance_handle,), setup=setup, rounds=3, iterations=1
+    )
+
+    assert solutions
+    assert sum(
+        len(s.rooms) + len(s.areas) + len(s.points_of_interest) for s in solutions
+    ) == (scale.num_locations)
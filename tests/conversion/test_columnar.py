@@ -0,0 +1,16 @@
+import shapely
+
+
+def test_point_column_leaves_missing_coordinates_none() -> None:
+    from ..utilities import get_qgis_app
+
+    get_qgis_app()
+
+    from mi_companion.mi_editor.conversion.layers.from_hierarchy.columnar import (
+        point_column,
+    )
+
+    points = point_column([1.0, None, float("nan")], [2.0, 3.0, 4.0])
+
+    assert points[0].equals(shapely.Point(1.0, 2.0))
+    assert points[1] is None and points[2] is None
@@ -0,0 +1,61 @@
+import numpy
+import shapely
+
+
+def test_flags_doors_off_the_graph_and_wall_crossings_without_doors() -> None:
+    from ..utilities import get_qgis_app
+
+    get_qgis_app()
+
+    from mi_companion.mi_editor.conversion.layers.from_hierarchy.routing import (
+        doors_without_crossing_edge,
+        wall_crossings_without_door,
+    )
+
+    rooms = numpy.asarray(
+        shapely.from_wkt(
+            [
+                "POLYGON ((10 55, 10.0001 55, 10.0001 55.0001, 10 55.0001, 10 55))",
+                "POLYGON ((10.0001 55, 10.0002 55, 10.0002 55.0001, 10.0001 55.0001, 10.0001 55))",
+            ]
+        ),
+        dtype=object,
+    )
+    doors = numpy.asarray(
+        shapely.from_wkt(
+            [
+                "LINESTRING (10.0001 55.00002, 10.0001 55.00003)",
+                "LINESTRING (10.0001 55.00008, 10.0001 55.00009)",
+                "LINESTRING (10.0001 55.00002, 10.0001 55.00003)",  # Another floor
+            ]
+        ),
+        dtype=object,
+    )
+    door_floor_indices = numpy.asarray([0.0, 0.0, 1.0])
+    edges = numpy.asarray(
+        shapely.from_wkt(
+            [
+                "LINESTRING Z (10.00005 55.000025 0, 10.00015 55.000025 0)",  # Through the door
+                "LINESTRING Z (10.00005 55.00006 0, 10.00015 55.00006 0)",  # Through the wall
+            ]
+        ),
+        dtype=object,
+    )
+    edge_levels = numpy.asarray([0.0, 0.0])
+
+    assert doors_without_crossing_edge(
+        doors, door_floor_indices, edges, edge_levels
+    ).tolist() == [1, 2]
+
+    crossings, crossing_rooms = wall_crossings_without_door(
+        edges,
+        edge_levels,
+        rooms,
+        numpy.asarray([0.0, 0.0]),
+        doors,
+        door_floor_indices,
+        door_distance=0.5,
+    )
+
+    assert crossing_rooms == [[0, 1]]  # Once for the wall the rooms share
+    assert numpy.allclose(shapely.get_coordinates(crossings), [[10.0001, 55.00006]])
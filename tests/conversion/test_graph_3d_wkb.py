@@ -0,0 +1,41 @@
+import struct
+
+import numpy
+import shapely
+
+
+def reference_wkb(line: shapely.LineString, floor_height: float) -> bytes:
+    wkb = struct.pack("<BII", 1, 3002, len(line.coords))
+    for x, y, level in line.coords:
+        wkb += struct.pack(
+            "<dddd", x, y, floor_height / 2.0 + level * floor_height, level
+        )
+    return wkb
+
+
+def test_encodes_every_line_as_linestring_zm() -> None:
+    from ..utilities import get_qgis_app
+
+    get_qgis_app()
+
+    from mi_companion import FLOOR_HEIGHT
+    from mi_companion.mi_editor.conversion.layers.from_solution.routing.graph_3d_network import (
+        encode_linestring_zm_wkbs,
+    )
+
+    lines = [
+        shapely.LineString([(0, 0, 0), (1, 1, 1)]),
+        shapely.LineString([(2, 2, 2), (3, 3, 2), (4, 4, -1)]),
+    ]
+
+    coords, line_index = shapely.get_coordinates(
+        lines, include_z=True, return_index=True
+    )
+    level = coords[:, 2]
+    xyzm = numpy.column_stack(
+        (coords[:, :2], FLOOR_HEIGHT / 2.0 + level * FLOOR_HEIGHT, level)
+    )
+
+    wkbs = encode_linestring_zm_wkbs(xyzm, line_index, len(lines))
+
+    assert wkbs == [reference_wkb(line, FLOOR_HEIGHT) for line in lines]
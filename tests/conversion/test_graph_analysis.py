@@ -0,0 +1,39 @@
+import shapely
+
+
+def test_reachability_and_shortest_path_through_connectors() -> None:
+    from ..utilities import get_qgis_app
+
+    get_qgis_app()
+
+    from mi_companion.mi_editor.conversion.layers.from_hierarchy.routing import (
+        RoutingGraph,
+    )
+
+    lines = shapely.from_wkt(
+        [
+            "LINESTRING Z (10 55 0, 10.0001 55 0, 10.0002 55 0)",
+            "LINESTRING Z (10 55 1, 10.0002 55 1)",
+            "LINESTRING Z (10.01 55 0, 10.0101 55 0)",  # Not connected
+        ]
+    )
+    connectors = [
+        ("stairs", shapely.Point(10.0002, 55), 0),
+        ("stairs", shapely.Point(10.0002, 55), 1),
+    ]
+
+    routing_graph = RoutingGraph(lines, connectors, floor_height=4.0)
+
+    nodes = routing_graph.nearest_nodes(
+        [[10.00001, 55], [10, 55], [10.01, 55], [10.5, 55]], [0, 1, 0, 0]
+    )
+
+    assert nodes[3] == -1  # Nothing within the attach distance
+    assert routing_graph.reachable(nodes).tolist() == [True, True, False, False]
+
+    path, length = routing_graph.shortest_path(nodes[0], nodes[1])
+
+    assert shapely.get_coordinates(path, include_z=True)[-1].tolist() == [10, 55, 1]
+    assert 2 * 12.7 + 4.0 < length < 2 * 12.8 + 4.0
+
+    assert routing_graph.shortest_path(nodes[0], nodes[2]) is None
@@ -0,0 +1,64 @@
+import numpy
+import shapely
+
+
+def test_snaps_endpoints_within_tolerance_and_reports_near_misses() -> None:
+    from ..utilities import get_qgis_app
+
+    get_qgis_app()
+
+    from mi_companion.mi_editor.conversion.layers.from_hierarchy.routing import (
+        snap_graph_endpoints,
+    )
+
+    lines = numpy.asarray(
+        shapely.from_wkt(
+            [
+                "LINESTRING Z (10 55 1, 10.00001 55 1)",
+                "LINESTRING Z (10.0000100002 55 1, 10.00002 55 1)",  # About 1 cm apart
+                "LINESTRING Z (10.00001 55.000002 1, 10.00001 55.00001 1)",  # About 22 cm
+                "LINESTRING Z (10.0000100002 55 2, 10.00002 55 2)",  # Another level
+            ]
+        ),
+        dtype=object,
+    )
+
+    lines, num_snapped, near_misses = snap_graph_endpoints(
+        lines, tolerance=0.05, near_miss_distance=0.5
+    )
+
+    assert num_snapped == 1
+    assert shapely.get_coordinates(lines[1])[0].tolist() == [10.00001, 55]
+    assert shapely.get_coordinates(lines[3])[0].tolist() == [10.0000100002, 55]
+
+    assert len(near_misses) == 1
+    assert near_misses[0]["level"] == 1
+    assert 0.2 < near_misses[0]["distance_m"] < 0.25
+
+
+def test_edges_are_not_snapped_shut_or_near_misses_of_themselves() -> None:
+    from ..utilities import get_qgis_app
+
+    get_qgis_app()
+
+    from mi_companion.mi_editor.conversion.layers.from_hierarchy.routing import (
+        snap_graph_endpoints,
+    )
+
+    lines = numpy.asarray(
+        shapely.from_wkt(
+            [
+                "LINESTRING Z (10 55 1, 10.0000005 55 1)",  # About 3 cm long
+                "LINESTRING Z (11 55 1, 11.000005 55 1)",  # About 32 cm long
+            ]
+        ),
+        dtype=object,
+    )
+
+    lines, num_snapped, near_misses = snap_graph_endpoints(
+        lines, tolerance=0.05, near_miss_distance=0.5
+    )
+
+    assert num_snapped == 0
+    assert shapely.get_coordinates(lines[0]).tolist() == [[10, 55], [10.0000005, 55]]
+    assert not near_misses
@@ -0,0 +1,54 @@
+import pandas
+import pytest
+
+from mi_companion.mi_editor.conversion.layers.from_solution.location_frames import (
+    partition_frame_by_floor,
+)
+
+
+def make_location_frame() -> pandas.DataFrame:
+    return pandas.DataFrame(
+        {
+            "name": ["a", "b", "c", "d", "e"],
+            "floor.building.admin_id": ["b1", "b2", "b1", "b1", "b2"],
+            "floor.floor_index": [0, 1, 1, 0, 1],
+        },
+        index=["r1", "r2", "r3", "r4", "r5"],
+    )
+
+
+def test_partitions_cover_every_row_once():
+    sorted_df, partitions = partition_frame_by_floor(make_location_frame())
+
+    assert set(partitions) == {("b1", 0), ("b1", 1), ("b2", 1)}
+    assert sum(s.stop - s.start for s in partitions.values()) == 5
+
+
+def test_partition_matches_boolean_mask_and_keeps_order():
+    df = make_location_frame()
+    sorted_df, partitions = partition_frame_by_floor(df)
+
+    masked = df[
+        (df["floor.building.admin_id"] == "b1") & (df["floor.floor_index"] == 0)
+    ]
+    partition = sorted_df.iloc[partitions[("b1", 0)]]
+
+    assert list(partition.index) == list(masked.index) == ["r1", "r4"]
+    assert list(partition.columns) == list(df.columns)
+
+
+def test_empty_and_missing_key_columns():
+    assert partition_frame_by_floor(pandas.DataFrame())[1] == {}
+
+    with pytest.raises(KeyError):
+        partition_frame_by_floor(pandas.DataFrame({"name": ["a"]}))
+
+
+def test_partition_by_route_element_floor_index():
+    df = pandas.DataFrame(
+        {"name": ["a", "b", "c", "d"], "floor_index": ["1", "0", "1", "0"]}
+    )
+    sorted_df, partitions = partition_frame_by_floor(df, key_columns=("floor_index",))
+
+    assert set(partitions) == {("0",), ("1",)}
+    assert list(sorted_df.iloc[partitions[("1",)]]["name"]) == ["a", "c"]
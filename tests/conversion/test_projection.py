@@ -0,0 +1,24 @@
+import pyproj
+import shapely
+import shapely.ops
+from shapely.geometry import LineString, Point, Polygon
+
+from mi_companion.mi_editor.conversion.projection import transform_geoms
+
+
+def test_batch_transform_matches_per_geometry_transform():
+    transformer = pyproj.Transformer.from_crs("EPSG:4326", "EPSG:3857", always_xy=True)
+    geoms = [
+        Point(10.0, 56.0),
+        LineString([(10.0, 56.0, 1.0), (10.1, 56.1, 2.0)]),
+        Polygon([(10.0, 56.0), (10.1, 56.0), (10.1, 56.1)]),
+    ]
+
+    batched = transform_geoms(geoms, transformer)
+
+    assert len(batched) == len(geoms)
+    for batched_geom, geom in zip(batched, geoms):
+        assert batched_geom.has_z == geom.has_z
+        assert batched_geom.equals_exact(
+            shapely.ops.transform(transformer.transform, geom), 1e-6
+        )
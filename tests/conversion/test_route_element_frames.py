@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pandas
+import shapely
+
+
+def test_route_elements_of_the_graph_are_reprojected_once_in_floor_order(
+    monkeypatch,
+) -> None:
+    from ..utilities import get_qgis_app
+
+    get_qgis_app()
+
+    from mi_companion.mi_editor.conversion.layers.from_solution.routing import (
+        route_element_frames,
+    )
+
+    reprojected = []
+    monkeypatch.setattr(
+        route_element_frames,
+        "reproject_geometry_df_qgis",
+        lambda df: reprojected.append(len(df)),
+    )
+
+    df = pandas.DataFrame(
+        {
+            "admin_id": ["a", "b", "c", "d", "e", "f"],
+            "floor_index": ["10", "2", "2", "0", "2", "1"],
+            "point": [
+                shapely.Point(0, 0),
+                shapely.Point(1, 1),
+                shapely.Point(2, 2),
+                shapely.Point(3, 3),
+                shapely.Point(),  # Empty
+                shapely.Point(5, 5),
+            ],
+            "graph.graph_id": ["g", "g", "g", "g", "g", "other"],
+        }
+    )
+
+    sorted_df, floor_slices = route_element_frames.partition_route_elements_by_floor(
+        df, graph=SimpleNamespace(graph_id="g"), geometry_column="point", name="doors"
+    )
+
+    assert reprojected == [4]
+    assert list(floor_slices) == ["0", "2", "10"]
+    assert list(sorted_df.iloc[floor_slices["2"]]["admin_id"]) == ["b", "c"]
+    assert "graph.graph_id" not in sorted_df.columns
@@ -0,0 +1,50 @@
+import os
+
+from mi_companion.mi_editor.conversion.layers.from_solution.solution_snapshots import (
+    SolutionSnapshotKey,
+    SolutionSnapshotStore,
+)
+from sync_module.shared import LanguageBundle
+from sync_module.tools import to_json
+from ..benchmarks.synthetic_venue import make_synthetic_solution
+
+
+def test_snapshot_round_trip_and_freshness(tmp_path):
+    store = SolutionSnapshotStore(tmp_path, budget_bytes=2**30)
+    key = SolutionSnapshotKey("synthetic", "synthetic_v0")
+    solution = make_synthetic_solution()
+
+    assert store.load(key) is None
+    assert store.save(key, solution)
+    assert not store.save(key, solution)  # Unchanged on the server
+
+    assert to_json(store.load(key)) == to_json(solution)
+
+    solution.add_location_type(
+        admin_id="changed", translations={"en": LanguageBundle(name="changed")}
+    )
+    assert store.save(key, solution)
+
+
+def test_least_recently_used_snapshots_are_evicted(tmp_path):
+    store = SolutionSnapshotStore(tmp_path, budget_bytes=2**30)
+    solution = make_synthetic_solution()
+
+    keys = [SolutionSnapshotKey("synthetic", f"venue_{i}") for i in range(3)]
+    for key, last_used in zip(keys, (3, 1, 2)):
+        store.save(key, solution)
+        os.utime(store.snapshot_path(key), (last_used, last_used))
+
+    store.budget_bytes = 2 * store.snapshot_path(keys[0]).stat().st_size
+    store.evict()
+
+    assert [store.snapshot_path(key).exists() for key in keys] == [True, False, True]
+
+
+def test_save_leaves_no_temporary_files(tmp_path):
+    store = SolutionSnapshotStore(tmp_path, budget_bytes=2**30)
+    key = SolutionSnapshotKey("synthetic", "synthetic_v0")
+
+    store.save(key, make_synthetic_solution())
+
+    assert [p.name for p in tmp_path.iterdir()] == [key.file_name]
@@ -0,0 +1,32 @@
+def test_template_configures_layer_in_one_pass() -> None:
+    from ..utilities import get_qgis_app
+
+    get_qgis_app()
+
+    # noinspection PyUnresolvedReferences
+    from qgis.core import QgsFieldConstraints, QgsVectorLayer
+
+    from mi_companion.mi_editor.conversion.layers.from_solution.field_config_templates import (
+        route_element_field_config_template,
+    )
+
+    layer = QgsVectorLayer(
+        "Point?field=admin_id:string&field=floor_index:string&field=door_type:string",
+        "doors",
+        "memory",
+    )
+
+    route_element_field_config_template(route_element_type_column="door_type").apply(
+        [[layer], None]
+    )
+
+    fields = layer.fields()
+    admin_id_constraints = fields.field("admin_id").constraints().constraints()
+    assert admin_id_constraints & QgsFieldConstraints.ConstraintUnique
+    assert admin_id_constraints & QgsFieldConstraints.ConstraintNotNull
+    assert "uuid()" in layer.defaultValueDefinition(0).expression()
+
+    form_config = layer.editFormConfig()
+    assert form_config.reuseLastValue(fields.indexFromName("floor_index"))
+    assert form_config.reuseLastValue(fields.indexFromName("door_type"))
+    assert not form_config.reuseLastValue(fields.indexFromName("admin_id"))
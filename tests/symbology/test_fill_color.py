@@ -0,0 +1,26 @@
+def test_fill_color_column_applies_opacity_as_alpha() -> None:
+    from ..utilities import get_qgis_app
+
+    get_qgis_app()
+
+    import pandas
+
+    from mi_companion.mi_editor.conversion.styling import (
+        display_rule_fill_color_column,
+    )
+
+    df = pandas.DataFrame(
+        {
+            "display_rule.polygon.fill_color": ["#ff0000", None, "#00ff00", "nan"],
+            "display_rule.polygon.fill_opacity": [0.5, 1.0, None, 0.2],
+        }
+    )
+
+    fill_colors = display_rule_fill_color_column(df)
+
+    assert fill_colors[0] == "255,0,0,128"
+    assert pandas.isna(fill_colors[1])
+    assert fill_colors[2] == "0,255,0,255"
+    assert pandas.isna(fill_colors[3])
+
+    assert display_rule_fill_color_column(df.drop(columns=df.columns[0])) is None
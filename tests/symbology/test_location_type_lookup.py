@@ -0,0 +1,94 @@
+def test_cached_lookup_follows_location_type_edits() -> None:
+    from ..utilities import get_qgis_app
+
+    get_qgis_app()
+
+    # noinspection PyUnresolvedReferences
+    from qgis.core import (
+        QgsExpression,
+        QgsExpressionContext,
+        QgsFeature,
+        QgsProject,
+        QgsVectorLayer,
+    )
+
+    from mi_companion.qgis_utilities import (
+        LOCATION_TYPE_LOOKUP_CACHE,
+        get_cached_lookup_field_expression,
+    )
+
+    location_types = QgsVectorLayer(
+        "None?field=admin_id:string&field=display_rule.model2d.model:string",
+        "location_types",
+        "memory",
+    )
+    feature = QgsFeature(location_types.fields())
+    feature.setAttributes(["toilet", "toilet.svg"])
+    location_types.dataProvider().addFeatures([feature])
+    QgsProject.instance().addMapLayer(location_types)
+
+    rooms = QgsVectorLayer(
+        "Polygon?field=location_type:string&field=display_rule.model2d.model:string",
+        "rooms",
+        "memory",
+    )
+
+    expression = QgsExpression(
+        get_cached_lookup_field_expression(
+            rooms, referenced_layer_id=location_types.id()
+        )
+    )
+    room = QgsFeature(rooms.fields())
+    room.setAttributes(["toilet", None])
+    context = QgsExpressionContext()
+    context.setFeature(room)
+
+    assert expression.evaluate(context) == "toilet.svg"
+
+    location_types.startEditing()
+    location_types.changeAttributeValue(
+        next(location_types.getFeatures()).id(), 1, "wc.svg"
+    )
+
+    assert expression.evaluate(context) == "wc.svg"
+
+    location_types.rollBack()
+
+    assert expression.evaluate(context) == "toilet.svg"
+
+    location_types_id = location_types.id()
+    QgsProject.instance().removeMapLayer(location_types_id)
+
+    assert not LOCATION_TYPE_LOOKUP_CACHE.table(location_types_id)
+
+
+def test_lookup_reads_project_layers_that_were_not_read() -> None:
+    from ..utilities import get_qgis_app
+
+    get_qgis_app()
+
+    # noinspection PyUnresolvedReferences
+    from qgis.core import QgsFeature, QgsProject, QgsVectorLayer
+
+    from mi_companion.qgis_utilities import LocationTypeLookupCache
+
+    location_types = QgsVectorLayer(
+        "None?field=admin_id:string&field=display_rule.model2d.model:string",
+        "location_types",
+        "memory",
+    )
+    feature = QgsFeature(location_types.fields())
+    feature.setAttributes(["toilet", "toilet.svg"])
+    location_types.dataProvider().addFeatures([feature])
+    QgsProject.instance().addMapLayer(location_types)
+
+    cache = LocationTypeLookupCache()  # As after opening a project
+
+    assert (
+        cache.value(
+            location_types.id(), "admin_id", "toilet", "display_rule.model2d.model"
+        )
+        == "toilet.svg"
+    )
+
+    QgsProject.instance().removeMapLayer(location_types.id())